@@ -11,6 +11,9 @@ import {
   ChannelWithMembers,
   ChannelCreate,
   MessageWithDetails,
+  MessageHistoryPage,
+  MessageHistoryPageV2,
+  MessageHistoryQuery,
   MessageWithUser,
   MessageCreate
 } from "@repo/types";
@@ -180,12 +183,36 @@ export class ApiClient {
   // Message methods
   async getChannelMessages(
     channelId: string,
-    page = 1,
     limit = 50
   ): Promise<MessageWithDetails[]> {
-    const offset = (page - 1) * limit; // Convert page to offset
-    return this.request<MessageWithDetails[]>(
-      `/messages/channel/${channelId}?offset=${offset}&limit=${limit}`
+    // Latest page; use getChannelHistory with its cursors to scroll further
+    const page = await this.getChannelHistory(channelId, { limit });
+    return page.messages;
+  }
+
+  async getChannelHistory(
+    channelId: string,
+    query: MessageHistoryQuery = {}
+  ): Promise<MessageHistoryPage> {
+    const params = new URLSearchParams();
+    Object.entries(query).forEach(([key, value]) => {
+      if (value !== undefined) params.set(key, String(value));
+    });
+    return this.request<MessageHistoryPage>(
+      `/messages/channel/${channelId}/history?${params.toString()}`
+    );
+  }
+
+  async getChannelHistoryV2(
+    channelId: string,
+    query: MessageHistoryQuery = {}
+  ): Promise<MessageHistoryPageV2> {
+    const params = new URLSearchParams();
+    Object.entries(query).forEach(([key, value]) => {
+      if (value !== undefined) params.set(key, String(value));
+    });
+    return this.request<MessageHistoryPageV2>(
+      `/messages/channel/${channelId}/history/v2?${params.toString()}`
     );
   }
 
@@ -27,6 +27,12 @@ export class WebSocketClient {
   private reconnectTimer: NodeJS.Timeout | null = null;
   private connectionStatus: ConnectionStatus = "disconnected";
 
+  // Last event sequence number seen per channel, sent back on reconnect
+  private channelSeqs = new Map<string, number>();
+  // Live events that arrived ahead of the replay while resuming
+  private resuming = false;
+  private heldMessages: any[] = [];
+
   constructor(config: WebSocketConfig = {}) {
     this.maxReconnectAttempts = config.maxReconnectAttempts ?? 5;
     this.reconnectDelay = config.reconnectDelay ?? 1000;
@@ -79,6 +85,9 @@ export class WebSocketClient {
     
     this.token = null;
     this.reconnectAttempts = 0;
+    this.channelSeqs.clear();
+    this.resuming = false;
+    this.heldMessages = [];
     this.updateConnectionStatus("disconnected");
   }
 
@@ -184,6 +193,7 @@ export class WebSocketClient {
       console.log("✅ WebSocket connected successfully");
       this.reconnectAttempts = 0;
       this.updateConnectionStatus("connected");
+      this.resume();
       resolve?.();
     };
 
@@ -200,7 +210,10 @@ export class WebSocketClient {
     this.ws.onclose = (event) => {
       console.log(`🔌 WebSocket disconnected: Code ${event.code}, Reason: ${event.reason}`);
       this.updateConnectionStatus("disconnected");
-      if (!event.wasClean) {
+      if (event.code === 1013 || event.code === 1001) {
+        // Server asked us to come back later (busy, slow consumer or shutting down)
+        this.handleReconnect(this.parseRetryAfter(event.reason));
+      } else if (!event.wasClean) {
         this.handleReconnect();
       }
     };
@@ -212,6 +225,15 @@ export class WebSocketClient {
     };
   }
 
+  /**
+   * Ask the server for the channel events missed while disconnected
+   */
+  private resume(): void {
+    if (this.channelSeqs.size > 0) {
+      this.resuming = this.send("resume", { channels: Object.fromEntries(this.channelSeqs) });
+    }
+  }
+
   private handleMessage(message: any): void {
     const { type } = message;
     
@@ -220,6 +242,30 @@ export class WebSocketClient {
       return;
     }
 
+    if (type === "resume_complete") {
+      // Replay done; apply held live events in order
+      this.resuming = false;
+      const held = this.heldMessages.sort((a, b) => a.seq - b.seq);
+      this.heldMessages = [];
+      held.forEach(heldMessage => this.handleMessage(heldMessage));
+      return;
+    }
+
+    // Track sequenced channel events; skip ones already applied (replay overlap)
+    if (typeof message.seq === "number" && message.channel_id) {
+      const lastSeq = this.channelSeqs.get(message.channel_id) ?? 0;
+      if (message.seq <= lastSeq) {
+        return;
+      }
+      if (this.resuming && lastSeq > 0 && message.seq > lastSeq + 1) {
+        this.heldMessages.push(message);
+        return;
+      }
+      this.channelSeqs.set(message.channel_id, message.seq);
+    } else if (type === "resync_required") {
+      this.channelSeqs.delete(message.channel_id);
+    }
+
     // Handle heartbeat response
     if (type === "pong") {
       return; // Heartbeat handled, no need to propagate
@@ -244,7 +290,15 @@ export class WebSocketClient {
     this.handleReconnect();
   }
 
-  private handleReconnect(): void {
+  /**
+   * Read the server's retry hint ("...; retry_after=3.2") in milliseconds
+   */
+  private parseRetryAfter(reason: string): number | undefined {
+    const match = /retry_after=([\d.]+)/.exec(reason);
+    return match ? parseFloat(match[1]!) * 1000 : undefined;
+  }
+
+  private handleReconnect(retryAfter?: number): void {
     if (this.reconnectAttempts >= this.maxReconnectAttempts || !this.token) {
       console.error("Max reconnection attempts reached or no token available");
       this.updateConnectionStatus("disconnected");
@@ -252,7 +306,8 @@ export class WebSocketClient {
     }
 
     this.reconnectAttempts++;
-    const delay = this.reconnectDelay * Math.pow(2, this.reconnectAttempts - 1);
+    const backoff = this.reconnectDelay * Math.pow(2, this.reconnectAttempts - 1);
+    const delay = Math.max(backoff, retryAfter ?? 0);
     
     console.log(`Reconnecting in ${delay}ms (attempt ${this.reconnectAttempts}/${this.maxReconnectAttempts})`);
     
@@ -4,6 +4,7 @@ import { useChatStore } from "@/lib/store/chatStore";
 import { useAuthStore } from "@/lib/store/authStore";
 import { useWebSocketStore } from "@/lib/store/websocketStore";
 import { toast } from "@/hooks/use-toast";
+import { apiClient } from "@/lib/api/client";
 import { MessageWithDetails, User } from "@repo/types";
 
 export interface WebSocketHandlers {
@@ -13,12 +14,14 @@ export interface WebSocketHandlers {
   onMessageDeleted: (data: any) => void;
   onMessageReaction: (data: any) => void;
   onTypingIndicator: (data: any) => void;
+  onTypingUsers: (data: any) => void;
   onUserStatus: (data: any) => void;
   onUserJoined: (data: any) => void;
   onUserLeft: (data: any) => void;
   onMentionNotification: (data: any) => void;
   onOnlineUsers: (data: any) => void;
   onChannelCreated: (data: any) => void;
+  onResyncRequired: (data: any) => void;
   onError: (data: any) => void;
 }
 
@@ -233,6 +236,28 @@ export const createWebSocketHandlers = (): WebSocketHandlers => {
       }
     },
 
+    onTypingUsers: (data) => {
+      try {
+        const { channel_id, users } = data;
+
+        if (!channel_id || !Array.isArray(users)) {
+          console.warn("Received typing users without required fields:", data);
+          return;
+        }
+
+        // Snapshot replaces the channel's typing list; skip the current user
+        const currentUser = authStore.user;
+        chatStore.setTypingUsers(
+          channel_id,
+          users
+            .filter((user: any) => user.user_id !== currentUser?.id)
+            .map((user: any) => ({ userId: user.user_id, username: user.username }))
+        );
+      } catch (error) {
+        console.error("Error handling typing users:", error);
+      }
+    },
+
     onUserStatus: (data) => {
       try {
         const { user_id, status } = data;
@@ -408,6 +433,23 @@ export const createWebSocketHandlers = (): WebSocketHandlers => {
       }
     },
 
+    onResyncRequired: async (data) => {
+      try {
+        const { channel_id } = data;
+
+        if (!channel_id) {
+          console.warn("Received resync required without channel_id:", data);
+          return;
+        }
+
+        // Missed events are no longer buffered on the server; reload the channel
+        const channelMessages = await apiClient.getChannelMessages(channel_id);
+        chatStore.setMessages(channel_id, channelMessages as any);
+      } catch (error) {
+        console.error("Error handling resync required:", error);
+      }
+    },
+
     onError: (data) => {
       try {
         const { error_code, message, details } = data;
@@ -472,12 +514,14 @@ export const registerWebSocketHandlers = (wsClient: any) => {
     wsClient.on("message_deleted", handlers.onMessageDeleted),
     wsClient.on("message_reaction", handlers.onMessageReaction),
     wsClient.on("typing_indicator", handlers.onTypingIndicator),
+    wsClient.on("typing_users", handlers.onTypingUsers),
     wsClient.on("user_status", handlers.onUserStatus),
     wsClient.on("user_joined", handlers.onUserJoined),
     wsClient.on("user_left", handlers.onUserLeft),
     wsClient.on("mention_notification", handlers.onMentionNotification),
     wsClient.on("online_users", handlers.onOnlineUsers),
     wsClient.on("channel_created", handlers.onChannelCreated),
+    wsClient.on("resync_required", handlers.onResyncRequired),
     wsClient.on("error", handlers.onError),
   ];
 
@@ -15,7 +15,8 @@ from ..models.admin import (
     UserSummary, ChannelSummary, AdminDashboardStats, BulkActionRequest, BulkActionResult,
     AdminActionType, AdminTargetType
 )
-from ..websocket.connection_manager import connection_manager
+from ..models.websocket import ConnectionStatsMessage
+from ..websocket.publisher import event_publisher
 
 router = APIRouter()
 
@@ -69,6 +70,13 @@ async def get_admin_dashboard(current_user: User = Depends(require_admin)):
     )
 
 
+@router.get("/connections", response_model=ConnectionStatsMessage)
+async def get_connection_stats(current_user: User = Depends(require_admin)):
+    """Get WebSocket connection statistics and cluster-wide presence"""
+    stats = await event_publisher.get_connection_stats()
+    return ConnectionStatsMessage(**stats)
+
+
 # User Management
 @router.get("/users", response_model=List[UserSummary])
 async def get_users(
@@ -201,7 +209,7 @@ async def ban_user(
     )
     
     # Disconnect user from WebSocket
-    await connection_manager.disconnect_user(user_id)
+    await event_publisher.user_suspended(user_id)
     
     return {"message": "User banned successfully"}
 
@@ -275,7 +283,7 @@ async def suspend_user(
     )
     
     # Disconnect user from WebSocket
-    await connection_manager.disconnect_user(user_id)
+    await event_publisher.user_suspended(user_id)
     
     return {"message": "User suspended successfully"}
 
@@ -438,14 +446,8 @@ async def delete_message(
     )
     
     # Broadcast message deletion via WebSocket
-    await connection_manager.broadcast_to_channel(
-        message.channelId,
-        {
-            "type": "message_deleted",
-            "message_id": message_id,
-            "deleted_by": current_user.username,
-            "reason": request.reason
-        }
+    await event_publisher.message_deleted(
+        message.channelId, message_id, current_user.username, request.reason
     )
     
     return {"message": "Message deleted successfully"}
@@ -518,7 +520,7 @@ async def perform_bulk_action(
                     where={"id": target_id},
                     data={"status": UserStatus.BANNED}
                 )
-                await connection_manager.disconnect_user(target_id)
+                await event_publisher.user_suspended(target_id)
             
             elif request.action == AdminActionType.DELETE_MESSAGE:
                 await prisma.message.delete(where={"id": target_id})
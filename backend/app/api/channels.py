@@ -5,7 +5,7 @@ from ..core.database import prisma
 from ..models.user import User
 from ..models.channel import Channel, ChannelCreate, ChannelUpdate, ChannelWithMembers, JoinChannelRequest
 from .auth import get_current_user
-from ..websocket.connection_manager import connection_manager
+from ..websocket.publisher import event_publisher
 
 router = APIRouter()
 
@@ -131,7 +131,7 @@ async def create_channel(
         
         # Broadcast new channel creation to all connected users
         channel_dict = Channel.model_validate(channel).model_dump(mode='json')
-        await connection_manager.broadcast_channel_created(channel_dict)
+        await event_publisher.channel_created(channel_dict)
         
         # Return JSON-serializable channel
         return Channel.model_validate(channel).model_dump(mode='json')
@@ -230,7 +230,7 @@ async def join_channel(
     )
     
     # Join WebSocket room if user is connected
-    await connection_manager.join_channel(current_user.id, request.channel_id, current_user.username)
+    await event_publisher.member_joined(current_user.id, request.channel_id, current_user.username)
     
     return {"message": "Successfully joined channel"}
 
@@ -267,7 +267,7 @@ async def leave_channel(
     )
     
     # Leave WebSocket room if user is connected
-    await connection_manager.leave_channel(current_user.id, channel_id, current_user.username)
+    await event_publisher.member_left(current_user.id, channel_id, current_user.username)
     
     return {"message": "Successfully left channel"}
 
@@ -333,7 +333,7 @@ async def add_user_to_channel(
     )
     
     # Join WebSocket room if user is connected
-    await connection_manager.join_channel(user_id, channel_id, user_to_add.username)
+    await event_publisher.member_joined(user_id, channel_id, user_to_add.username)
     
     return {"message": f"Successfully added {user_to_add.username} to channel"}
 
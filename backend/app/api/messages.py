@@ -1,24 +1,25 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
+import base64
 import re
 
 from ..core.database import prisma
-from ..models.user import User
+from ..generated import Json
+from ..models.user import User, UserPublic
 from ..models.message import (
     Message, MessageCreate, MessageUpdate, MessageWithUser, MessageWithDetails,
-    MessageReaction, CreateReactionRequest, MessageFormatter, MessageFormatting
+    MessageReaction, CreateReactionRequest, MessageFormatter, MessageFormatting, FormattingScan,
+    MessageHistoryPage, MessageHistoryPageV2
 )
 from .auth import get_current_user
-from ..websocket.connection_manager import connection_manager
+from ..websocket.publisher import event_publisher
 
 router = APIRouter()
 
 
-async def extract_mentions(content: str) -> List[str]:
-    """Extract @mentions from message content"""
-    mentions = MessageFormatter.extract_mentions(content)
-    
-    # Get user IDs for mentioned usernames
+async def resolve_mentions(mentions: List[str]) -> List[str]:
+    """Get user IDs for mentioned usernames"""
     if mentions:
         users = await prisma.user.find_many(
             where={"username": {"in": mentions}}
@@ -28,37 +29,93 @@ async def extract_mentions(content: str) -> List[str]:
     return []
 
 
-async def process_message_formatting(content: str) -> tuple[str, MessageFormatting]:
-    """Process message content and return sanitized content with formatting metadata"""
-    # Validate formatting syntax
-    if not MessageFormatter.validate_formatting(content):
+async def process_message_formatting(content: str) -> FormattingScan:
+    """Validate message content and return its sanitized content, formatting metadata and mentions"""
+    scan = MessageFormatter.scan(content)
+    if not scan.valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid formatting syntax. Check your bold (**), code (`), and code block (```) markers."
         )
     
-    # Sanitize content while preserving formatting
-    sanitized_content = MessageFormatter.sanitize_content(content)
-    
-    # Parse formatting metadata
-    formatting = MessageFormatter.parse_formatting(sanitized_content)
-    
-    return sanitized_content, formatting
+    return scan
 
 
-@router.get("/channel/{channel_id}", response_model=List[MessageWithDetails])
-async def get_channel_messages(
-    channel_id: str,
-    current_user: User = Depends(get_current_user),
-    limit: int = Query(50, le=100),
-    offset: int = Query(0, ge=0)
-):
-    """Get messages for a channel"""
-    # Check if user is member of the channel
+def stored_formatting(msg) -> MessageFormatting:
+    """Formatting saved with the message when it was written"""
+    # Rows the backfill has not reached yet are parsed on the fly
+    if msg.formatting is not None:
+        return MessageFormatting.model_validate(msg.formatting)
+    return MessageFormatter.parse_formatting(msg.content)
+
+
+# Relations loaded for every message returned by the history endpoints
+MESSAGE_DETAILS_INCLUDE = {
+    "user": True,
+    "reactions": {
+        "include": {"user": True}
+    },
+    "mentions": {
+        "include": {"user": True}
+    }
+}
+
+# Relations loaded by the compact history; no user rows, those go in a side table
+COMPACT_HISTORY_INCLUDE = {
+    "reactions": {"order_by": {"createdAt": "asc"}},
+    "mentions": True
+}
+
+# Reacting user ids listed per emoji in the compact history
+REACTION_SAMPLE_SIZE = 3
+
+# Keyset order of channel history; id breaks ties between equal timestamps
+HISTORY_ORDER_DESC = [{"createdAt": "desc"}, {"id": "desc"}]
+HISTORY_ORDER_ASC = [{"createdAt": "asc"}, {"id": "asc"}]
+
+
+def encode_cursor(msg) -> str:
+    """Opaque cursor pointing at a message's (createdAt, id) position"""
+    raw = f"{msg.createdAt.isoformat()}|{msg.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Position encoded by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), message_id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def older_than(created_at: datetime, message_id: str) -> dict:
+    """Filter for messages before a position, in (createdAt, id) order"""
+    # The plain createdAt bound lets Postgres seek the index before applying the tie-break
+    return {
+        "createdAt": {"lte": created_at},
+        "OR": [{"createdAt": {"lt": created_at}}, {"id": {"lt": message_id}}]
+    }
+
+
+def newer_than(created_at: datetime, message_id: str) -> dict:
+    """Filter for messages after a position, in (createdAt, id) order"""
+    return {
+        "createdAt": {"gte": created_at},
+        "OR": [{"createdAt": {"gt": created_at}}, {"id": {"gt": message_id}}]
+    }
+
+
+async def require_channel_member(channel_id: str, user_id: str):
+    """Raise 403 unless the user is a member of the channel"""
     member = await prisma.channelmember.find_unique(
         where={
             "userId_channelId": {
-                "userId": current_user.id,
+                "userId": user_id,
                 "channelId": channel_id
             }
         }
@@ -69,28 +126,14 @@ async def get_channel_messages(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to channel"
         )
-    
-    messages = await prisma.message.find_many(
-        where={"channelId": channel_id},
-        include={
-            "user": True,
-            "reactions": {
-                "include": {"user": True}
-            },
-            "mentions": {
-                "include": {"user": True}
-            }
-        },
-        order={"createdAt": "desc"},
-        take=limit,
-        skip=offset
-    )
-    
+
+
+def build_message_details(messages) -> List[dict]:
+    """Convert messages loaded with MESSAGE_DETAILS_INCLUDE to response dicts"""
     result = []
     for msg in messages:
         try:
-            # Parse formatting for each message
-            formatting = MessageFormatter.parse_formatting(msg.content)
+            formatting = stored_formatting(msg)
             
             # Create message object manually to avoid validation issues
             message_dict = {
@@ -141,7 +184,209 @@ async def get_channel_messages(
             print(f"Error processing message {msg.id}: {e}")
             continue
     
-    return list(reversed(result))  # Return in chronological order
+    return result
+
+
+async def fetch_history_page(
+    channel_id: str,
+    limit: int,
+    before: Optional[str],
+    after: Optional[str],
+    around: Optional[str],
+    include: dict
+) -> Tuple[list, bool, bool]:
+    """One page of channel history in chronological order
+    
+    Also returns whether older and newer messages exist beyond the page.
+    """
+    if sum(param is not None for param in (before, after, around)) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use only one of before, after and around"
+        )
+    
+    has_older = has_newer = False
+    
+    if around is not None:
+        anchor = await prisma.message.find_unique(where={"id": around}, include=include)
+        if not anchor or anchor.channelId != channel_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Message not found"
+            )
+        
+        # Split the rest of the page evenly on both sides of the anchor
+        older_limit = (limit - 1) // 2
+        newer_limit = limit - 1 - older_limit
+        older = await prisma.message.find_many(
+            where={"channelId": channel_id, **older_than(anchor.createdAt, anchor.id)},
+            include=include,
+            order=HISTORY_ORDER_DESC,
+            take=older_limit + 1
+        )
+        newer = await prisma.message.find_many(
+            where={"channelId": channel_id, **newer_than(anchor.createdAt, anchor.id)},
+            include=include,
+            order=HISTORY_ORDER_ASC,
+            take=newer_limit + 1
+        )
+        
+        has_older = len(older) > older_limit
+        has_newer = len(newer) > newer_limit
+        messages = list(reversed(older[:older_limit])) + [anchor] + newer[:newer_limit]
+    elif after is not None:
+        newer = await prisma.message.find_many(
+            where={"channelId": channel_id, **newer_than(*decode_cursor(after))},
+            include=include,
+            order=HISTORY_ORDER_ASC,
+            take=limit + 1
+        )
+        has_older = True
+        has_newer = len(newer) > limit
+        messages = newer[:limit]
+    else:
+        where = {"channelId": channel_id}
+        if before is not None:
+            where.update(older_than(*decode_cursor(before)))
+            has_newer = True
+        older = await prisma.message.find_many(
+            where=where,
+            include=include,
+            order=HISTORY_ORDER_DESC,
+            take=limit + 1
+        )
+        has_older = len(older) > limit
+        messages = list(reversed(older[:limit]))
+    
+    return messages, has_older, has_newer
+
+
+def page_cursors(messages: list, has_older: bool, has_newer: bool) -> dict:
+    """prev_cursor and next_cursor of a history page"""
+    return {
+        "prev_cursor": encode_cursor(messages[0]) if messages and has_older else None,
+        "next_cursor": encode_cursor(messages[-1]) if messages and has_newer else None
+    }
+
+
+async def build_compact_history(messages: list, current_user_id: str) -> dict:
+    """Messages loaded with COMPACT_HISTORY_INCLUDE plus the users they reference"""
+    user_ids = set()
+    result = []
+    for msg in messages:
+        reactions = {}
+        for reaction in msg.reactions:
+            summary = reactions.setdefault(reaction.emoji, {
+                "emoji": reaction.emoji,
+                "count": 0,
+                "me": False,
+                "user_ids": []
+            })
+            summary["count"] += 1
+            if reaction.userId == current_user_id:
+                summary["me"] = True
+            if len(summary["user_ids"]) < REACTION_SAMPLE_SIZE:
+                summary["user_ids"].append(reaction.userId)
+                user_ids.add(reaction.userId)
+        
+        mention_ids = [mention.userId for mention in msg.mentions]
+        user_ids.add(msg.userId)
+        user_ids.update(mention_ids)
+        
+        result.append({
+            "id": msg.id,
+            "content": msg.content,
+            "user_id": msg.userId,
+            "channel_id": msg.channelId,
+            "created_at": msg.createdAt,
+            "updated_at": msg.updatedAt,
+            "is_edited": msg.isEdited,
+            "formatting": stored_formatting(msg),
+            "mention_ids": mention_ids,
+            "reactions": list(reactions.values())
+        })
+    
+    users = await prisma.user.find_many(where={"id": {"in": list(user_ids)}}) if user_ids else []
+    
+    return {
+        "messages": result,
+        "users": {user.id: UserPublic.model_validate(user) for user in users}
+    }
+
+
+@router.get("/channel/{channel_id}", response_model=List[MessageWithDetails], deprecated=True)
+async def get_channel_messages(
+    channel_id: str,
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(50, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """Get messages for a channel; use /channel/{channel_id}/history to page through history"""
+    await require_channel_member(channel_id, current_user.id)
+    
+    messages = await prisma.message.find_many(
+        where={"channelId": channel_id},
+        include=MESSAGE_DETAILS_INCLUDE,
+        order={"createdAt": "desc"},
+        take=limit,
+        skip=offset
+    )
+    
+    return build_message_details(reversed(messages))  # Return in chronological order
+
+
+@router.get("/channel/{channel_id}/history", response_model=MessageHistoryPage)
+async def get_channel_history(
+    channel_id: str,
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=100),
+    before: Optional[str] = Query(None, description="prev_cursor of a page; returns older messages"),
+    after: Optional[str] = Query(None, description="next_cursor of a page; returns newer messages"),
+    around: Optional[str] = Query(None, description="Message id to center the page on")
+):
+    """Page through a channel's messages with cursors
+    
+    Without a cursor the latest messages are returned. Messages are always in
+    chronological order. prev_cursor is set when older messages exist and
+    next_cursor when newer ones do.
+    """
+    await require_channel_member(channel_id, current_user.id)
+    
+    messages, has_older, has_newer = await fetch_history_page(
+        channel_id, limit, before, after, around, MESSAGE_DETAILS_INCLUDE
+    )
+    
+    return {
+        "messages": build_message_details(messages),
+        **page_cursors(messages, has_older, has_newer)
+    }
+
+
+@router.get("/channel/{channel_id}/history/v2", response_model=MessageHistoryPageV2)
+async def get_channel_history_v2(
+    channel_id: str,
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=100),
+    before: Optional[str] = Query(None, description="prev_cursor of a page; returns older messages"),
+    after: Optional[str] = Query(None, description="next_cursor of a page; returns newer messages"),
+    around: Optional[str] = Query(None, description="Message id to center the page on")
+):
+    """Page through a channel's messages with cursors, in the compact format
+    
+    Pages like /channel/{channel_id}/history, but messages only carry user
+    ids. Each referenced user appears once in `users`, and reactions are
+    summarized per emoji.
+    """
+    await require_channel_member(channel_id, current_user.id)
+    
+    messages, has_older, has_newer = await fetch_history_page(
+        channel_id, limit, before, after, around, COMPACT_HISTORY_INCLUDE
+    )
+    
+    return {
+        **await build_compact_history(messages, current_user.id),
+        **page_cursors(messages, has_older, has_newer)
+    }
 
 
 @router.post("/", response_model=MessageWithUser)
@@ -170,13 +415,15 @@ async def create_message(
             )
         
         # Process message formatting
-        sanitized_content, formatting = await process_message_formatting(message_data.content)
+        scan = await process_message_formatting(message_data.content)
+        sanitized_content, formatting = scan.content, scan.formatting
         print(f"Processed content: {sanitized_content}")
         
         # Create message
         message = await prisma.message.create(
             data={
                 "content": sanitized_content,
+                "formatting": Json(formatting.model_dump()),
                 "userId": current_user.id,
                 "channelId": message_data.channel_id
             },
@@ -186,7 +433,7 @@ async def create_message(
         print(f"Created message: {message.id}")
         
         # Handle mentions
-        mentioned_user_ids = await extract_mentions(sanitized_content)
+        mentioned_user_ids = await resolve_mentions(scan.mentions)
         if mentioned_user_ids:
             mention_data = [
                 {"userId": user_id, "messageId": message.id}
@@ -196,7 +443,7 @@ async def create_message(
             
             # Send mention notifications via WebSocket
             for user_id in mentioned_user_ids:
-                await connection_manager.broadcast_mention_notification(user_id, {
+                await event_publisher.user_mentioned(user_id, {
                     "message_id": message.id,
                     "channel_id": message_data.channel_id,
                     "content": sanitized_content,
@@ -237,7 +484,7 @@ async def create_message(
         print(f"Prepared response: {message_response['id']}")
         
         # Broadcast new message to channel members via WebSocket
-        await connection_manager.broadcast_new_message(
+        await event_publisher.message_created(
             message_data.channel_id,
             message_response
         )
@@ -297,13 +544,15 @@ async def edit_message(
         )
     
     # Process message formatting
-    sanitized_content, formatting = await process_message_formatting(message_data.content)
+    scan = await process_message_formatting(message_data.content)
+    sanitized_content, formatting = scan.content, scan.formatting
     
     # Update message content and mark as edited
     updated_message = await prisma.message.update(
         where={"id": message_id},
         data={
             "content": sanitized_content,
+            "formatting": Json(formatting.model_dump()),
             "isEdited": True
         },
         include={"user": True}
@@ -314,7 +563,7 @@ async def edit_message(
     await prisma.mention.delete_many(where={"messageId": message_id})
     
     # Then add new mentions
-    mentioned_user_ids = await extract_mentions(sanitized_content)
+    mentioned_user_ids = await resolve_mentions(scan.mentions)
     if mentioned_user_ids:
         mention_data = [
             {"userId": user_id, "messageId": message_id}
@@ -324,7 +573,7 @@ async def edit_message(
         
         # Send mention notifications via WebSocket (DRY: reuse pattern)
         for user_id in mentioned_user_ids:
-            await connection_manager.broadcast_mention_notification(user_id, {
+            await event_publisher.user_mentioned(user_id, {
                 "message_id": message_id,
                 "channel_id": message.channelId,
                 "content": sanitized_content,
@@ -364,7 +613,7 @@ async def edit_message(
     }
     
     # Broadcast message edit to channel members via WebSocket
-    await connection_manager.broadcast_message_edit(
+    await event_publisher.message_edited(
         message.channelId,
         message_response
     )
@@ -416,15 +665,9 @@ async def delete_message(
     # Delete the message (cascades to mentions and reactions)
     await prisma.message.delete(where={"id": message_id})
     
-    # Broadcast message deletion via WebSocket (DRY: reuse broadcast pattern)
-    await connection_manager.broadcast_to_channel(
-        message.channelId,
-        {
-            "type": "message_deleted",
-            "message_id": message_id,
-            "deleted_by": current_user.username,
-            "channel_id": message.channelId
-        }
+    # Broadcast message deletion via WebSocket
+    await event_publisher.message_deleted(
+        message.channelId, message_id, current_user.username
     )
     
     return {"message": "Message deleted successfully"}
@@ -472,14 +715,11 @@ async def get_message(
             detail="Access denied to message"
         )
     
-    # Parse formatting for the message
-    formatting = MessageFormatter.parse_formatting(message.content)
-    
     return MessageWithDetails(
         **MessageWithUser(
-            **Message.model_validate(message).model_dump(),
+            **Message.model_validate(message).model_dump(exclude={"formatting"}),
             user=User.model_validate(message.user),
-            formatting=formatting
+            formatting=stored_formatting(message)
         ).model_dump(),
         mentions=[mention.user.username for mention in message.mentions],
         reactions=[
@@ -543,7 +783,7 @@ async def create_reaction(
         await prisma.messagereaction.delete(where={"id": existing_reaction.id})
         
         # Broadcast reaction removal via WebSocket
-        await connection_manager.broadcast_message_reaction(
+        await event_publisher.reaction_changed(
             message.channelId,
             reaction_data.message_id,
             {
@@ -567,7 +807,7 @@ async def create_reaction(
         )
         
         # Broadcast reaction addition via WebSocket
-        await connection_manager.broadcast_message_reaction(
+        await event_publisher.reaction_changed(
             message.channelId,
             reaction_data.message_id,
             {
@@ -610,14 +850,11 @@ async def get_my_mentions(
     result = []
     for mention in mentions:
         msg = mention.message
-        # Parse formatting for each message
-        formatting = MessageFormatter.parse_formatting(msg.content)
-        
         message_with_details = MessageWithDetails(
             **MessageWithUser(
-                **Message.model_validate(msg).model_dump(),
+                **Message.model_validate(msg).model_dump(exclude={"formatting"}),
                 user=User.model_validate(msg.user),
-                formatting=formatting
+                formatting=stored_formatting(msg)
             ).model_dump(),
             mentions=[mention.user.username for mention in msg.mentions],
             reactions=[
@@ -641,10 +878,10 @@ async def validate_message_formatting(
 ):
     """Validate message formatting and return preview"""
     try:
-        # Validate formatting syntax
-        is_valid = MessageFormatter.validate_formatting(content)
+        # Validate, sanitize and parse formatting in one pass
+        scan = MessageFormatter.scan(content)
         
-        if not is_valid:
+        if not scan.valid:
             return {
                 "valid": False,
                 "error": "Invalid formatting syntax. Check your bold (**), code (`), and code block (```) markers.",
@@ -652,16 +889,12 @@ async def validate_message_formatting(
                 "sanitized_content": None
             }
         
-        # Sanitize content and parse formatting
-        sanitized_content = MessageFormatter.sanitize_content(content)
-        formatting = MessageFormatter.parse_formatting(sanitized_content)
-        
         return {
             "valid": True,
             "error": None,
-            "formatting": formatting.model_dump(),
-            "sanitized_content": sanitized_content,
-            "mentions": MessageFormatter.extract_mentions(sanitized_content)
+            "formatting": scan.formatting.model_dump(),
+            "sanitized_content": scan.content,
+            "mentions": scan.mentions
         }
         
     except Exception as e:
@@ -9,6 +9,9 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6330"
+    REDIS_MAX_CONNECTIONS: int = 50  # Per client and process
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # Seconds a connection may idle before it is pinged on reuse
+    REDIS_CONNECT_TIMEOUT: float = 5.0
     
     # JWT
     JWT_SECRET_KEY: str = "your-super-secret-jwt-key-change-this-in-production"
@@ -19,6 +22,12 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "Pythia Conversations"
     
+    # Server
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: int = 0  # Worker processes in production; 0 = one per CPU available to the process
+    DEPLOYMENT_MODE: str = "combined"  # "combined", "api" (REST only) or "gateway" (/ws only)
+    
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:3001"]
     
@@ -34,6 +43,72 @@ class Settings(BaseSettings):
                 return [i.strip() for i in v.split(",") if i.strip()]
         return v
     
+    @validator("DEPLOYMENT_MODE")
+    def check_deployment_mode(cls, v):
+        if v not in ("combined", "api", "gateway"):
+            raise ValueError("DEPLOYMENT_MODE must be 'combined', 'api' or 'gateway'")
+        return v
+    
+    @validator("WS_BUS_BACKEND")
+    def check_bus_backend(cls, v):
+        if v not in ("pubsub", "streams"):
+            raise ValueError("WS_BUS_BACKEND must be 'pubsub' or 'streams'")
+        return v
+    
+    # WebSocket outbound queues
+    WS_SEND_QUEUE_SIZE: int = 256  # Soft limit; ephemeral events are dropped beyond it
+    WS_SEND_QUEUE_HARD_LIMIT: int = 1024  # Consumers reaching this are disconnected
+    WS_SLOW_CONSUMER_TIMEOUT: float = 10.0  # Seconds a consumer may stay over the soft limit
+
+    # WebSocket wire format
+    WS_PER_MESSAGE_DEFLATE: bool = True  # Offer permessage-deflate compression
+    WS_BATCH_MAX_EVENTS: int = 32  # Events packed into one frame by batching codecs
+
+    # WebSocket admission control
+    WS_ADMISSION_RATE: float = 50.0  # New connections admitted per second
+    WS_ADMISSION_BURST: int = 100  # Connections admitted at once before the rate applies
+    WS_MAX_PENDING_HANDSHAKES: int = 64  # Handshakes allowed in auth/auto-join at the same time
+    WS_MAX_SESSIONS_PER_USER: int = 10  # Per instance
+    WS_RETRY_JITTER: float = 5.0  # Max random seconds added to retry hints
+
+    # WebSocket shutdown drain
+    WS_DRAIN_PERIOD: float = 10.0  # Seconds over which open sockets are closed on shutdown
+    WS_DRAIN_BATCH_SIZE: int = 100  # Sockets closed together per drain step
+    WS_RECONNECT_SPREAD: float = 30.0  # Max random reconnect delay suggested to drained clients
+
+    # WebSocket inbound messages
+    WS_MAX_MESSAGE_SIZE: int = 16384  # Bytes of UTF-8; larger frames are rejected before parsing
+    WS_INBOUND_RATE: float = 20.0  # Messages per second per connection
+    WS_INBOUND_BURST: int = 40  # Messages a connection may send at once before the rate applies
+
+    # Cross-instance event bus
+    WS_BUS_BACKEND: str = "pubsub"  # "pubsub" or "streams"
+    WS_BUS_STREAM_SHARDS: int = 8  # Streams that topics are hashed onto
+    WS_BUS_STREAM_MAXLEN: int = 100000  # Approximate entries kept per stream
+    WS_BUS_STREAM_BATCH: int = 256  # Entries read per stream per XREADGROUP
+    WS_BUS_STREAM_BLOCK_MS: int = 1000  # How long a read waits for new entries
+    WS_BUS_DISPATCH_SHARDS: int = 8  # Workers handling received events; one channel always maps to one worker
+    WS_BUS_DISPATCH_QUEUE_SIZE: int = 1000  # Events queued per worker before the listener waits
+
+    # Reconnect replay
+    WS_REPLAY_BUFFER_SIZE: int = 256  # Recent sequenced events kept per channel
+    WS_REPLAY_MAX_AGE: float = 120.0  # Seconds an event stays replayable
+
+    # Typing indicators
+    TYPING_TICK_INTERVAL: float = 0.3  # Seconds between coalesced typing snapshots
+    TYPING_TTL: float = 6.0  # Seconds a typing state lives without a refresh
+
+    # Presence
+    PRESENCE_FLUSH_INTERVAL: float = 1.0  # Seconds between batched presence writes
+    PRESENCE_HEARTBEAT_INTERVAL: float = 10.0  # Seconds between node heartbeats; nodes expire after 3 missed
+    PRESENCE_CACHE_TTL: float = 2.0  # Seconds online-user lookups are cached locally
+
+    # Direct-send routing
+    ROUTE_LEASE_TTL: float = 30.0  # Seconds a user->node route lives without renewal; renewed every third
+
+    # Metrics
+    METRICS_SAMPLE_INTERVAL: float = 1.0  # Seconds between event-loop lag and queue depth samples
+
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6330/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6330/0"
@@ -46,4 +121,8 @@ class Settings(BaseSettings):
         case_sensitive = True
 
 
-settings = Settings() 
\ No newline at end of file
+settings = Settings()
+
+# Which tiers this process serves; see DEPLOYMENT_MODE
+SERVES_API = settings.DEPLOYMENT_MODE != "gateway"
+SERVES_GATEWAY = settings.DEPLOYMENT_MODE != "api"
@@ -0,0 +1,190 @@
+"""
+Prometheus metrics for the real-time gateway
+
+prometheus-client is optional: without it every metric below is a no-op and
+/metrics answers 404. Labels only take values from small fixed sets (event
+scopes, bus backends, registered message types, rejection reasons), never
+ids, so series counts stay flat as users and channels grow.
+
+Under the multi-worker launcher set PROMETHEUS_MULTIPROC_DIR to a writable
+directory so /metrics aggregates every worker instead of the one that
+happens to serve the scrape; the launcher clears it on start.
+"""
+from typing import Tuple
+import os
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    # Optional: metrics are disabled without prometheus-client
+    prometheus_client = None
+
+# Seconds; from a single enqueue up to a slow Redis round trip
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Recipients of one broadcast on one instance
+RECIPIENT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Commands sent in one Redis pipeline
+PIPELINE_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# Frames waiting in a connection's outbound queue
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class _NoopMetric:
+    """Stand-in used when prometheus-client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+
+def metrics_enabled() -> bool:
+    """Whether prometheus-client is installed"""
+    return prometheus_client is not None
+
+
+def _counter(name: str, documentation: str, labels: Tuple[str, ...] = ()):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Counter(name, documentation, labels)
+
+
+def _gauge(name: str, documentation: str, labels: Tuple[str, ...] = ()):
+    if prometheus_client is None:
+        return _NoopMetric()
+    # Summed over live workers in multiprocess mode
+    return prometheus_client.Gauge(name, documentation, labels, multiprocess_mode="livesum")
+
+
+def _histogram(name: str, documentation: str, buckets: Tuple[float, ...], labels: Tuple[str, ...] = ()):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Histogram(name, documentation, labels, buckets=buckets)
+
+
+# Broadcast fan-out on this instance; scope is "channel", "status" or "all"
+BROADCAST_DURATION = _histogram(
+    "ws_broadcast_duration_seconds",
+    "Time to queue one event on every local recipient",
+    LATENCY_BUCKETS, ("scope",)
+)
+BROADCAST_RECIPIENTS = _histogram(
+    "ws_broadcast_recipients",
+    "Local connections an event was queued on",
+    RECIPIENT_BUCKETS, ("scope",)
+)
+
+# Outbound delivery; reason is "dropped", "slow_consumer" or "send_error"
+SEND_FAILURES = _counter(
+    "ws_send_failures_total",
+    "Events or connections lost on the way to clients",
+    ("reason",)
+)
+SEND_QUEUE_DEPTH = _histogram(
+    "ws_send_queue_depth",
+    "Outbound queue depth of open connections, sampled every METRICS_SAMPLE_INTERVAL",
+    QUEUE_DEPTH_BUCKETS
+)
+CONNECTIONS = _gauge("ws_connections", "Open WebSocket connections")
+
+# Cross-instance bus; backend is "pubsub" or "streams"
+BUS_PUBLISH_DURATION = _histogram(
+    "ws_bus_publish_duration_seconds",
+    "Time to write published events to Redis",
+    LATENCY_BUCKETS, ("backend",)
+)
+BUS_DELIVERY_LAG = _histogram(
+    "ws_bus_delivery_lag_seconds",
+    "Time from publish on one instance to receipt on another",
+    LATENCY_BUCKETS
+)
+BUS_DISPATCH_LAG = _histogram(
+    "ws_bus_dispatch_lag_seconds",
+    "Time a received event waited in its dispatch shard queue",
+    LATENCY_BUCKETS
+)
+# shard is the dispatch shard number, bounded by WS_BUS_DISPATCH_SHARDS
+BUS_DISPATCH_QUEUE_DEPTH = _gauge(
+    "ws_bus_dispatch_queue_depth",
+    "Received events waiting per dispatch shard, sampled every METRICS_SAMPLE_INTERVAL",
+    ("shard",)
+)
+BUS_HANDLE_DURATION = _histogram(
+    "ws_bus_handle_duration_seconds",
+    "Time to deliver an event received from the bus to local clients",
+    LATENCY_BUCKETS
+)
+
+# Client messages; message_type only takes registered types
+INBOUND_MESSAGES = _counter(
+    "ws_inbound_messages_total",
+    "Client WebSocket messages handled",
+    ("message_type",)
+)
+INBOUND_REJECTED = _counter(
+    "ws_inbound_rejected_total",
+    "Client WebSocket messages rejected before reaching a handler",
+    ("reason",)
+)
+INBOUND_DURATION = _histogram(
+    "ws_inbound_duration_seconds",
+    "Time spent in client message handlers",
+    LATENCY_BUCKETS, ("message_type",)
+)
+
+# Auto-pipelined Redis commands
+REDIS_PIPELINE_COMMANDS = _histogram(
+    "redis_pipeline_commands",
+    "Commands sent per auto-pipeline round trip",
+    PIPELINE_SIZE_BUCKETS
+)
+REDIS_PIPELINE_DURATION = _histogram(
+    "redis_pipeline_duration_seconds",
+    "Round-trip time of one auto-pipeline",
+    LATENCY_BUCKETS
+)
+
+EVENT_LOOP_LAG = _histogram(
+    "event_loop_lag_seconds",
+    "How late a timer scheduled on the event loop fired",
+    LATENCY_BUCKETS
+)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition body and content type for a scrape"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def clear_multiprocess_metrics():
+    """Remove metric files left by a previous run; call before forking workers"""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith(".db"):
+                os.remove(os.path.join(directory, name))
+
+
+def mark_process_dead(pid: int):
+    """Drop a dead worker's live gauges in multiprocess mode"""
+    if prometheus_client is not None and "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
@@ -1,22 +1,123 @@
+from typing import Any, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
 import redis.asyncio as redis
 from .config import settings
+from .metrics import REDIS_PIPELINE_COMMANDS, REDIS_PIPELINE_DURATION
+
+logger = logging.getLogger(__name__)
 
 
-# Global Redis client instance
+# Global Redis client instances
 redis_client = None
+redis_raw_client = None
+
+
+def _create_pool(decode_responses: bool) -> redis.ConnectionPool:
+    """Connection pool with explicit sizing and health checks"""
+    # Not BlockingConnectionPool: in redis-py 5.0.1 it deadlocks until its
+    # timeout whenever a connection attempt fails
+    return redis.ConnectionPool.from_url(
+        settings.REDIS_URL,
+        decode_responses=decode_responses,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        socket_keepalive=True
+    )
 
 
 async def get_redis_client():
     """Get Redis client"""
     global redis_client
     if redis_client is None:
-        redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        redis_client = redis.Redis(connection_pool=_create_pool(decode_responses=True))
     return redis_client
 
 
+async def get_redis_raw_client():
+    """Get Redis client that returns bytes (for pre-encoded payloads)"""
+    global redis_raw_client
+    if redis_raw_client is None:
+        redis_raw_client = redis.Redis(connection_pool=_create_pool(decode_responses=False))
+    return redis_raw_client
+
+
+class AutoPipeline:
+    """Sends commands issued in the same event-loop tick as one pipeline
+
+    Callers await their own command's reply as usual. A single flusher task
+    takes everything queued so far, sends it in one round trip and repeats
+    while more arrives, so pipelines go out in submission order and a busy
+    channel costs one round trip per tick instead of one per event.
+    """
+
+    def __init__(self):
+        # (command, args, kwargs, future) waiting for the next pipeline
+        self.pending: List[Tuple[str, tuple, dict, asyncio.Future]] = []
+        self.flusher: Optional[asyncio.Task] = None
+
+    async def execute(self, command: str, *args, **kwargs) -> Any:
+        """Queue a command for the next pipeline and wait for its reply"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((command, args, kwargs, future))
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self):
+        # Let the rest of this tick queue its commands first
+        await asyncio.sleep(0)
+        while self.pending:
+            batch, self.pending = self.pending, []
+            await self._send(batch)
+
+    async def _send(self, batch: List[Tuple[str, tuple, dict, asyncio.Future]]):
+        started = time.perf_counter()
+        try:
+            client = await get_redis_raw_client()
+            pipe = client.pipeline(transaction=False)
+            for command, args, kwargs, _ in batch:
+                getattr(pipe, command)(*args, **kwargs)
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        REDIS_PIPELINE_COMMANDS.observe(len(batch))
+        REDIS_PIPELINE_DURATION.observe(time.perf_counter() - started)
+
+        for (*_, future), result in zip(batch, results):
+            # Callers that were cancelled no longer wait for a reply
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def close(self):
+        """Wait for queued commands to be sent"""
+        if self.flusher and not self.flusher.done():
+            await self.flusher
+        self.flusher = None
+
+
+# Global auto-pipeline; replies are raw (bytes), like get_redis_raw_client
+auto_pipeline = AutoPipeline()
+
+
 async def close_redis_client():
-    """Close Redis client"""
-    global redis_client
+    """Close Redis clients"""
+    global redis_client, redis_raw_client
+    await auto_pipeline.close()
     if redis_client:
-        await redis_client.close()
-        redis_client = None 
\ No newline at end of file
+        await redis_client.close(close_connection_pool=True)
+        redis_client = None
+    if redis_raw_client:
+        await redis_raw_client.close(close_connection_pool=True)
+        redis_raw_client = None
@@ -0,0 +1,283 @@
+"""
+Pre-forking production launcher
+
+The parent process imports the application once, binds the listening
+socket, freezes the GC heap and forks the workers, so the imported code and
+models stay shared copy-on-write. It then supervises the workers and
+restarts any that die. Each worker runs its own event loop and its own
+ConnectionManager; workers reach each other over the Redis bus like
+separate instances.
+"""
+import gc
+import importlib.util
+import logging
+import math
+import os
+import signal
+import sys
+import time
+from typing import Dict, Optional
+
+import uvicorn
+from uvicorn.supervisors import ChangeReload
+
+from .config import settings
+from .metrics import clear_multiprocess_metrics, mark_process_dead
+
+# Log through uvicorn's configured logger so supervisor messages show up with the workers'
+logger = logging.getLogger("uvicorn.error")
+
+# Seconds to wait before restarting a worker that died, doubled per quick crash
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 30.0
+
+# A worker that lived this long is considered healthy again
+HEALTHY_UPTIME = 60.0
+
+# Seconds to wait for workers to finish after a shutdown signal
+SHUTDOWN_TIMEOUT = 30.0
+
+
+def worker_count() -> int:
+    """Number of workers to run; WEB_CONCURRENCY=0 means one per available CPU"""
+    return settings.WEB_CONCURRENCY or available_cpus()
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on: its affinity mask, capped by a cgroup CPU quota
+
+    os.cpu_count() reports the host's cores, which in a container with a CPU
+    limit would fork far more workers (each with its own Redis pools and
+    Prisma engine) than the quota can run.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        cpus = os.cpu_count() or 1
+
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+def cgroup_cpu_quota() -> Optional[float]:
+    """CPU limit of this process's cgroup in CPUs, or None when unlimited"""
+    try:
+        # cgroup v2: "<quota> <period>", or "max <period>" when unlimited
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        # cgroup v1: a quota of -1 means unlimited
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+    except (OSError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
+
+
+def select_loop() -> str:
+    """uvloop when installed, the stdlib loop otherwise"""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def select_http() -> str:
+    """httptools when installed, h11 otherwise"""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def run_production(host: str, port: int, workers: int):
+    """Preload the app, fork the workers and supervise them until shutdown"""
+    # No collections while preloading; they would only churn objects we freeze below
+    gc.disable()
+
+    # Metric files of workers from a previous run would otherwise be summed in
+    clear_multiprocess_metrics()
+
+    # Preload: import the app and everything it pulls in before forking
+    from ..main import app
+
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        loop=select_loop(),
+        http=select_http(),
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+        log_level="info"
+    )
+    sock = config.bind_socket()
+
+    # Move everything imported so far out of the collector's reach, so the
+    # workers' GC passes do not write to (and un-share) the preloaded pages
+    gc.collect()
+    gc.freeze()
+    # Only the preload needed the collector off. The supervisor and the workers
+    # forked from it collect normally; the preloaded heap stays frozen in both
+    gc.enable()
+
+    logger.info(
+        f"Starting {workers} workers on {host}:{port} "
+        f"(loop={config.loop}, http={config.http}, pid={os.getpid()})"
+    )
+    Supervisor(config, sock, workers).run()
+
+
+def run_development(host: str, port: int):
+    """Run a single auto-reloading server that still drains on each reload"""
+    config = uvicorn.Config(
+        "app.main:app",
+        host=host,
+        port=port,
+        reload=True,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+        log_level="info"
+    )
+    # What uvicorn.run does for reload=True, with the draining server
+    sock = config.bind_socket()
+    ChangeReload(config, target=DrainingServer(config).run, sockets=[sock]).run()
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that drains WebSocket sessions before closing connections
+
+    uvicorn closes open WebSockets itself before running the lifespan
+    shutdown, so the paced drain has to start here to reach the clients.
+    Both start.py paths run this server; the app logs an error at startup
+    when it is served any other way.
+    """
+
+    async def serve(self, sockets=None):
+        from ..websocket.connection_manager import connection_manager
+        connection_manager.drains_before_close = True
+        await super().serve(sockets=sockets)
+
+    async def shutdown(self, sockets=None):
+        from ..websocket.connection_manager import connection_manager
+        await connection_manager.drain()
+        await super().shutdown(sockets=sockets)
+
+
+class Supervisor:
+    """Forks the workers and keeps them running"""
+
+    def __init__(self, config: uvicorn.Config, sock, workers: int):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+
+        # pid -> (slot, start time)
+        self.children: Dict[int, tuple] = {}
+        self.restart_delays: Dict[int, float] = {}
+        self.shutting_down = False
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            slot, started = self.children.pop(pid, (None, 0.0))
+            mark_process_dead(pid)
+            if slot is None or self.shutting_down:
+                continue
+
+            uptime = time.monotonic() - started
+            logger.warning(f"Worker {pid} exited with status {status} after {uptime:.0f}s; restarting")
+            self._restart(slot, uptime)
+
+        self.sock.close()
+        logger.info("All workers stopped")
+
+    def _restart(self, slot: int, uptime: float):
+        """Restart a worker, backing off if it keeps crashing right away"""
+        if uptime >= HEALTHY_UPTIME:
+            self.restart_delays.pop(slot, None)
+        delay = self.restart_delays.get(slot, RESTART_DELAY)
+        self.restart_delays[slot] = min(delay * 2, MAX_RESTART_DELAY)
+
+        time.sleep(delay)
+        if not self.shutting_down:
+            self._spawn(slot)
+
+    def _spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        self.children[pid] = (slot, time.monotonic())
+
+    def _run_worker(self):
+        """Worker process body; never returns"""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        exit_code = 0
+        try:
+            DrainingServer(self.config).run(sockets=[self.sock])
+        except BaseException as e:
+            logger.error(f"Worker {os.getpid()} crashed: {e}")
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def _handle_signal(self, signum, frame):
+        """Forward shutdown signals to the workers and wait for them"""
+        if self.shutting_down:
+            return
+        self.shutting_down = True
+        logger.info(f"Received signal {signum}; stopping {len(self.children)} workers")
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self._reaped(pid)
+
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        while self.children and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                # Already collected; their metric files still count until marked
+                for pid in list(self.children):
+                    self._reaped(pid)
+                break
+            if pid:
+                self._reaped(pid)
+            else:
+                time.sleep(0.1)
+
+        for pid in list(self.children):
+            logger.warning(f"Worker {pid} did not stop in time; killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self._reaped(pid)
+
+    def _reaped(self, pid: int):
+        """Forget a worker that has exited and drop its live gauge values"""
+        self.children.pop(pid, None)
+        mark_process_dead(pid)
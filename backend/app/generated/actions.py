@@ -4586,11 +4586,11 @@ class MessageActions(Generic[_PrismaModelT]):
         # find the first 10 Message records
         messages = await Message.prisma().find_many(take=10)
 
-        # find the first 5 Message records ordered by the isEdited field
+        # find the first 5 Message records ordered by the formatting field
         messages = await Message.prisma().find_many(
             take=5,
             order={
-                'isEdited': 'desc',
+                'formatting': 'desc',
             },
         )
         ```
@@ -4651,11 +4651,11 @@ class MessageActions(Generic[_PrismaModelT]):
         Example
         -------
         ```py
-        # find the second Message record ordered by the createdAt field
+        # find the second Message record ordered by the isEdited field
         message = await Message.prisma().find_first(
             skip=1,
             order={
-                'createdAt': 'desc',
+                'isEdited': 'desc',
             },
         )
         ```
@@ -4719,11 +4719,11 @@ class MessageActions(Generic[_PrismaModelT]):
         Example
         -------
         ```py
-        # find the second Message record ordered by the updatedAt field
+        # find the second Message record ordered by the createdAt field
         message = await Message.prisma().find_first_or_raise(
             skip=1,
             order={
-                'updatedAt': 'desc',
+                'createdAt': 'desc',
             },
         )
         ```
@@ -4893,7 +4893,7 @@ class MessageActions(Generic[_PrismaModelT]):
         # update all Message records
         total = await Message.prisma().update_many(
             data={
-                'userId': 'ihcahiead'
+                'updatedAt': datetime.datetime.utcnow()
             },
             where={}
         )
@@ -4957,7 +4957,7 @@ class MessageActions(Generic[_PrismaModelT]):
         results = await Message.prisma().count(
             select={
                 '_all': True,
-                'channelId': True,
+                'userId': True,
             },
         )
         ```
@@ -5024,7 +5024,7 @@ class MessageActions(Generic[_PrismaModelT]):
         results = await Message.prisma().count(
             select={
                 '_all': True,
-                'id': True,
+                'channelId': True,
             },
         )
         ```
@@ -5164,10 +5164,10 @@ class MessageActions(Generic[_PrismaModelT]):
         Example
         -------
         ```py
-        # group Message records by content values
+        # group Message records by id values
         # and count how many records are in each group
         results = await Message.prisma().group_by(
-            ['content'],
+            ['id'],
             count=True,
         )
         ```
@@ -5256,7 +5256,7 @@ class ChannelMemberActions(Generic[_PrismaModelT]):
         ```py
         users = await ChannelMember.prisma().query_raw(
             'SELECT * FROM ChannelMember WHERE id = $1',
-            'biheheiajg',
+            'ihcahiead',
         )
         ```
         """
@@ -5335,8 +5335,8 @@ class ChannelMemberActions(Generic[_PrismaModelT]):
         channelmember = await ChannelMember.prisma().create(
             data={
                 # data to create a ChannelMember record
-                'userId': 'jbgijghgb',
-                'channelId': 'hgjcghfbi',
+                'userId': 'biheheiajg',
+                'channelId': 'jbgijghgb',
             },
         )
         ```
@@ -5391,13 +5391,13 @@ class ChannelMemberActions(Generic[_PrismaModelT]):
             data=[
                 {
                     # data to create a ChannelMember record
-                    'userId': 'icadbcehj',
-                    'channelId': 'jchciaee',
+                    'userId': 'hgjcghfbi',
+                    'channelId': 'icadbcehj',
                 },
                 {
                     # data to create a ChannelMember record
-                    'userId': 'deeificjd',
-                    'channelId': 'bbcbhebbda',
+                    'userId': 'jchciaee',
+                    'channelId': 'deeificjd',
                 },
             ],
             skip_duplicates=True,
@@ -5451,7 +5451,7 @@ class ChannelMemberActions(Generic[_PrismaModelT]):
         ```py
         channelmember = await ChannelMember.prisma().delete(
             where={
-                'id': 'bejfijgcfb',
+                'id': 'bbcbhebbda',
             },
         )
         ```
@@ -5503,7 +5503,7 @@ class ChannelMemberActions(Generic[_PrismaModelT]):
         ```py
         channelmember = await ChannelMember.prisma().find_unique(
             where={
-                'id': 'caifcbgii',
+                'id': 'bejfijgcfb',
             },
         )
         ```
@@ -5554,7 +5554,7 @@ class ChannelMemberActions(Generic[_PrismaModelT]):
         ```py
         channelmember = await ChannelMember.prisma().find_unique_or_raise(
             where={
-                'id': 'igaibbfgj',
+                'id': 'caifcbgii',
             },
         )
         ```
@@ -5806,7 +5806,7 @@ class ChannelMemberActions(Generic[_PrismaModelT]):
         ```py
         channelmember = await ChannelMember.prisma().update(
             where={
-                'id': 'bggajdcbbi',
+                'id': 'igaibbfgj',
             },
             data={
                 # data to update the ChannelMember record to
@@ -5863,17 +5863,17 @@ class ChannelMemberActions(Generic[_PrismaModelT]):
         ```py
         channelmember = await ChannelMember.prisma().upsert(
             where={
-                'id': 'fcfhgbjed',
+                'id': 'bggajdcbbi',
             },
             data={
                 'create': {
-                    'id': 'fcfhgbjed',
-                    'userId': 'deeificjd',
-                    'channelId': 'bbcbhebbda',
+                    'id': 'bggajdcbbi',
+                    'userId': 'jchciaee',
+                    'channelId': 'deeificjd',
                 },
                 'update': {
-                    'userId': 'deeificjd',
-                    'channelId': 'bbcbhebbda',
+                    'userId': 'jchciaee',
+                    'channelId': 'deeificjd',
                 },
             },
         )
@@ -6284,7 +6284,7 @@ class MentionActions(Generic[_PrismaModelT]):
         ```py
         users = await Mention.prisma().query_raw(
             'SELECT * FROM Mention WHERE id = $1',
-            'hdgcajhjg',
+            'fcfhgbjed',
         )
         ```
         """
@@ -6363,8 +6363,8 @@ class MentionActions(Generic[_PrismaModelT]):
         mention = await Mention.prisma().create(
             data={
                 # data to create a Mention record
-                'userId': 'ejdjahicb',
-                'messageId': 'gdjgigfgc',
+                'userId': 'hdgcajhjg',
+                'messageId': 'ejdjahicb',
             },
         )
         ```
@@ -6419,13 +6419,13 @@ class MentionActions(Generic[_PrismaModelT]):
             data=[
                 {
                     # data to create a Mention record
-                    'userId': 'gfeaahdeh',
-                    'messageId': 'bjafcgbffc',
+                    'userId': 'gdjgigfgc',
+                    'messageId': 'gfeaahdeh',
                 },
                 {
                     # data to create a Mention record
-                    'userId': 'hihegjif',
-                    'messageId': 'bdjidcidac',
+                    'userId': 'bjafcgbffc',
+                    'messageId': 'hihegjif',
                 },
             ],
             skip_duplicates=True,
@@ -6479,7 +6479,7 @@ class MentionActions(Generic[_PrismaModelT]):
         ```py
         mention = await Mention.prisma().delete(
             where={
-                'id': 'ifgaaagff',
+                'id': 'bdjidcidac',
             },
         )
         ```
@@ -6531,7 +6531,7 @@ class MentionActions(Generic[_PrismaModelT]):
         ```py
         mention = await Mention.prisma().find_unique(
             where={
-                'id': 'befcddgjce',
+                'id': 'ifgaaagff',
             },
         )
         ```
@@ -6582,7 +6582,7 @@ class MentionActions(Generic[_PrismaModelT]):
         ```py
         mention = await Mention.prisma().find_unique_or_raise(
             where={
-                'id': 'bfhdbjjgfd',
+                'id': 'befcddgjce',
             },
         )
         ```
@@ -6834,7 +6834,7 @@ class MentionActions(Generic[_PrismaModelT]):
         ```py
         mention = await Mention.prisma().update(
             where={
-                'id': 'cabdjadaji',
+                'id': 'bfhdbjjgfd',
             },
             data={
                 # data to update the Mention record to
@@ -6891,17 +6891,17 @@ class MentionActions(Generic[_PrismaModelT]):
         ```py
         mention = await Mention.prisma().upsert(
             where={
-                'id': 'faajgfadf',
+                'id': 'cabdjadaji',
             },
             data={
                 'create': {
-                    'id': 'faajgfadf',
-                    'userId': 'hihegjif',
-                    'messageId': 'bdjidcidac',
+                    'id': 'cabdjadaji',
+                    'userId': 'bjafcgbffc',
+                    'messageId': 'hihegjif',
                 },
                 'update': {
-                    'userId': 'hihegjif',
-                    'messageId': 'bdjidcidac',
+                    'userId': 'bjafcgbffc',
+                    'messageId': 'hihegjif',
                 },
             },
         )
@@ -7312,7 +7312,7 @@ class MessageReactionActions(Generic[_PrismaModelT]):
         ```py
         users = await MessageReaction.prisma().query_raw(
             'SELECT * FROM MessageReaction WHERE id = $1',
-            'biaagcedjc',
+            'faajgfadf',
         )
         ```
         """
@@ -7352,7 +7352,7 @@ class MessageReactionActions(Generic[_PrismaModelT]):
         ```py
         user = await MessageReaction.prisma().query_first(
             'SELECT * FROM MessageReaction WHERE emoji = $1',
-            'cahhaghecf',
+            'biaagcedjc',
         )
         ```
         """
@@ -7391,9 +7391,9 @@ class MessageReactionActions(Generic[_PrismaModelT]):
         messagereaction = await MessageReaction.prisma().create(
             data={
                 # data to create a MessageReaction record
-                'emoji': 'bghcbbcidi',
-                'userId': 'jcgghhgdj',
-                'messageId': 'beehgcebbg',
+                'emoji': 'cahhaghecf',
+                'userId': 'bghcbbcidi',
+                'messageId': 'jcgghhgdj',
             },
         )
         ```
@@ -7448,15 +7448,15 @@ class MessageReactionActions(Generic[_PrismaModelT]):
             data=[
                 {
                     # data to create a MessageReaction record
-                    'emoji': 'bhdiaidiaf',
-                    'userId': 'deajegcfi',
-                    'messageId': 'gabahhhjf',
+                    'emoji': 'beehgcebbg',
+                    'userId': 'bhdiaidiaf',
+                    'messageId': 'deajegcfi',
                 },
                 {
                     # data to create a MessageReaction record
-                    'emoji': 'cjagadcjg',
-                    'userId': 'bifficggej',
-                    'messageId': 'bgbbaajbic',
+                    'emoji': 'gabahhhjf',
+                    'userId': 'cjagadcjg',
+                    'messageId': 'bifficggej',
                 },
             ],
             skip_duplicates=True,
@@ -7510,7 +7510,7 @@ class MessageReactionActions(Generic[_PrismaModelT]):
         ```py
         messagereaction = await MessageReaction.prisma().delete(
             where={
-                'id': 'eegghdhjb',
+                'id': 'bgbbaajbic',
             },
         )
         ```
@@ -7562,7 +7562,7 @@ class MessageReactionActions(Generic[_PrismaModelT]):
         ```py
         messagereaction = await MessageReaction.prisma().find_unique(
             where={
-                'id': 'daafgidjg',
+                'id': 'eegghdhjb',
             },
         )
         ```
@@ -7613,7 +7613,7 @@ class MessageReactionActions(Generic[_PrismaModelT]):
         ```py
         messagereaction = await MessageReaction.prisma().find_unique_or_raise(
             where={
-                'id': 'gdcgcgagj',
+                'id': 'daafgidjg',
             },
         )
         ```
@@ -7865,7 +7865,7 @@ class MessageReactionActions(Generic[_PrismaModelT]):
         ```py
         messagereaction = await MessageReaction.prisma().update(
             where={
-                'id': 'bhceabbgja',
+                'id': 'gdcgcgagj',
             },
             data={
                 # data to update the MessageReaction record to
@@ -7922,19 +7922,19 @@ class MessageReactionActions(Generic[_PrismaModelT]):
         ```py
         messagereaction = await MessageReaction.prisma().upsert(
             where={
-                'id': 'ehabfhegh',
+                'id': 'bhceabbgja',
             },
             data={
                 'create': {
-                    'id': 'ehabfhegh',
-                    'emoji': 'cjagadcjg',
-                    'userId': 'bifficggej',
-                    'messageId': 'bgbbaajbic',
+                    'id': 'bhceabbgja',
+                    'emoji': 'gabahhhjf',
+                    'userId': 'cjagadcjg',
+                    'messageId': 'bifficggej',
                 },
                 'update': {
-                    'emoji': 'cjagadcjg',
-                    'userId': 'bifficggej',
-                    'messageId': 'bgbbaajbic',
+                    'emoji': 'gabahhhjf',
+                    'userId': 'cjagadcjg',
+                    'messageId': 'bifficggej',
                 },
             },
         )
@@ -7982,7 +7982,7 @@ class MessageReactionActions(Generic[_PrismaModelT]):
         # update all MessageReaction records
         total = await MessageReaction.prisma().update_many(
             data={
-                'id': 'bcajcajjbc'
+                'id': 'ehabfhegh'
             },
             where={}
         )
@@ -611,6 +611,7 @@ class Message(bases.BaseMessage):
 
     id: _str
     content: _str
+    formatting: Optional['fields.Json'] = None
     isEdited: _bool
     createdAt: datetime.datetime
     updatedAt: datetime.datetime
@@ -1547,6 +1548,14 @@ _Message_fields: Dict['types.MessageKeys', PartialModelField] = OrderedDict(
             'is_relational': False,
             'documentation': None,
         }),
+        ('formatting', {
+            'name': 'formatting',
+            'is_list': False,
+            'optional': True,
+            'type': 'fields.Json',
+            'is_relational': False,
+            'documentation': None,
+        }),
         ('isEdited', {
             'name': 'isEdited',
             'is_list': False,
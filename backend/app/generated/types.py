@@ -7181,6 +7181,7 @@ ChannelRelationalFieldKeys = Literal[
 class MessageOptionalCreateInput(TypedDict, total=False):
     """Optional arguments to the Message create method"""
     id: _str
+    formatting: Optional['fields.Json']
     isEdited: _bool
     createdAt: datetime.datetime
     updatedAt: datetime.datetime
@@ -7203,6 +7204,7 @@ class MessageCreateInput(MessageOptionalCreateInput):
 class MessageOptionalCreateWithoutRelationsInput(TypedDict, total=False):
     """Optional arguments to the Message create method, without relations"""
     id: _str
+    formatting: Optional['fields.Json']
     isEdited: _bool
     createdAt: datetime.datetime
     updatedAt: datetime.datetime
@@ -7244,6 +7246,7 @@ class MessageUpdateInput(TypedDict, total=False):
     """Optional arguments for updating a record"""
     id: _str
     content: _str
+    formatting: Optional['fields.Json']
     isEdited: _bool
     createdAt: datetime.datetime
     updatedAt: datetime.datetime
@@ -7257,6 +7260,7 @@ class MessageUpdateManyMutationInput(TypedDict, total=False):
     """Arguments for updating many records"""
     id: _str
     content: _str
+    formatting: Optional['fields.Json']
     isEdited: _bool
     createdAt: datetime.datetime
     updatedAt: datetime.datetime
@@ -7310,6 +7314,14 @@ _Message_content_OrderByInput = TypedDict(
     total=True
 )
 
+_Message_formatting_OrderByInput = TypedDict(
+    '_Message_formatting_OrderByInput',
+    {
+        'formatting': 'SortOrder',
+    },
+    total=True
+)
+
 _Message_isEdited_OrderByInput = TypedDict(
     '_Message_isEdited_OrderByInput',
     {
@@ -7371,6 +7383,7 @@ _Message_RelevanceOrderByInput = TypedDict(
 MessageOrderByInput = Union[
     '_Message_id_OrderByInput',
     '_Message_content_OrderByInput',
+    '_Message_formatting_OrderByInput',
     '_Message_isEdited_OrderByInput',
     '_Message_createdAt_OrderByInput',
     '_Message_updatedAt_OrderByInput',
@@ -8329,6 +8342,7 @@ class MessageWhereInput(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringFilter']
     content: Union[_str, 'types.StringFilter']
+    formatting: Union[None, 'fields.Json', 'types.JsonFilter']
     isEdited: Union[_bool, 'types.BooleanFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeFilter']
@@ -8350,6 +8364,7 @@ class MessageWhereInputRecursive1(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringFilter']
     content: Union[_str, 'types.StringFilter']
+    formatting: Union[None, 'fields.Json', 'types.JsonFilter']
     isEdited: Union[_bool, 'types.BooleanFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeFilter']
@@ -8371,6 +8386,7 @@ class MessageWhereInputRecursive2(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringFilter']
     content: Union[_str, 'types.StringFilter']
+    formatting: Union[None, 'fields.Json', 'types.JsonFilter']
     isEdited: Union[_bool, 'types.BooleanFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeFilter']
@@ -8392,6 +8408,7 @@ class MessageWhereInputRecursive3(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringFilter']
     content: Union[_str, 'types.StringFilter']
+    formatting: Union[None, 'fields.Json', 'types.JsonFilter']
     isEdited: Union[_bool, 'types.BooleanFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeFilter']
@@ -8413,6 +8430,7 @@ class MessageWhereInputRecursive4(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringFilter']
     content: Union[_str, 'types.StringFilter']
+    formatting: Union[None, 'fields.Json', 'types.JsonFilter']
     isEdited: Union[_bool, 'types.BooleanFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeFilter']
@@ -8434,6 +8452,7 @@ class MessageScalarWhereWithAggregatesInput(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringWithAggregatesFilter']
     content: Union[_str, 'types.StringWithAggregatesFilter']
+    formatting: Union['fields.Json', 'types.JsonWithAggregatesFilter']
     isEdited: Union[_bool, 'types.BooleanWithAggregatesFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
@@ -8449,6 +8468,7 @@ class MessageScalarWhereWithAggregatesInputRecursive1(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringWithAggregatesFilter']
     content: Union[_str, 'types.StringWithAggregatesFilter']
+    formatting: Union['fields.Json', 'types.JsonWithAggregatesFilter']
     isEdited: Union[_bool, 'types.BooleanWithAggregatesFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
@@ -8464,6 +8484,7 @@ class MessageScalarWhereWithAggregatesInputRecursive2(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringWithAggregatesFilter']
     content: Union[_str, 'types.StringWithAggregatesFilter']
+    formatting: Union['fields.Json', 'types.JsonWithAggregatesFilter']
     isEdited: Union[_bool, 'types.BooleanWithAggregatesFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
@@ -8479,6 +8500,7 @@ class MessageScalarWhereWithAggregatesInputRecursive3(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringWithAggregatesFilter']
     content: Union[_str, 'types.StringWithAggregatesFilter']
+    formatting: Union['fields.Json', 'types.JsonWithAggregatesFilter']
     isEdited: Union[_bool, 'types.BooleanWithAggregatesFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
@@ -8494,6 +8516,7 @@ class MessageScalarWhereWithAggregatesInputRecursive4(TypedDict, total=False):
     """Message arguments for searching"""
     id: Union[_str, 'types.StringWithAggregatesFilter']
     content: Union[_str, 'types.StringWithAggregatesFilter']
+    formatting: Union['fields.Json', 'types.JsonWithAggregatesFilter']
     isEdited: Union[_bool, 'types.BooleanWithAggregatesFilter']
     createdAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
     updatedAt: Union[datetime.datetime, 'types.DateTimeWithAggregatesFilter']
@@ -8505,6 +8528,7 @@ class MessageScalarWhereWithAggregatesInputRecursive4(TypedDict, total=False):
 class MessageGroupByOutput(TypedDict, total=False):
     id: _str
     content: _str
+    formatting: 'fields.Json'
     isEdited: _bool
     createdAt: datetime.datetime
     updatedAt: datetime.datetime
@@ -8529,6 +8553,7 @@ class MessageScalarAggregateOutput(TypedDict, total=False):
     """Message output including scalar fields"""
     id: _str
     content: _str
+    formatting: 'fields.Json'
     isEdited: _bool
     createdAt: datetime.datetime
     updatedAt: datetime.datetime
@@ -8544,6 +8569,7 @@ class MessageMaxAggregateInput(TypedDict, total=False):
     """Message input for aggregating by max"""
     id: bool
     content: bool
+    formatting: bool
     isEdited: bool
     createdAt: bool
     updatedAt: bool
@@ -8555,6 +8581,7 @@ class MessageMinAggregateInput(TypedDict, total=False):
     """Message input for aggregating by min"""
     id: bool
     content: bool
+    formatting: bool
     isEdited: bool
     createdAt: bool
     updatedAt: bool
@@ -8575,6 +8602,7 @@ MessageCountAggregateInput = TypedDict(
     {
         'id': bool,
         'content': bool,
+        'formatting': bool,
         'isEdited': bool,
         'createdAt': bool,
         'updatedAt': bool,
@@ -8590,6 +8618,7 @@ MessageCountAggregateOutput = TypedDict(
     {
         'id': int,
         'content': int,
+        'formatting': int,
         'isEdited': int,
         'createdAt': int,
         'updatedAt': int,
@@ -8604,6 +8633,7 @@ MessageCountAggregateOutput = TypedDict(
 MessageKeys = Literal[
     'id',
     'content',
+    'formatting',
     'isEdited',
     'createdAt',
     'updatedAt',
@@ -8617,6 +8647,7 @@ MessageKeys = Literal[
 MessageScalarFieldKeys = Literal[
     'id',
     'content',
+    'formatting',
     'isEdited',
     'createdAt',
     'updatedAt',
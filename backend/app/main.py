@@ -1,10 +1,12 @@
-from fastapi import FastAPI, WebSocket, Query
+from fastapi import FastAPI, WebSocket, Query, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import logging
 
-from .core.config import settings
+from .core.config import settings, SERVES_API, SERVES_GATEWAY
 from .core.database import connect_db, disconnect_db
 from .core.redis import close_redis_client
+from .core.metrics import metrics_enabled, render_metrics
 from .api.auth import router as auth_router
 from .api.users import router as users_router
 from .api.channels import router as channels_router
@@ -12,16 +14,29 @@ from .api.messages import router as messages_router
 from .api.admin import router as admin_router
 from .websocket.events import websocket_endpoint
 from .websocket.connection_manager import connection_manager
+from .websocket.publisher import event_publisher
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_db()
-    await connection_manager.start_redis_listener()
+    # API-only processes publish to the bus but never listen on it
+    if SERVES_GATEWAY:
+        await connection_manager.start_redis_listener()
+        if not connection_manager.drains_before_close:
+            logger.error(
+                "Not started by start.py: uvicorn will close WebSockets before the "
+                "shutdown drain, so clients get no reconnect hint"
+            )
     yield
-    # Shutdown
-    await connection_manager.stop_redis_listener()
+    # Shutdown: close sockets in paced batches before the bus and database go away
+    if SERVES_GATEWAY:
+        await connection_manager.drain()
+        await connection_manager.stop_redis_listener()
+    await event_publisher.close()
     await disconnect_db()
     await close_redis_client()
 
@@ -42,11 +57,12 @@ app.add_middleware(
 )
 
 # Include routers
-app.include_router(auth_router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
-app.include_router(users_router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
-app.include_router(channels_router, prefix=f"{settings.API_V1_STR}/channels", tags=["channels"])
-app.include_router(messages_router, prefix=f"{settings.API_V1_STR}/messages", tags=["messages"])
-app.include_router(admin_router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
+if SERVES_API:
+    app.include_router(auth_router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
+    app.include_router(users_router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
+    app.include_router(channels_router, prefix=f"{settings.API_V1_STR}/channels", tags=["channels"])
+    app.include_router(messages_router, prefix=f"{settings.API_V1_STR}/messages", tags=["messages"])
+    app.include_router(admin_router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
 
 
 @app.get("/")
@@ -59,7 +75,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
-@app.websocket("/ws")
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    if not metrics_enabled():
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 async def websocket_route(websocket: WebSocket, token: str = Query(...)):
     """WebSocket endpoint for real-time communication"""
-    await websocket_endpoint(websocket, token) 
\ No newline at end of file
+    await websocket_endpoint(websocket, token)
+
+
+if SERVES_GATEWAY:
+    app.add_api_websocket_route("/ws", websocket_route)
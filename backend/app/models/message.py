@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, validator, Field
 import re
-from .user import User
+from .user import User, UserPublic
 
 
 class MessageFormatting(BaseModel):
@@ -96,6 +96,43 @@ class MessageWithDetails(MessageWithUser):
     mention_count: int = 0
 
 
+class MessageHistoryPage(BaseModel):
+    """One page of channel history, in chronological order"""
+    messages: List[MessageWithDetails] = []
+    prev_cursor: Optional[str] = None  # Pass as `before` for older messages
+    next_cursor: Optional[str] = None  # Pass as `after` for newer messages
+
+
+class ReactionSummary(BaseModel):
+    """All reactions with one emoji on a message"""
+    emoji: str
+    count: int
+    me: bool = False  # Whether the requesting user reacted with this emoji
+    user_ids: List[str] = []  # The first few reacting users
+
+
+class CompactMessage(BaseModel):
+    """Message that references users by id"""
+    id: str
+    content: str
+    user_id: str
+    channel_id: str
+    created_at: datetime
+    updated_at: datetime
+    is_edited: bool = False
+    formatting: Optional[MessageFormatting] = None
+    mention_ids: List[str] = []
+    reactions: List[ReactionSummary] = []
+
+
+class MessageHistoryPageV2(BaseModel):
+    """One page of channel history with each referenced user listed once"""
+    messages: List[CompactMessage] = []
+    users: Dict[str, UserPublic] = {}
+    prev_cursor: Optional[str] = None  # Pass as `before` for older messages
+    next_cursor: Optional[str] = None  # Pass as `after` for newer messages
+
+
 class TypingIndicator(BaseModel):
     user_id: str
     username: str
@@ -109,83 +146,144 @@ class CreateReactionRequest(BaseModel):
 
 
 # Formatting utilities
+class FormattingScan:
+    """Everything MessageFormatter learns about a message from one scan"""
+    
+    __slots__ = ("valid", "content", "formatting", "mentions", "links", "emojis")
+    
+    def __init__(self, valid: bool, content: str, formatting: MessageFormatting,
+                 mentions: List[str], links: List[str], emojis: List[str]):
+        self.valid = valid  # Bold, code and code block markers are all closed
+        self.content = content  # Sanitized content
+        self.formatting = formatting
+        self.mentions = mentions  # Mentioned usernames, without the @
+        self.links = links
+        self.emojis = emojis  # Emoji names, without the colons
+
+
 class MessageFormatter:
-    """Utility class for parsing and validating message formatting"""
+    """Utility class for parsing and validating message formatting
+    
+    A single tokenizer pass finds every marker run, link, mention, emoji and
+    whitespace run; text between tokens is skipped by the regex engine, and
+    each token is consumed whole, so no character is matched twice.
     
-    # Regex patterns for different formatting types
-    BOLD_PATTERN = re.compile(r'\*\*([^*]+)\*\*')
-    ITALIC_PATTERN = re.compile(r'\*([^*]+)\*')
-    CODE_PATTERN = re.compile(r'`([^`]+)`')
-    CODE_BLOCK_PATTERN = re.compile(r'```([^`]+)```')
-    LINK_PATTERN = re.compile(r'https?://[^\s]+')
-    MENTION_PATTERN = re.compile(r'@(\w+)')
-    EMOJI_PATTERN = re.compile(r':(\w+):')
+    Code spans and code blocks are literal: markers, links, mentions and
+    emoji inside them are not formatting. Links are literal too. A run of
+    stars toggles bold per pair and italic for an odd star, so "**a**" is
+    bold only. An @ that follows a word character is part of an email
+    address, not a mention.
+    """
+    
+    # Every alternative starts with a literal character, which lets the regex
+    # engine skip plain text without trying each branch at every position.
+    # Tokens are told apart by their first character.
+    TOKEN_PATTERN = re.compile(
+        r"``*"  # Code span and code block fences
+        r"|\*\**"  # Bold and italic markers
+        r"|https?://[^\s`*]+"  # Links, up to whitespace or a marker
+        r"|@\w+"  # Mentions
+        r"|:\w+:"  # Emoji
+        r"|\n\n\n\n*|\ \ \ \ *"  # Whitespace runs to limit
+    )
+    WORD_CHARACTER = re.compile(r"\w")
     
     @classmethod
-    def parse_formatting(cls, content: str) -> MessageFormatting:
-        """Parse message content and extract formatting metadata"""
+    def scan(cls, content: str) -> FormattingScan:
+        """Validate, sanitize and extract formatting metadata in one pass"""
+        text = content.strip()
+        
+        pieces = []  # Sanitized content, built around collapsed whitespace runs
+        copied = 0
+        mentions, links, emojis = [], [], []
+        has_bold = has_italic = has_code = has_code_block = False
+        
+        # End of the marker that opened the current bold, italic or code span.
+        # A code span closes at a fence as long as the one that opened it;
+        # fences of three or more backticks make a code block
+        bold_start = italic_start = code_start = None
+        code_fence = 0
+        
+        for match in cls.TOKEN_PATTERN.finditer(text):
+            start, end = match.span()
+            marker = text[start]
+            
+            if marker == " " or marker == "\n":
+                # Whitespace is limited everywhere, code included
+                pieces.append(text[copied:start])
+                pieces.append("\n\n" if marker == "\n" else "  ")
+                copied = end
+            elif marker == "`":
+                length = end - start
+                if code_start is None:
+                    code_start, code_fence = end, length
+                elif length == code_fence:
+                    if start > code_start:
+                        if length >= 3:
+                            has_code_block = True
+                        else:
+                            has_code = True
+                    code_start = None
+            elif code_start is not None:
+                continue  # Code is literal
+            elif marker == "*":
+                length = end - start
+                if length // 2 % 2:
+                    if bold_start is None:
+                        bold_start = end
+                    else:
+                        has_bold = has_bold or start > bold_start
+                        bold_start = None
+                if length % 2:
+                    if italic_start is None:
+                        italic_start = end
+                    else:
+                        has_italic = has_italic or start > italic_start
+                        italic_start = None
+            elif marker == "h":
+                links.append(text[start:end])
+            elif marker == "@":
+                if start == 0 or not cls.WORD_CHARACTER.match(text[start - 1]):
+                    mentions.append(text[start + 1:end])
+            else:
+                emojis.append(text[start + 1:end - 1])
         
-        bold_matches = cls.BOLD_PATTERN.findall(content)
-        italic_matches = cls.ITALIC_PATTERN.findall(content)
-        code_matches = cls.CODE_PATTERN.findall(content)
-        code_block_matches = cls.CODE_BLOCK_PATTERN.findall(content)
-        link_matches = cls.LINK_PATTERN.findall(content)
-        mention_matches = cls.MENTION_PATTERN.findall(content)
-        emoji_matches = cls.EMOJI_PATTERN.findall(content)
+        pieces.append(text[copied:])
         
-        return MessageFormatting(
-            has_bold=len(bold_matches) > 0,
-            has_italic=len(italic_matches) > 0,
-            has_code=len(code_matches) > 0,
-            has_code_block=len(code_block_matches) > 0,
-            has_links=len(link_matches) > 0,
-            has_mentions=len(mention_matches) > 0,
-            has_emojis=len(emoji_matches) > 0,
-            link_count=len(link_matches),
-            mention_count=len(mention_matches),
-            emoji_count=len(emoji_matches)
+        # Bold and code must be closed; a lone star is left alone
+        valid = bold_start is None and code_start is None
+        
+        formatting = MessageFormatting(
+            has_bold=has_bold,
+            has_italic=has_italic,
+            has_code=has_code,
+            has_code_block=has_code_block,
+            has_links=bool(links),
+            has_mentions=bool(mentions),
+            has_emojis=bool(emojis),
+            link_count=len(links),
+            mention_count=len(mentions),
+            emoji_count=len(emojis)
         )
+        return FormattingScan(valid, "".join(pieces), formatting, mentions, links, emojis)
+    
+    @classmethod
+    def parse_formatting(cls, content: str) -> MessageFormatting:
+        """Parse message content and extract formatting metadata"""
+        return cls.scan(content).formatting
     
     @classmethod
     def extract_mentions(cls, content: str) -> List[str]:
         """Extract mentioned usernames from message content"""
-        return cls.MENTION_PATTERN.findall(content)
+        return cls.scan(content).mentions
     
     @classmethod
     def sanitize_content(cls, content: str) -> str:
         """Sanitize message content while preserving formatting"""
-        # Remove potentially harmful content while keeping formatting
-        # This is a basic implementation - expand as needed
-        content = content.strip()
-        
-        # Limit consecutive newlines
-        content = re.sub(r'\n{3,}', '\n\n', content)
-        
-        # Limit consecutive spaces
-        content = re.sub(r' {3,}', '  ', content)
-        
-        return content
+        # Strips the ends and limits runs of newlines and spaces to two
+        return cls.scan(content).content
     
     @classmethod
     def validate_formatting(cls, content: str) -> bool:
         """Validate that formatting syntax is correct"""
-        try:
-            # Check for unmatched formatting markers
-            bold_count = content.count('**')
-            if bold_count % 2 != 0:
-                return False
-                
-            # Check for unmatched code blocks
-            code_block_count = content.count('```')
-            if code_block_count % 2 != 0:
-                return False
-                
-            # Check for unmatched single backticks (excluding code blocks)
-            content_without_blocks = cls.CODE_BLOCK_PATTERN.sub('', content)
-            single_backtick_count = content_without_blocks.count('`')
-            if single_backtick_count % 2 != 0:
-                return False
-                
-            return True
-        except Exception:
-            return False 
\ No newline at end of file
+        return cls.scan(content).valid
@@ -68,6 +68,17 @@ class User(UserBase):
         populate_by_name = True
 
 
+class UserPublic(BaseModel):
+    """What other users may see of a user"""
+    id: str
+    username: str
+    avatar: Optional[str] = None
+    status: UserStatus = UserStatus.ACTIVE
+    
+    class Config:
+        from_attributes = True
+
+
 class UserWithRoles(User):
     roles: List[UserRole] = []
 
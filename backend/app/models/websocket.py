@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Any, Dict
 from datetime import datetime
 from .message import MessageFormatting
@@ -30,6 +30,23 @@ class TypingIndicatorMessage(BaseModel):
     is_typing: bool
 
 
+class PingMessage(BaseModel):
+    """Connection health check"""
+    type: str = "ping"
+
+
+class GetOnlineUsersMessage(BaseModel):
+    """Request for the online users of a channel"""
+    type: str = "get_online_users"
+    channel_id: str = Field(min_length=1)
+
+
+class ResumeMessage(BaseModel):
+    """Resume after a reconnect: last sequence number seen per channel"""
+    type: str = "resume"
+    channels: Dict[str, int]
+
+
 class NewMessageNotification(BaseModel):
     """New message notification"""
     type: str = "new_message"
@@ -108,6 +125,15 @@ class ErrorMessage(BaseModel):
 class ConnectionStatsMessage(BaseModel):
     """Connection statistics"""
     type: str = "connection_stats"
+    node_id: str
+    online_users: Optional[int] = None
+    online_users_by_node: Dict[str, int] = {}
+    draining: bool = False
+    pending_handshakes: int = 0
+    rejected_handshakes: int = 0
+    inbound: Dict[str, Any] = {}
+    bus_dispatch: Dict[str, Any] = {}
     total_connections: int
+    total_users: int
     total_channels: int
     users_by_channel: Dict[str, int] 
\ No newline at end of file
@@ -0,0 +1,147 @@
+from typing import Optional
+import logging
+import random
+import time
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Close code telling the client to reconnect later (RFC 6455 "Try Again Later")
+TRY_AGAIN_LATER = 1013
+
+# Close code for connections refused by policy
+POLICY_VIOLATION = 1008
+
+# Close code for connections closed because the server is shutting down
+GOING_AWAY = 1001
+
+
+def with_retry_hint(reason: str, retry_after: float) -> str:
+    """Append a retry hint to a close reason; clients parse it from there"""
+    return f"{reason}; retry_after={retry_after:.1f}"
+
+
+def reconnect_delay() -> float:
+    """Random delay for clients of a shutting-down server, so they do not all reconnect at once"""
+    return random.uniform(0, settings.WS_RECONNECT_SPREAD)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a WebSocket handshake is refused by admission control"""
+
+    def __init__(self, code: int, reason: str, retry_after: Optional[float] = None):
+        self.code = code
+        self.retry_after = retry_after
+        if retry_after is not None:
+            reason = with_retry_hint(reason, retry_after)
+        self.reason = reason
+        super().__init__(reason)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Take one token if available"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_until_available(self) -> float:
+        """Seconds until the next token is available"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class Handshake:
+    """A slot in the pending-handshake pool, released once the session is set up"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+
+    def release(self):
+        """Return the slot to the pool; safe to call more than once"""
+        if not self._released:
+            self._released = True
+            self._controller.pending -= 1
+
+
+class AdmissionController:
+    """Admission control for new WebSocket connections
+
+    Every handshake must get a slot in a bounded pool of pending handshakes
+    and a token from a global bucket before any database work happens, so
+    a reconnect storm after a restart is spread out instead of hitting
+    Postgres all at once. Rejected clients get a jittered retry hint.
+    """
+
+    def __init__(self):
+        self.bucket = TokenBucket(settings.WS_ADMISSION_RATE, settings.WS_ADMISSION_BURST)
+        self.max_pending = settings.WS_MAX_PENDING_HANDSHAKES
+        self.max_sessions_per_user = settings.WS_MAX_SESSIONS_PER_USER
+        self.pending = 0
+        self.rejected = 0
+        # Set on shutdown; new handshakes are sent to other instances
+        self.draining = False
+
+    def _retry_after(self, base: float) -> float:
+        """Retry hint with random jitter so rejected clients do not return together"""
+        return base + random.uniform(0, settings.WS_RETRY_JITTER)
+
+    def begin_handshake(self) -> Handshake:
+        """Admit a new handshake or raise AdmissionRejected"""
+        if self.draining:
+            self.rejected += 1
+            raise AdmissionRejected(GOING_AWAY, "Server going away", reconnect_delay())
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise AdmissionRejected(
+                TRY_AGAIN_LATER, "Server busy", self._retry_after(1.0)
+            )
+
+        if not self.bucket.try_acquire():
+            self.rejected += 1
+            raise AdmissionRejected(
+                TRY_AGAIN_LATER, "Too many connections", self._retry_after(self.bucket.time_until_available())
+            )
+
+        self.pending += 1
+        return Handshake(self)
+
+    def start_draining(self):
+        """Refuse every new handshake from now on"""
+        self.draining = True
+
+    def check_session_limit(self, session_count: int):
+        """Refuse a user that already has the maximum number of sessions"""
+        if session_count >= self.max_sessions_per_user:
+            self.rejected += 1
+            raise AdmissionRejected(POLICY_VIOLATION, "Too many sessions")
+
+    def get_stats(self) -> dict:
+        """Admission statistics"""
+        return {
+            "draining": self.draining,
+            "pending_handshakes": self.pending,
+            "rejected_handshakes": self.rejected
+        }
+
+
+# Global admission controller instance
+admission_controller = AdmissionController()
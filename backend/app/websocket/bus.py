@@ -0,0 +1,188 @@
+from typing import Awaitable, Callable, Iterable, List, Optional
+import asyncio
+import logging
+import time
+import zlib
+
+from .frames import EventFrame, encode_envelope, decode_envelope
+from ..core.config import settings
+from ..core.metrics import (
+    BUS_DELIVERY_LAG, BUS_DISPATCH_LAG, BUS_DISPATCH_QUEUE_DEPTH, BUS_HANDLE_DURATION,
+    BUS_PUBLISH_DURATION
+)
+from ..core.redis import get_redis_raw_client, auto_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Redis topics used for cross-instance fan-out
+CHANNEL_TOPIC_PREFIX = "websocket:channel:"
+NODE_TOPIC_PREFIX = "websocket:node:"
+GLOBAL_TOPIC = "websocket:global"
+
+# Seconds to wait before resubscribing after a listener failure
+RESUBSCRIBE_DELAY = 1.0
+
+BusHandler = Callable[[str, dict, EventFrame], Awaitable[None]]
+
+
+def channel_topic(channel_id: str) -> str:
+    """Bus topic for events scoped to a chat channel"""
+    return f"{CHANNEL_TOPIC_PREFIX}{channel_id}"
+
+
+def node_topic(node_id: str) -> str:
+    """Inbox of a single node, for events addressed to users connected there"""
+    return f"{NODE_TOPIC_PREFIX}{node_id}"
+
+
+def create_bus(node_id: str):
+    """Create the bus backend selected by WS_BUS_BACKEND"""
+    if settings.WS_BUS_BACKEND == "streams":
+        from .stream_bus import RedisStreamsBus
+        return RedisStreamsBus(node_id)
+    return RedisPubSubBus(node_id)
+
+
+async def dispatch_envelope(node_id: str, topic, raw, handler: BusHandler):
+    """Decode a bus message and hand it to the handler unless this node sent it"""
+    try:
+        if isinstance(topic, bytes):
+            topic = topic.decode()
+        if isinstance(raw, str):
+            raw = raw.encode()
+
+        header, frame = decode_envelope(raw)
+        if header.get("origin") == node_id:
+            return
+        if "ts" in header:
+            BUS_DELIVERY_LAG.observe(max(0.0, time.time() - header["ts"]))
+
+        await handler(topic, header, frame)
+
+    except Exception as e:
+        logger.error(f"Error handling Redis message: {e}")
+
+
+class ShardedDispatcher:
+    """Hands received bus events to a fixed pool of worker tasks, one per shard
+
+    Topics are hashed onto shards, so the events of one channel (or one
+    node inbox) are handled in order by a single worker while other
+    channels proceed in parallel. A slow fan-out to a huge channel then
+    delays only the channels sharing its shard instead of the whole
+    listener. Queues are bounded; when a shard is full the listener waits,
+    leaving the backlog in Redis rather than in memory.
+    """
+
+    def __init__(self, handler: BusHandler, shards: int = None, queue_size: int = None):
+        self.handler = handler
+        shards = shards or settings.WS_BUS_DISPATCH_SHARDS
+        queue_size = queue_size or settings.WS_BUS_DISPATCH_QUEUE_SIZE
+        self.queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=queue_size) for _ in range(shards)]
+        self.workers: List[asyncio.Task] = []
+
+    def start(self):
+        """Start one worker task per shard"""
+        self.workers = [
+            asyncio.create_task(self._work(shard, queue))
+            for shard, queue in enumerate(self.queues)
+        ]
+
+    async def stop(self):
+        """Stop the workers; events still queued are dropped"""
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def submit(self, topic: str, header: dict, frame: EventFrame):
+        """Queue an event on its topic's shard, waiting while that shard is full"""
+        queue = self.queues[zlib.crc32(topic.encode()) % len(self.queues)]
+        await queue.put((time.monotonic(), topic, header, frame))
+
+    async def _work(self, shard: int, queue: asyncio.Queue):
+        while True:
+            queued_at, topic, header, frame = await queue.get()
+            BUS_DISPATCH_LAG.observe(time.monotonic() - queued_at)
+
+            started = time.perf_counter()
+            try:
+                await self.handler(topic, header, frame)
+            except Exception as e:
+                logger.error(f"Error handling bus event on shard {shard}: {e}")
+            BUS_HANDLE_DURATION.observe(time.perf_counter() - started)
+
+    def sample_metrics(self):
+        """Export the current depth of every shard queue"""
+        for shard, queue in enumerate(self.queues):
+            BUS_DISPATCH_QUEUE_DEPTH.labels(str(shard)).set(queue.qsize())
+
+    def get_stats(self) -> dict:
+        """Queued events per shard"""
+        return {"queued": [queue.qsize() for queue in self.queues]}
+
+
+class RedisPubSubBus:
+    """Cross-instance event bus on top of Redis pub/sub
+
+    Every published event is wrapped in an envelope carrying the id of the
+    node that produced it, so a node can skip its own events when they come
+    back through the pattern subscription. The client payload inside the
+    envelope is forwarded to local sockets without being decoded.
+    """
+
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+        self.listener_task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: BusHandler):
+        """Start listening for events published by other nodes"""
+        self.listener_task = asyncio.create_task(self._listen(handler))
+
+    async def stop(self):
+        """Stop the listener task"""
+        if self.listener_task:
+            self.listener_task.cancel()
+            try:
+                await self.listener_task
+            except asyncio.CancelledError:
+                pass
+            self.listener_task = None
+
+    async def flush(self):
+        """Send publishes still queued in the auto-pipeline"""
+        await auto_pipeline.close()
+
+    async def publish(self, topic: str, frame: EventFrame, exclude: Iterable[str] = (), target: Optional[str] = None):
+        """Publish an event to every other node; publishes from the same tick share one pipeline"""
+        try:
+            started = time.perf_counter()
+            envelope = encode_envelope(self.node_id, frame, exclude, target)
+            await auto_pipeline.execute("publish", topic, envelope)
+            BUS_PUBLISH_DURATION.labels("pubsub").observe(time.perf_counter() - started)
+        except Exception as e:
+            logger.error(f"Error publishing to Redis: {e}")
+
+    async def _listen(self, handler: BusHandler):
+        """Subscribe to all bus topics and feed remote events to the handler"""
+        while True:
+            redis_client = await get_redis_raw_client()
+            pubsub = redis_client.pubsub()
+            try:
+                # Channel topics are per-id, so they need a pattern subscription
+                await pubsub.psubscribe(f"{CHANNEL_TOPIC_PREFIX}*")
+                # Other nodes' inboxes are none of our business
+                await pubsub.subscribe(GLOBAL_TOPIC, node_topic(self.node_id))
+
+                async for message in pubsub.listen():
+                    if message["type"] in ("message", "pmessage"):
+                        await dispatch_envelope(self.node_id, message["channel"], message["data"], handler)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis listener error: {e}")
+            finally:
+                await pubsub.close()
+
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
@@ -0,0 +1,134 @@
+from typing import Any, List, Optional, Sequence
+import json
+
+from fastapi import WebSocket
+
+from .frames import EventFrame
+from ..core.config import settings
+
+try:
+    import msgpack
+except ImportError:
+    # Optional: without msgpack only the JSON subprotocol is offered
+    msgpack = None
+
+# WebSocket subprotocols clients can request at /ws
+SUBPROTOCOL_JSON = "pythia.json"
+SUBPROTOCOL_MSGPACK = "pythia.msgpack.v1"
+
+# Short field names used by the compact encoding; unlisted keys are kept as is
+SHORT_KEYS = {
+    "type": "t",
+    "timestamp": "ts",
+    "data": "d",
+    "channel_id": "c",
+    "message_id": "m",
+    "user_id": "u",
+    "username": "n",
+    "seq": "s",
+    "status": "st",
+    "users": "us",
+    "content": "b",
+    "id": "i",
+    "user": "a",
+    "avatar": "av",
+    "created_at": "ca",
+    "updated_at": "ua",
+    "is_edited": "ie",
+    "formatting": "f",
+    "mentions": "mn",
+    "reactions": "r",
+    "emoji": "em",
+    "action": "ac",
+    "deleted_by": "db",
+    "reason": "rs",
+    "from_user_id": "fu",
+    "from_username": "fn",
+    "error_code": "ec",
+    "message": "mg",
+    "details": "dt",
+    "last_seq": "ls",
+    "current_seq": "cs",
+    "is_typing": "it",
+    "reconnect_delay": "rd",
+}
+
+# Author objects are cut down to these fields; clients fetch full profiles over REST
+AUTHOR_FIELDS = ("id", "username", "avatar", "status")
+
+
+def compact(value: Any) -> Any:
+    """Shorten the keys of an event and trim embedded author objects"""
+    if isinstance(value, dict):
+        return {
+            SHORT_KEYS.get(key, key): (
+                compact({field: item[field] for field in AUTHOR_FIELDS if field in item})
+                if key == "user" and isinstance(item, dict)
+                else compact(item)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [compact(item) for item in value]
+    return value
+
+
+def _pack_frame(frame: EventFrame) -> bytes:
+    return msgpack.packb(compact(json.loads(frame.text)), use_bin_type=True)
+
+
+class JsonCodec:
+    """Default wire format: one JSON text frame per event"""
+
+    name = "json"
+    max_batch = 1
+
+    def __init__(self, subprotocol: Optional[str] = None):
+        self.subprotocol = subprotocol
+
+    async def send(self, websocket: WebSocket, frames: Sequence[EventFrame]):
+        for frame in frames:
+            await websocket.send_text(frame.text)
+
+
+class MsgpackCodec:
+    """Compact wire format: binary frames holding a MessagePack array of events
+
+    Each event is packed once per frame and cached on it, so a batch is
+    just an array header followed by the cached bytes.
+    """
+
+    name = "msgpack"
+
+    def __init__(self, subprotocol: str = SUBPROTOCOL_MSGPACK):
+        self.subprotocol = subprotocol
+        self.max_batch = settings.WS_BATCH_MAX_EVENTS
+        self._packer = msgpack.Packer(use_bin_type=True)
+
+    async def send(self, websocket: WebSocket, frames: Sequence[EventFrame]):
+        parts = [self._packer.pack_array_header(len(frames))]
+        parts.extend(frame.encoding(self.name, _pack_frame) for frame in frames)
+        await websocket.send_bytes(b"".join(parts))
+
+
+def supported_subprotocols() -> List[str]:
+    """Subprotocols this server can speak, preferred first"""
+    if msgpack is None:
+        return [SUBPROTOCOL_JSON]
+    return [SUBPROTOCOL_MSGPACK, SUBPROTOCOL_JSON]
+
+
+def negotiate_codec(websocket: WebSocket):
+    """Pick the codec for a handshake from the client's requested subprotocols
+
+    Clients that request nothing, or nothing we support, get plain JSON.
+    """
+    requested = websocket.scope.get("subprotocols") or []
+    supported = supported_subprotocols()
+    for subprotocol in requested:
+        if subprotocol not in supported:
+            continue
+        if subprotocol == SUBPROTOCOL_MSGPACK:
+            return MsgpackCodec(subprotocol)
+        return JsonCodec(subprotocol)
+    return JsonCodec()
@@ -0,0 +1,180 @@
+from typing import Awaitable, Callable, Deque, Optional
+from collections import deque
+from fastapi import WebSocket
+import asyncio
+import logging
+import time
+import uuid
+
+from .codecs import JsonCodec
+from .frames import EventFrame
+from ..core.config import settings
+from ..core.metrics import SEND_FAILURES
+
+logger = logging.getLogger(__name__)
+
+
+class Connection:
+    """A registered WebSocket with its own bounded outbound queue
+
+    Broadcasts only enqueue frames; a dedicated writer task drains the queue
+    into the socket, so one slow client never holds up the rest of a channel.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        on_failure: Optional[Callable[["Connection"], Awaitable[None]]] = None,
+        codec=None
+    ):
+        self.connection_id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.user_id = user_id
+        # Wire format negotiated at the handshake
+        self.codec = codec or JsonCodec()
+        self.max_queue = settings.WS_SEND_QUEUE_SIZE
+        self.hard_limit = settings.WS_SEND_QUEUE_HARD_LIMIT
+        self.slow_consumer_timeout = settings.WS_SLOW_CONSUMER_TIMEOUT
+
+        # Pending frames, oldest first
+        self.queue: Deque[EventFrame] = deque()
+        self.ephemeral_count = 0
+        self.dropped_count = 0
+        self.over_limit_since: Optional[float] = None
+        self.closed = False
+
+        self.writer_task: Optional[asyncio.Task] = None
+        self._on_failure = on_failure
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def start(self):
+        """Start the writer task"""
+        self.writer_task = asyncio.create_task(self._writer())
+
+    def enqueue(self, frame: EventFrame) -> bool:
+        """Queue a frame without blocking
+
+        Returns False when the consumer has stayed over its limit and should
+        be evicted.
+        """
+        if self.closed:
+            return False
+
+        if len(self.queue) >= self.max_queue:
+            # Make room by dropping the oldest ephemeral frame first
+            if not self._drop_oldest_ephemeral() and frame.ephemeral:
+                self.dropped_count += 1
+                SEND_FAILURES.labels("dropped").inc()
+                return True
+
+        self.queue.append(frame)
+        if frame.ephemeral:
+            self.ephemeral_count += 1
+        self._idle.clear()
+        self._wakeup.set()
+
+        return not self._is_slow_consumer()
+
+    def _drop_oldest_ephemeral(self) -> bool:
+        """Drop the oldest queued ephemeral frame, if there is one"""
+        if not self.ephemeral_count:
+            return False
+
+        for index, queued in enumerate(self.queue):
+            if queued.ephemeral:
+                del self.queue[index]
+                self.ephemeral_count -= 1
+                self.dropped_count += 1
+                SEND_FAILURES.labels("dropped").inc()
+                return True
+        return False
+
+    def _is_slow_consumer(self) -> bool:
+        """Check whether the queue has stayed over its limit for too long"""
+        queue_size = len(self.queue)
+
+        if queue_size >= self.hard_limit:
+            return True
+
+        if queue_size <= self.max_queue:
+            self.over_limit_since = None
+            return False
+
+        now = time.monotonic()
+        if self.over_limit_since is None:
+            self.over_limit_since = now
+            return False
+
+        return now - self.over_limit_since > self.slow_consumer_timeout
+
+    async def _writer(self):
+        """Drain queued frames into the socket"""
+        try:
+            while True:
+                while not self.queue:
+                    self._idle.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+
+                # Codecs that support it pack several queued frames into one message
+                frames = [self._pop()]
+                while self.queue and len(frames) < self.codec.max_batch:
+                    frames.append(self._pop())
+                if len(self.queue) <= self.max_queue:
+                    self.over_limit_since = None
+
+                await self.codec.send(self.websocket, frames)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending message to user {self.user_id}: {e}")
+            SEND_FAILURES.labels("send_error").inc()
+            self.closed = True
+            self._idle.set()
+            if self._on_failure:
+                await self._on_failure(self)
+
+    def _pop(self) -> EventFrame:
+        """Take the oldest queued frame"""
+        frame = self.queue.popleft()
+        if frame.ephemeral:
+            self.ephemeral_count -= 1
+        return frame
+
+    async def flush(self, timeout: float):
+        """Wait until every queued frame has been written, up to timeout seconds"""
+        if self.closed or not self.writer_task:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out flushing {len(self.queue)} frames to user {self.user_id}")
+
+    async def stop(self):
+        """Stop the writer task and discard pending frames"""
+        self.closed = True
+        self.queue.clear()
+        self.ephemeral_count = 0
+        self._idle.set()
+
+        task = self.writer_task
+        if task and task is not asyncio.current_task() and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def close(self, code: int = 1000, reason: str = "", flush_timeout: float = 0):
+        """Optionally flush pending frames, then close the socket"""
+        if flush_timeout:
+            await self.flush(flush_timeout)
+        await self.stop()
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception as e:
+            logger.debug(f"Error closing WebSocket for user {self.user_id}: {e}")
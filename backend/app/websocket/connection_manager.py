@@ -1,191 +1,309 @@
-from typing import Dict, Set, List, Optional
+from typing import Collection, Dict, Set, List, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 import json
 import logging
 from datetime import datetime
 import asyncio
+import os
+import time
+import uuid
 
-from ..core.redis import get_redis_client
+from .codecs import negotiate_codec
+from .connection import Connection
+from .frames import EventFrame
+from .typing_indicators import TypingAggregator, TYPING_UPDATE_EVENT
+from .presence import PresenceStore, PRESENCE_UPDATE_EVENT
+from .admission import admission_controller, GOING_AWAY, reconnect_delay, with_retry_hint
+from .dispatcher import inbound_dispatcher
+from .replay import ReplayBuffer, RESYNC_REQUIRED_EVENT, sequence_key
+from .bus import (
+    create_bus, ShardedDispatcher, CHANNEL_TOPIC_PREFIX, GLOBAL_TOPIC, channel_topic, node_topic
+)
+from .routing import RoutingTable
 from ..models.user import User
+from ..core.config import settings
+from ..core.metrics import (
+    metrics_enabled, BROADCAST_DURATION, BROADCAST_RECIPIENTS, CONNECTIONS,
+    EVENT_LOOP_LAG, SEND_FAILURES, SEND_QUEUE_DEPTH
+)
+from ..core.redis import get_redis_client, auto_pipeline
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for the force_disconnect frame to reach the client before closing
+FORCE_DISCONNECT_FLUSH_TIMEOUT = 2.0
+
+# Seconds to wait for a drained connection's queue to reach the client before closing
+DRAIN_FLUSH_TIMEOUT = 2.0
+
+# Sent to every connection before the server closes it on shutdown
+SERVER_GOING_AWAY_EVENT = "server_going_away"
+
+# Internal inbox event updating a user's rooms on the nodes hosting them
+ROOM_MEMBERSHIP_EVENT = "room_membership"
+
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time chat with Redis pub/sub"""
     
     def __init__(self):
-        # Active WebSocket connections: user_id -> WebSocket
-        self.active_connections: Dict[str, WebSocket] = {}
+        # Node id, event bus and presence store
+        self.assign_node_id()
+        
+        # Active WebSocket connections: connection_id -> Connection
+        self.active_connections: Dict[str, Connection] = {}
+        
+        # Sessions per user (tabs, devices): user_id -> Set of connection_ids
+        self.user_connections: Dict[str, Set[str]] = {}
         
         # Channel rooms: channel_id -> Set of user_ids
         self.channel_rooms: Dict[str, Set[str]] = {}
         
-        # User presence: user_id -> last_seen timestamp
-        self.user_presence: Dict[str, datetime] = {}
+        # Reverse index of channel_rooms: user_id -> Set of channel_ids
+        self.user_rooms: Dict[str, Set[str]] = {}
+        
+        # Recent sequenced channel events, for replay on reconnect
+        self.replay = ReplayBuffer()
+        
+        # Typing indicators, coalesced into one snapshot per channel per tick
+        self.typing = TypingAggregator(
+            on_snapshot=self._send_typing_snapshot,
+            on_local_updates=self._publish_typing_updates
+        )
+        
+        # Periodic cleanup task
+        self.cleanup_task = None
+        
+        # Metrics sampling task
+        self.metrics_task = None
+        
+        # Set by the launcher's server, which drains before uvicorn closes sockets
+        self.drains_before_close = False
+
+    def assign_node_id(self):
+        """Give this instance a fresh node id, with the bus and presence store bound to it"""
+        # Unique id of this instance, used to skip our own events on the bus
+        self.node_id = uuid.uuid4().hex
+        
+        # Cross-instance event bus, with received events handled per channel shard
+        self.bus = create_bus(self.node_id)
+        self.bus_dispatcher = ShardedDispatcher(self._handle_redis_message)
         
-        # Typing indicators: channel_id -> Set of user_ids currently typing
-        self.typing_users: Dict[str, Set[str]] = {}
+        # Cluster-wide presence, written to Redis in batches
+        self.presence = PresenceStore(self.node_id)
         
-        # Redis pub/sub task
-        self.redis_listener_task = None
+        # Which nodes host which users, for direct sends
+        self.routes = RoutingTable(self.node_id)
+        self.inbox_topic = node_topic(self.node_id)
 
     async def start_redis_listener(self):
         """Start Redis pub/sub listener for cross-instance communication"""
-        self.redis_listener_task = asyncio.create_task(self._redis_listener())
-        logger.info("Redis pub/sub listener started")
+        self.bus_dispatcher.start()
+        await self.bus.start(self.bus_dispatcher.submit)
+        logger.info(f"Redis pub/sub listener started (node {self.node_id})")
         
         # Start periodic connection cleanup
         self.cleanup_task = asyncio.create_task(self._periodic_cleanup())
         logger.info("Periodic connection cleanup started")
+        
+        if metrics_enabled():
+            self.metrics_task = asyncio.create_task(self._sample_metrics())
+        
+        await self.typing.start()
+        await self.presence.start()
+        await self.routes.start(self.user_connections.keys)
 
     async def stop_redis_listener(self):
         """Stop Redis pub/sub listener"""
-        if self.redis_listener_task:
-            self.redis_listener_task.cancel()
-            try:
-                await self.redis_listener_task
-            except asyncio.CancelledError:
-                pass
+        await self.bus.stop()
+        await self.bus_dispatcher.stop()
         logger.info("Redis pub/sub listener stopped")
         
-        # Stop periodic cleanup
-        if hasattr(self, 'cleanup_task') and self.cleanup_task:
-            self.cleanup_task.cancel()
-            try:
-                await self.cleanup_task
-            except asyncio.CancelledError:
-                pass
+        await self.typing.stop()
+        await self.presence.stop()
+        await self.routes.stop(list(self.user_connections))
+        
+        # Stop periodic cleanup and metrics sampling
+        for task in (self.cleanup_task, self.metrics_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         logger.info("Periodic connection cleanup stopped")
 
-    async def _redis_listener(self):
-        """Listen for Redis pub/sub messages from other instances"""
-        redis_client = await get_redis_client()
-        pubsub = redis_client.pubsub()
+    async def _handle_redis_message(self, topic: str, header: dict, frame: EventFrame):
+        """Handle an event published by another instance"""
+        exclude = header.get("exclude", ())
         
-        try:
-            # Subscribe to all channel topics
-            await pubsub.subscribe("websocket:channel:*")
-            await pubsub.subscribe("websocket:user:*")
-            await pubsub.subscribe("websocket:global")
-            
-            async for message in pubsub.listen():
-                if message["type"] == "message":
-                    await self._handle_redis_message(message)
-                    
-        except Exception as e:
-            logger.error(f"Redis listener error: {e}")
-        finally:
-            await pubsub.close()
+        if topic.startswith(CHANNEL_TOPIC_PREFIX):
+            channel_id = topic[len(CHANNEL_TOPIC_PREFIX):]
+            await self._handle_channel_message(channel_id, frame, exclude)
+        elif topic == self.inbox_topic:
+            await self._handle_user_message(header["to"], frame)
+        elif topic == GLOBAL_TOPIC:
+            await self._handle_global_message(frame)
 
-    async def _handle_redis_message(self, message):
-        """Handle incoming Redis pub/sub message"""
-        try:
-            channel = message["channel"].decode()
-            data = json.loads(message["data"].decode())
+    async def _handle_channel_message(self, channel_id: str, frame: EventFrame, exclude: Collection[str] = ()):
+        """Handle channel-specific Redis message"""
+        if frame.type == TYPING_UPDATE_EVENT:
+            # Node-to-node typing state; clients get it through our own snapshots
+            self.typing.apply_remote(channel_id, json.loads(frame.text)["updates"])
+            return
             
-            if channel.startswith("websocket:channel:"):
-                channel_id = channel.split(":")[2]
-                await self._handle_channel_message(channel_id, data)
-            elif channel.startswith("websocket:user:"):
-                user_id = channel.split(":")[2]
-                await self._handle_user_message(user_id, data)
-            elif channel == "websocket:global":
-                await self._handle_global_message(data)
-                
-        except Exception as e:
-            logger.error(f"Error handling Redis message: {e}")
+        if frame.seq is not None:
+            self.replay.record(channel_id, frame)
+            
+        # Deliver to our own members only; the origin node already published it
+        await self._send_to_channel_local(channel_id, frame, exclude)
 
-    async def _handle_channel_message(self, channel_id: str, data: dict):
-        """Handle channel-specific Redis message"""
-        message_type = data.get("type")
-        
-        if message_type == "new_message":
-            await self.broadcast_to_channel(channel_id, data, exclude_user=data.get("exclude_user"))
-        elif message_type == "typing_indicator":
-            await self.broadcast_to_channel(channel_id, data, exclude_user=data.get("exclude_user"))
-        elif message_type == "user_joined":
-            await self.broadcast_to_channel(channel_id, data, exclude_user=data.get("exclude_user"))
-        elif message_type == "user_left":
-            await self.broadcast_to_channel(channel_id, data, exclude_user=data.get("exclude_user"))
-
-    async def _handle_user_message(self, user_id: str, data: dict):
+    async def _handle_user_message(self, user_id: str, frame: EventFrame):
         """Handle user-specific Redis message"""
-        message_type = data.get("type")
-        
-        if message_type == "mention_notification":
-            await self.send_to_user(user_id, data)
-        elif message_type == "force_disconnect":
-            await self.disconnect_user(user_id)
+        if frame.type == "mention_notification":
+            await self._send_to_user_local(user_id, frame)
+        elif frame.type == "force_disconnect":
+            await self._disconnect_user_local(user_id, frame)
+        elif frame.type == ROOM_MEMBERSHIP_EVENT:
+            self._apply_room_membership(user_id, json.loads(frame.text))
 
-    async def _handle_global_message(self, data: dict):
+    async def _handle_global_message(self, frame: EventFrame):
         """Handle global Redis message"""
-        message_type = data.get("type")
-        
-        if message_type == "channel_created":
-            # Broadcast to all local connections
-            message_str = json.dumps(data)
-            disconnected_users = []
-            
-            for user_id, websocket in self.active_connections.items():
-                try:
-                    await websocket.send_text(message_str)
-                except Exception as e:
-                    logger.error(f"Error sending global message to user {user_id}: {e}")
-                    disconnected_users.append(user_id)
-            
-            # Clean up disconnected users
-            for user_id in disconnected_users:
-                await self.disconnect(user_id)
+        if frame.type == PRESENCE_UPDATE_EVENT:
+            await self._send_user_status_local(json.loads(frame.text))
+        else:
+            # Sent through broadcast_to_all, e.g. channel_created
+            await self._send_to_all_local(frame)
 
-    async def _publish_to_redis(self, channel: str, data: dict):
+    async def _publish_to_redis(self, channel: str, frame: EventFrame, exclude: Collection[str] = ()):
         """Publish message to Redis for other instances"""
-        try:
-            redis_client = await get_redis_client()
-            await redis_client.publish(channel, json.dumps(data))
-        except Exception as e:
-            logger.error(f"Error publishing to Redis: {e}")
+        await self.bus.publish(channel, frame, exclude)
 
-    async def connect(self, websocket: WebSocket, user_id: str):
-        """Connect a user's WebSocket"""
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, user_id: str) -> Connection:
+        """Connect a user's WebSocket as a new session"""
+        codec = negotiate_codec(websocket)
+        await websocket.accept(subprotocol=codec.subprotocol)
         
-        # Store the connection
-        self.active_connections[user_id] = websocket
-        self.user_presence[user_id] = datetime.utcnow()
+        # Store the connection and start its writer task
+        connection = Connection(websocket, user_id, on_failure=self._handle_connection_failure, codec=codec)
+        connection.start()
+        self.active_connections[connection.connection_id] = connection
+        CONNECTIONS.inc()
+        sessions = self.user_connections.setdefault(user_id, set())
+        sessions.add(connection.connection_id)
         
-        logger.info(f"User {user_id} connected via WebSocket")
+        logger.info(f"User {user_id} connected via WebSocket ({len(sessions)} sessions)")
         
-        # Broadcast user online status
-        await self._broadcast_user_status(user_id, "online")
+        # The online status is broadcast once the user's rooms are registered
+        if len(sessions) == 1:
+            self.presence.mark_online(user_id)
+            await self._add_route(user_id)
+        
+        return connection
 
-    async def disconnect(self, user_id: str):
-        """Disconnect a user's WebSocket"""
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-            
-        # Remove from all channel rooms
-        for channel_id, users in self.channel_rooms.items():
-            users.discard(user_id)
+    async def disconnect(self, connection_id: str):
+        """Disconnect a single WebSocket session"""
+        connection = self.active_connections.pop(connection_id, None)
+        if not connection:
+            return
+        CONNECTIONS.dec()
+        
+        # Unindex the session before stopping it: fan-out running while stop()
+        # awaits must not find a connection id that is no longer active
+        user_id = connection.user_id
+        sessions = self.user_connections.get(user_id)
+        if sessions is not None:
+            sessions.discard(connection_id)
+            if sessions:
+                await connection.stop()
+                # The user is still online through another session
+                logger.info(f"User {user_id} closed a WebSocket session ({len(sessions)} remaining)")
+                return
+            del self.user_connections[user_id]
             
-        # Remove from typing indicators
-        for channel_id, typing_users in self.typing_users.items():
-            typing_users.discard(user_id)
+        # Last session closed: remove from the user's channel rooms and typing indicators
+        rooms = self.user_rooms.pop(user_id, set())
+        for channel_id in rooms:
+            self._discard_room_member(channel_id, user_id)
+            self.typing.remove_user(channel_id, user_id)
+        await connection.stop()
+        
+        # The user may have reconnected while stop() awaited; the new session
+        # owns their presence and route now
+        if user_id in self.user_connections:
+            logger.info(f"User {user_id} closed a WebSocket session and has reconnected")
+            return
             
-        # Update presence
-        self.user_presence[user_id] = datetime.utcnow()
+        # Update presence and routing
+        self.presence.mark_offline(user_id)
+        await self._remove_route(user_id)
         
         logger.info(f"User {user_id} disconnected from WebSocket")
         
+        # A reconnect during the route removal queued its route after ours,
+        # but peers must not hear "offline" after it
+        if user_id in self.user_connections:
+            return
+        
         # Broadcast user offline status
-        await self._broadcast_user_status(user_id, "offline")
+        await self._broadcast_user_status(user_id, "offline", rooms)
+
+    async def _add_route(self, user_id: str):
+        """Route direct sends for the user to this node"""
+        try:
+            await self.routes.add(user_id)
+        except Exception as e:
+            # The next lease renewal adds it
+            logger.error(f"Error adding route for user {user_id}: {e}")
+
+    async def _remove_route(self, user_id: str):
+        """Stop routing direct sends for the user to this node"""
+        try:
+            await self.routes.remove(user_id)
+        except Exception as e:
+            # The lease expires on its own
+            logger.error(f"Error removing route for user {user_id}: {e}")
+
+    def _add_room_member(self, channel_id: str, user_id: str):
+        """Add a user to a room, keeping both membership indexes in sync"""
+        self.channel_rooms.setdefault(channel_id, set()).add(user_id)
+        self.user_rooms.setdefault(user_id, set()).add(channel_id)
+
+    def _discard_room_member(self, channel_id: str, user_id: str):
+        """Remove a user from a room and drop whichever index entries become empty"""
+        users = self.channel_rooms.get(channel_id)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self.channel_rooms[channel_id]
+                
+        rooms = self.user_rooms.get(user_id)
+        if rooms is not None:
+            rooms.discard(channel_id)
+            if not rooms:
+                del self.user_rooms[user_id]
+
+    async def register_user_rooms(self, user_id: str, channel_ids: Collection[str]):
+        """Register all of a connecting user's rooms at once and announce them online
+
+        Unlike join_channel this is not a membership change, so no user_joined
+        events are sent; channel mates get a single user_status event each.
+        """
+        if user_id not in self.user_connections:
+            return
+            
+        for channel_id in channel_ids:
+            self._add_room_member(channel_id, user_id)
+            
+        await self._broadcast_user_status(user_id, "online")
 
     async def join_channel(self, user_id: str, channel_id: str, username: str = None):
         """Add user to a channel room"""
-        if channel_id not in self.channel_rooms:
-            self.channel_rooms[channel_id] = set()
-            
-        self.channel_rooms[channel_id].add(user_id)
+        # Only nodes the user is connected to keep a room entry; the join is
+        # announced either way so channel mates see it
+        if user_id in self.user_connections:
+            self._add_room_member(channel_id, user_id)
+        await self._update_remote_rooms(user_id, channel_id, "join")
         
         # Get username if not provided
         if not username:
@@ -207,12 +325,11 @@ class ConnectionManager:
 
     async def leave_channel(self, user_id: str, channel_id: str, username: str = None):
         """Remove user from a channel room"""
-        if channel_id in self.channel_rooms:
-            self.channel_rooms[channel_id].discard(user_id)
+        self._discard_room_member(channel_id, user_id)
             
         # Remove from typing indicators for this channel
-        if channel_id in self.typing_users:
-            self.typing_users[channel_id].discard(user_id)
+        self.typing.remove_user(channel_id, user_id, username)
+        await self._update_remote_rooms(user_id, channel_id, "leave")
             
         # Get username if not provided
         if not username:
@@ -232,183 +349,402 @@ class ConnectionManager:
             "timestamp": datetime.utcnow().isoformat()
         }, exclude_user=user_id)
 
+    async def _update_remote_rooms(self, user_id: str, channel_id: str, action: str):
+        """Apply a membership change on the other nodes hosting the user"""
+        await self._send_to_user_remote(user_id, EventFrame.from_message({
+            "type": ROOM_MEMBERSHIP_EVENT,
+            "channel_id": channel_id,
+            "action": action
+        }))
+
+    def _apply_room_membership(self, user_id: str, update: dict):
+        """Apply a membership change forwarded by another node"""
+        if user_id not in self.user_connections:
+            return
+        if update["action"] == "join":
+            self._add_room_member(update["channel_id"], user_id)
+        else:
+            self._discard_room_member(update["channel_id"], user_id)
+            self.typing.remove_user(update["channel_id"], user_id)
+
     async def broadcast_to_channel(self, channel_id: str, message: dict, exclude_user: Optional[str] = None):
         """Broadcast message to all users in a channel"""
-        if channel_id not in self.channel_rooms:
+        # Encode once; the same frame goes to Redis and to every local socket
+        frame = EventFrame.from_message(message)
+        exclude = (exclude_user,) if exclude_user else ()
+        if frame.seq is not None:
+            self.replay.record(channel_id, frame)
+        
+        # Publish to Redis for other instances, even when no member is connected here
+        await self._publish_to_redis(channel_topic(channel_id), frame, exclude)
+        
+        # Send to local connections
+        await self._send_to_channel_local(channel_id, frame, exclude)
+
+    async def broadcast_sequenced(self, channel_id: str, message: dict):
+        """Broadcast a channel event that clients can replay after a reconnect"""
+        seq = await self._next_sequence(channel_id)
+        if seq is not None:
+            message = {**message, "channel_id": channel_id, "seq": seq}
+        await self.broadcast_to_channel(channel_id, message)
+
+    async def _next_sequence(self, channel_id: str) -> Optional[int]:
+        """Issue the next cluster-wide sequence number for a channel"""
+        try:
+            # Counters bumped in the same tick share one round trip
+            return await auto_pipeline.execute("incr", sequence_key(channel_id))
+        except Exception as e:
+            # The event still goes out, just without a sequence number
+            logger.error(f"Error issuing sequence number for channel {channel_id}: {e}")
+            return None
+
+    async def resume_connection(self, connection_id: str, last_seqs: Dict[str, int]):
+        """Send a reconnecting session the channel events it missed
+        
+        For each channel the client reports its last sequence number. If the
+        replay buffer still holds every later event they are sent as they
+        were; otherwise the client gets a resync_required marker and should
+        refetch that channel.
+        """
+        connection = self.active_connections.get(connection_id)
+        if not connection:
             return
             
-        # Add exclude_user to message for Redis pub/sub
-        if exclude_user:
-            message["exclude_user"] = exclude_user
-            
-        # Publish to Redis for other instances
-        await self._publish_to_redis(f"websocket:channel:{channel_id}", message)
+        rooms = self.user_rooms.get(connection.user_id, set())
+        channel_ids = [channel_id for channel_id in last_seqs if channel_id in rooms]
         
-        # Send to local connections
-        message_str = json.dumps(message)
-        disconnected_users = []
+        heads: Dict[str, int] = {}
+        if channel_ids:
+            try:
+                redis_client = await get_redis_client()
+                values = await redis_client.mget([sequence_key(channel_id) for channel_id in channel_ids])
+                heads = {
+                    channel_id: int(value)
+                    for channel_id, value in zip(channel_ids, values)
+                    if value is not None
+                }
+            except Exception as e:
+                logger.error(f"Error reading channel sequence numbers: {e}")
+                
+        for channel_id in channel_ids:
+            last_seq = last_seqs[channel_id]
+            head_seq = heads.get(channel_id, self.replay.latest(channel_id) or 0)
+            frames = self.replay.replay(channel_id, last_seq, head_seq)
+            
+            if frames is None:
+                frames = [EventFrame.from_message({
+                    "type": RESYNC_REQUIRED_EVENT,
+                    "channel_id": channel_id,
+                    "last_seq": last_seq,
+                    "current_seq": head_seq,
+                    "timestamp": datetime.utcnow().isoformat()
+                })]
+            for frame in frames:
+                if not await self._send_to_connection_frame(connection_id, frame):
+                    return
+                    
+        await self.send_to_connection(connection_id, {
+            "type": "resume_complete",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    async def _send_to_channel_local(self, channel_id: str, frame: EventFrame, exclude: Collection[str] = ()):
+        """Send a frame to the channel members connected to this instance"""
+        if channel_id not in self.channel_rooms:
+            return
+            
+        started = time.perf_counter()
+        recipients = 0
+        slow_connections = []
         
         for user_id in self.channel_rooms[channel_id]:
-            if exclude_user and user_id == exclude_user:
+            if user_id in exclude:
                 continue
                 
-            if user_id in self.active_connections:
-                try:
-                    await self.active_connections[user_id].send_text(message_str)
-                except Exception as e:
-                    logger.error(f"Error sending message to user {user_id}: {e}")
-                    disconnected_users.append(user_id)
+            for connection_id in self.user_connections.get(user_id, ()):
+                connection = self.active_connections.get(connection_id)
+                if connection is None:
+                    continue
+                recipients += 1
+                if not connection.enqueue(frame):
+                    slow_connections.append(connection)
+        
+        BROADCAST_DURATION.labels("channel").observe(time.perf_counter() - started)
+        BROADCAST_RECIPIENTS.labels("channel").observe(recipients)
         
-        # Clean up disconnected users
-        for user_id in disconnected_users:
-            await self.disconnect(user_id)
+        # Evict consumers that cannot keep up
+        for connection in slow_connections:
+            await self._evict_slow_consumer(connection)
 
     async def send_to_user(self, user_id: str, message: dict):
-        """Send message to a specific user"""
-        # Publish to Redis for other instances
-        await self._publish_to_redis(f"websocket:user:{user_id}", message)
-        
-        # Send to local connection if exists
-        if user_id in self.active_connections:
-            try:
-                message_str = json.dumps(message)
-                await self.active_connections[user_id].send_text(message_str)
-                return True
-            except Exception as e:
-                logger.error(f"Error sending message to user {user_id}: {e}")
-                await self.disconnect(user_id)
-                return False
-        return False
+        """Send message to every session of a user, on this node or any other"""
+        frame = EventFrame.from_message(message)
+        sent = await self._send_to_user_local(user_id, frame)
+        await self._send_to_user_remote(user_id, frame)
+        return sent
 
-    async def broadcast_new_message(self, channel_id: str, message_data: dict):
-        """Broadcast a new message to channel members"""
-        await self.broadcast_to_channel(channel_id, {
-            "type": "new_message",
-            "data": message_data,
-            "timestamp": datetime.utcnow().isoformat()
-        })
+    async def _send_to_user_remote(self, user_id: str, frame: EventFrame):
+        """Forward a frame to the inboxes of the other nodes hosting the user"""
+        try:
+            nodes = await self.routes.lookup(user_id)
+        except Exception as e:
+            logger.error(f"Error looking up route for user {user_id}: {e}")
+            return
+            
+        for node_id in nodes:
+            if node_id != self.node_id:
+                await self.bus.publish(node_topic(node_id), frame, target=user_id)
 
-    async def broadcast_message_reaction(self, channel_id: str, message_id: str, reaction_data: dict):
-        """Broadcast message reaction to channel members"""
-        await self.broadcast_to_channel(channel_id, {
-            "type": "message_reaction",
-            "message_id": message_id,
-            "data": reaction_data,
-            "timestamp": datetime.utcnow().isoformat()
-        })
+    async def _send_to_user_local(self, user_id: str, frame: EventFrame) -> bool:
+        """Send a frame to every session of a user on this instance"""
+        sent = False
+        for connection_id in list(self.user_connections.get(user_id, ())):
+            sent = await self._send_to_connection_frame(connection_id, frame) or sent
+        return sent
 
-    async def broadcast_message_edit(self, channel_id: str, message_data: dict):
-        """Broadcast message edit to channel members"""
-        await self.broadcast_to_channel(channel_id, {
-            "type": "message_edited",
-            "data": message_data,
-            "timestamp": datetime.utcnow().isoformat()
-        })
+    async def send_to_connection(self, connection_id: str, message: dict) -> bool:
+        """Send a reply to one session only (pongs, confirmations, errors)"""
+        return await self._send_to_connection_frame(connection_id, EventFrame.from_message(message))
+
+    async def _send_to_connection_frame(self, connection_id: str, frame: EventFrame) -> bool:
+        """Queue a frame on a single local connection"""
+        connection = self.active_connections.get(connection_id)
+        if not connection:
+            return False
+            
+        if not connection.enqueue(frame):
+            await self._evict_slow_consumer(connection)
+            return False
+        return True
 
     async def handle_typing_indicator(self, user_id: str, username: str, channel_id: str, is_typing: bool):
         """Handle typing indicators"""
-        if channel_id not in self.typing_users:
-            self.typing_users[channel_id] = set()
-            
-        if is_typing:
-            self.typing_users[channel_id].add(user_id)
-        else:
-            self.typing_users[channel_id].discard(user_id)
-            
-        # Broadcast typing status to channel
-        await self.broadcast_to_channel(channel_id, {
-            "type": "typing_indicator",
-            "user_id": user_id,
-            "username": username,
+        # Only records state; snapshots go out on the aggregator's next tick
+        self.typing.update(channel_id, user_id, username, is_typing)
+
+    async def _send_typing_snapshot(self, channel_id: str, users: List[dict]):
+        """Send the current typers of a channel to its local members"""
+        await self._send_to_channel_local(channel_id, EventFrame.from_message({
+            "type": "typing_users",
             "channel_id": channel_id,
-            "is_typing": is_typing,
+            "users": users,
             "timestamp": datetime.utcnow().isoformat()
-        }, exclude_user=user_id)
+        }))
+
+    async def _publish_typing_updates(self, channel_id: str, updates: List[dict]):
+        """Share this node's typing changes for a channel with the other nodes"""
+        await self._publish_to_redis(channel_topic(channel_id), EventFrame.from_message({
+            "type": TYPING_UPDATE_EVENT,
+            "channel_id": channel_id,
+            "updates": updates
+        }))
 
     async def get_channel_online_users(self, channel_id: str) -> List[str]:
-        """Get list of online users in a channel"""
-        if channel_id not in self.channel_rooms:
-            return []
+        """Get list of online users in a channel across all instances"""
+        try:
+            return await self.presence.get_channel_online_users(channel_id)
+        except Exception as e:
+            logger.error(f"Error reading presence for channel {channel_id}: {e}")
             
-        online_users = []
-        for user_id in self.channel_rooms[channel_id]:
-            if user_id in self.active_connections:
-                online_users.append(user_id)
-                
-        return online_users
-
-    async def _broadcast_user_status(self, user_id: str, status: str):
-        """Broadcast user online/offline status to relevant channels"""
-        # Find all channels the user is part of and broadcast status
-        for channel_id, users in self.channel_rooms.items():
-            if user_id in users:
-                await self.broadcast_to_channel(channel_id, {
-                    "type": "user_status",
-                    "user_id": user_id,
-                    "status": status,
-                    "timestamp": datetime.utcnow().isoformat()
-                }, exclude_user=user_id)
+        # Fall back to the members connected to this instance
+        return [
+            user_id for user_id in self.channel_rooms.get(channel_id, ())
+            if user_id in self.user_connections
+        ]
 
-    async def broadcast_mention_notification(self, user_id: str, message_data: dict):
-        """Send mention notification to a specific user"""
-        await self.send_to_user(user_id, {
-            "type": "mention_notification",
-            "data": message_data,
+    async def _broadcast_user_status(self, user_id: str, status: str, rooms: Optional[Set[str]] = None):
+        """Broadcast user online/offline status to everyone sharing a channel with them
+        
+        A single presence update covers all of the user's channels, so each
+        recipient gets one user_status event however many channels they share.
+        """
+        if rooms is None:
+            rooms = self.user_rooms.get(user_id, set())
+        if not rooms:
+            return
+            
+        update = {
+            "type": PRESENCE_UPDATE_EVENT,
+            "user_id": user_id,
+            "status": status,
+            "channel_ids": list(rooms),
             "timestamp": datetime.utcnow().isoformat()
+        }
+        await self._publish_to_redis(GLOBAL_TOPIC, EventFrame.from_message(update))
+        await self._send_user_status_local(update)
+
+    async def _send_user_status_local(self, update: dict):
+        """Deliver a presence update to the local members of its channels, once each"""
+        recipients = set()
+        for channel_id in update["channel_ids"]:
+            recipients.update(self.channel_rooms.get(channel_id, ()))
+        recipients.discard(update["user_id"])
+        if not recipients:
+            return
+            
+        frame = EventFrame.from_message({
+            "type": "user_status",
+            "user_id": update["user_id"],
+            "status": update["status"],
+            "timestamp": update["timestamp"]
         })
+        started = time.perf_counter()
+        for recipient in recipients:
+            await self._send_to_user_local(recipient, frame)
+        BROADCAST_DURATION.labels("status").observe(time.perf_counter() - started)
+        BROADCAST_RECIPIENTS.labels("status").observe(len(recipients))
 
-    async def broadcast_channel_created(self, channel_data: dict):
-        """Broadcast new channel creation to all connected users"""
-        # Broadcast to all connected users
-        message = {
-            "type": "channel_created",
-            "data": channel_data,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+    async def broadcast_to_all(self, message: dict):
+        """Broadcast a message to every connected user, on this node or any other"""
+        frame = EventFrame.from_message(message)
         
         # Publish to Redis for other instances
-        await self._publish_to_redis("websocket:global", message)
+        await self._publish_to_redis(GLOBAL_TOPIC, frame)
         
         # Send to all local connections
-        message_str = json.dumps(message)
-        disconnected_users = []
-        
-        for user_id, websocket in self.active_connections.items():
-            try:
-                await websocket.send_text(message_str)
-            except Exception as e:
-                logger.error(f"Error sending channel created message to user {user_id}: {e}")
-                disconnected_users.append(user_id)
+        await self._send_to_all_local(frame)
+
+    async def _send_to_all_local(self, frame: EventFrame):
+        """Send a frame to every connection on this instance"""
+        started = time.perf_counter()
+        connections = list(self.active_connections.values())
+        slow_connections = [
+            connection
+            for connection in connections
+            if not connection.enqueue(frame)
+        ]
+        BROADCAST_DURATION.labels("all").observe(time.perf_counter() - started)
+        BROADCAST_RECIPIENTS.labels("all").observe(len(connections))
         
-        # Clean up disconnected users
-        for user_id in disconnected_users:
-            await self.disconnect(user_id)
+        # Evict consumers that cannot keep up
+        for connection in slow_connections:
+            await self._evict_slow_consumer(connection)
+
+    async def _evict_slow_consumer(self, connection: Connection):
+        """Disconnect a consumer whose outbound queue stayed over its limit"""
+        logger.warning(
+            f"Evicting slow consumer {connection.user_id} "
+            f"({len(connection.queue)} queued, {connection.dropped_count} dropped)"
+        )
+        SEND_FAILURES.labels("slow_consumer").inc()
+        await connection.close(code=1013, reason="Slow consumer")
+        await self.disconnect(connection.connection_id)
+
+    async def _handle_connection_failure(self, connection: Connection):
+        """Clean up after a connection's writer task failed to send"""
+        await self.disconnect(connection.connection_id)
 
     async def disconnect_user(self, user_id: str):
         """Force disconnect a user (for admin actions like bans)"""
-        if user_id in self.active_connections:
+        frame = EventFrame.from_message({
+            "type": "force_disconnect",
+            "reason": "Account suspended or banned",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        
+        # The user may be connected to other instances as well
+        await self._send_to_user_remote(user_id, frame)
+        await self._disconnect_user_local(user_id, frame)
+
+    async def _disconnect_user_local(self, user_id: str, frame: EventFrame):
+        """Close every session of a user on this instance"""
+        connections = [
+            self.active_connections[connection_id]
+            for connection_id in self.user_connections.get(user_id, ())
+            if connection_id in self.active_connections
+        ]
+        
+        async def close_session(connection: Connection):
             try:
-                # Send disconnect message to user
-                await self.send_to_user(user_id, {
-                    "type": "force_disconnect",
-                    "reason": "Account suspended or banned",
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-                
-                # Close the WebSocket connection
-                websocket = self.active_connections[user_id]
-                await websocket.close(code=1008, reason="Account suspended")
+                # Send disconnect message to user, then close once it is written
+                connection.enqueue(frame)
+                await connection.close(
+                    code=1008,
+                    reason="Account suspended",
+                    flush_timeout=FORCE_DISCONNECT_FLUSH_TIMEOUT
+                )
                 
             except Exception as e:
                 logger.error(f"Error force disconnecting user {user_id}: {e}")
             
             # Clean up the connection
-            await self.disconnect(user_id)
+            await self.disconnect(connection.connection_id)
+        
+        await asyncio.gather(*(close_session(connection) for connection in connections))
+
+    async def drain(self):
+        """Close every session ahead of shutdown, spread over WS_DRAIN_PERIOD
+        
+        New handshakes are refused first. Each client is told to come back
+        after its own random delay, and sockets are closed in paced batches
+        once their queued events are written, so a rolling deploy does not
+        send every client to the remaining instances at the same instant.
+        """
+        admission_controller.start_draining()
+        
+        connections = list(self.active_connections.values())
+        if not connections:
+            return
+            
+        batch_size = settings.WS_DRAIN_BATCH_SIZE
+        batch_count = -(-len(connections) // batch_size)
+        interval = settings.WS_DRAIN_PERIOD / batch_count
+        logger.info(f"Draining {len(connections)} WebSocket connections in {batch_count} batches")
+        
+        for start in range(0, len(connections), batch_size):
+            started = time.monotonic()
+            await asyncio.gather(*(
+                self._drain_connection(connection)
+                for connection in connections[start:start + batch_size]
+            ))
+            if start + batch_size < len(connections):
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+                
+        logger.info("WebSocket connections drained")
+
+    async def _drain_connection(self, connection: Connection):
+        """Tell one client when to reconnect, flush its queue and close it"""
+        if connection.connection_id not in self.active_connections:
+            return
+            
+        delay = reconnect_delay()
+        try:
+            connection.enqueue(EventFrame.from_message({
+                "type": SERVER_GOING_AWAY_EVENT,
+                "reconnect_delay": round(delay, 1),
+                "timestamp": datetime.utcnow().isoformat()
+            }))
+            await connection.close(
+                code=GOING_AWAY,
+                reason=with_retry_hint("Server going away", delay),
+                flush_timeout=DRAIN_FLUSH_TIMEOUT
+            )
+        except Exception as e:
+            logger.error(f"Error draining connection of user {connection.user_id}: {e}")
+            
+        await self.disconnect(connection.connection_id)
+
+    def session_count(self, user_id: str) -> int:
+        """Number of sessions a user has open on this instance"""
+        return len(self.user_connections.get(user_id, ()))
 
     async def get_connection_stats(self) -> dict:
-        """Get connection statistics"""
+        """Get connection statistics for this instance and cluster-wide presence"""
+        try:
+            cluster = await self.presence.get_cluster_stats()
+        except Exception as e:
+            logger.error(f"Error reading cluster presence stats: {e}")
+            cluster = {"nodes": {}, "online_users": None}
+            
         return {
+            "node_id": self.node_id,
+            "online_users": cluster["online_users"],
+            "online_users_by_node": cluster["nodes"],
+            **admission_controller.get_stats(),
+            "inbound": inbound_dispatcher.get_stats(),
+            "bus_dispatch": self.bus_dispatcher.get_stats(),
             "total_connections": len(self.active_connections),
+            "total_users": len(self.user_connections),
             "total_channels": len(self.channel_rooms),
             "users_by_channel": {
                 channel_id: len(users) 
@@ -422,24 +758,16 @@ class ConnectionManager:
             try:
                 await asyncio.sleep(300)  # Run every 5 minutes
                 
-                # Clean up stale typing indicators (older than 30 seconds)
-                current_time = datetime.utcnow()
-                stale_typing = []
-                
-                for channel_id, typing_users in self.typing_users.items():
-                    # Remove users who haven't been active recently
-                    # This is a simple cleanup - in production you might want more sophisticated tracking
-                    if not typing_users:
-                        stale_typing.append(channel_id)
+                # Stale typing indicators expire on their own in the typing aggregator
                 
-                for channel_id in stale_typing:
-                    del self.typing_users[channel_id]
-                
-                if stale_typing:
-                    logger.info(f"Cleaned up {len(stale_typing)} stale typing indicators")
+                # Drop replay logs of channels that have gone quiet
+                self.replay.prune()
                 
                 # Log connection stats periodically
-                logger.info(f"Connection stats: {len(self.active_connections)} active connections, {len(self.channel_rooms)} channels")
+                logger.info(
+                    f"Connection stats: {len(self.active_connections)} active connections, "
+                    f"{len(self.user_connections)} users, {len(self.channel_rooms)} channels"
+                )
                 
             except asyncio.CancelledError:
                 break
@@ -447,6 +775,30 @@ class ConnectionManager:
                 logger.error(f"Error in periodic cleanup: {e}")
                 await asyncio.sleep(60)  # Wait 1 minute before retrying
 
+    async def _sample_metrics(self):
+        """Sample event-loop lag and outbound queue depths for /metrics"""
+        interval = settings.METRICS_SAMPLE_INTERVAL
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                expected = loop.time() + interval
+                await asyncio.sleep(interval)
+                
+                # A busy loop runs the wakeup late
+                EVENT_LOOP_LAG.observe(max(0.0, loop.time() - expected))
+                
+                for connection in self.active_connections.values():
+                    SEND_QUEUE_DEPTH.observe(len(connection.queue))
+                self.bus_dispatcher.sample_metrics()
+                    
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error sampling metrics: {e}")
+
 
 # Global connection manager instance
-connection_manager = ConnectionManager() 
\ No newline at end of file
+connection_manager = ConnectionManager()
+
+# Workers forked from a preloaded parent must not share its node id
+os.register_at_fork(after_in_child=connection_manager.assign_node_id) 
\ No newline at end of file
@@ -0,0 +1,173 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+import json
+import logging
+import time
+
+from pydantic import BaseModel, ValidationError
+
+from ..core.config import settings
+from ..core.metrics import INBOUND_DURATION, INBOUND_MESSAGES, INBOUND_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# Rejection reasons counted by the dispatcher
+REJECT_TOO_LARGE = "message_too_large"
+REJECT_RATE_LIMITED = "rate_limited"
+REJECT_INVALID_JSON = "invalid_json"
+REJECT_UNKNOWN_TYPE = "unknown_message_type"
+REJECT_INVALID_MESSAGE = "invalid_message"
+
+
+class Route:
+    """A registered inbound message type"""
+
+    __slots__ = ("message_type", "validate", "handler", "error_code", "invalid_error_code", "invalid_message")
+
+    def __init__(
+        self,
+        message_type: str,
+        model: Type[BaseModel],
+        handler: Callable[[Any, BaseModel], Awaitable[None]],
+        error_code: str,
+        invalid_error_code: Optional[str] = None,
+        invalid_message: Optional[str] = None
+    ):
+        self.message_type = message_type
+        # Pydantic compiles the model's validator once, at class creation
+        self.validate = model.model_validate
+        self.handler = handler
+        self.error_code = error_code
+        # Error sent for a message that fails validation; without a fixed
+        # message the validation error itself is sent, as handlers used to
+        self.invalid_error_code = invalid_error_code or error_code
+        self.invalid_message = invalid_message
+
+
+class DispatchStats:
+    """Rejection counts and per-type dispatch latency"""
+
+    def __init__(self):
+        self.rejected: Dict[str, int] = {}
+        # message_type -> [count, total seconds, max seconds]
+        self.latency: Dict[str, list] = {}
+
+    def reject(self, reason: str):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        INBOUND_REJECTED.labels(reason).inc()
+
+    def observe(self, message_type: str, seconds: float):
+        entry = self.latency.get(message_type)
+        if entry is None:
+            entry = self.latency[message_type] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        INBOUND_MESSAGES.labels(message_type).inc()
+        INBOUND_DURATION.labels(message_type).observe(seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "rejected": dict(self.rejected),
+            "latency": {
+                message_type: {
+                    "count": count,
+                    "avg_ms": round(total / count * 1000, 3),
+                    "max_ms": round(peak * 1000, 3)
+                }
+                for message_type, (count, total, peak) in self.latency.items()
+            }
+        }
+
+
+class InboundDispatcher:
+    """Registry-based dispatcher for client WebSocket messages
+
+    Handlers register per message type with the model that validates them.
+    Frames are size-checked and rate-limited before they are parsed, so a
+    flooding client costs a length check and a token-bucket lookup per frame.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, Route] = {}
+        self.stats = DispatchStats()
+
+    def route(
+        self,
+        message_type: str,
+        model: Type[BaseModel],
+        error_code: str,
+        invalid_error_code: Optional[str] = None,
+        invalid_message: Optional[str] = None
+    ):
+        """Decorator registering a WebSocketHandler method for a message type"""
+        def decorator(handler):
+            self.routes[message_type] = Route(
+                message_type, model, handler, error_code, invalid_error_code, invalid_message
+            )
+            return handler
+        return decorator
+
+    async def dispatch(self, session, data: str):
+        """Validate one raw client frame and run its handler
+
+        `session` is the WebSocketHandler that received the frame; it owns the
+        rate limiter and the error reply.
+        """
+        # The limit is in bytes. A character encodes to at most 4 bytes, so
+        # only frames near the limit need encoding to be measured
+        size = len(data)
+        if size * 4 > settings.WS_MAX_MESSAGE_SIZE:
+            size = len(data.encode())
+        if size > settings.WS_MAX_MESSAGE_SIZE:
+            self.stats.reject(REJECT_TOO_LARGE)
+            await session._send_error(REJECT_TOO_LARGE, "Message too large")
+            return
+
+        if not session.rate_limiter.try_acquire():
+            self.stats.reject(REJECT_RATE_LIMITED)
+            # Tell the client once per burst instead of answering every dropped frame
+            if not session.rate_limited:
+                session.rate_limited = True
+                await session._send_error(REJECT_RATE_LIMITED, "Too many messages")
+            return
+        session.rate_limited = False
+
+        try:
+            message_data = json.loads(data)
+        except json.JSONDecodeError:
+            message_data = None
+        if not isinstance(message_data, dict):
+            self.stats.reject(REJECT_INVALID_JSON)
+            await session._send_error(REJECT_INVALID_JSON, "Invalid JSON format")
+            return
+
+        message_type = message_data.get("type")
+        route = self.routes.get(message_type)
+        if route is None:
+            self.stats.reject(REJECT_UNKNOWN_TYPE)
+            await session._send_error(REJECT_UNKNOWN_TYPE, f"Unknown message type: {message_type}")
+            return
+
+        try:
+            message = route.validate(message_data)
+        except ValidationError as e:
+            self.stats.reject(REJECT_INVALID_MESSAGE)
+            await session._send_error(route.invalid_error_code, route.invalid_message or str(e))
+            return
+
+        started = time.perf_counter()
+        try:
+            await route.handler(session, message)
+        except Exception as e:
+            logger.error(f"Error handling {message_type} from user {session.user_id}: {e}")
+            await session._send_error(route.error_code, str(e))
+        finally:
+            self.stats.observe(message_type, time.perf_counter() - started)
+
+    def get_stats(self) -> dict:
+        """Dispatcher statistics"""
+        return self.stats.as_dict()
+
+
+# Global inbound dispatcher instance
+inbound_dispatcher = InboundDispatcher()
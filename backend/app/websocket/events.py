@@ -1,13 +1,18 @@
 from fastapi import WebSocket, WebSocketDisconnect, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
-import json
 import logging
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, Optional
 
 from .connection_manager import connection_manager
+from .admission import admission_controller, AdmissionRejected, Handshake, TokenBucket
+from .dispatcher import inbound_dispatcher
+from .codecs import negotiate_codec
 from ..models.websocket import (
-    JoinChannelMessage, LeaveChannelMessage, TypingIndicatorMessage, ErrorMessage
+    JoinChannelMessage, LeaveChannelMessage, TypingIndicatorMessage, PingMessage,
+    GetOnlineUsersMessage, ResumeMessage, ErrorMessage
 )
+from ..core.config import settings
 from ..models.user import User
 from ..core.database import prisma
 from ..core.auth import verify_token
@@ -58,23 +63,33 @@ async def get_user_from_token(token: str) -> User:
 class WebSocketHandler:
     """Handles WebSocket events and message routing"""
     
-    def __init__(self, websocket: WebSocket, user: User):
+    def __init__(self, websocket: WebSocket, user: User, handshake: Optional[Handshake] = None):
         self.websocket = websocket
         self.user = user
         self.user_id = user.id
+        self.connection = None
+        self.handshake = handshake
+        
+        # Inbound rate limit for this session
+        self.rate_limiter = TokenBucket(settings.WS_INBOUND_RATE, settings.WS_INBOUND_BURST)
+        self.rate_limited = False
 
     async def handle_connection(self):
         """Handle WebSocket connection lifecycle"""
         try:
             # Connect user
-            await connection_manager.connect(self.websocket, self.user_id)
+            self.connection = await connection_manager.connect(self.websocket, self.user_id)
             
-            # Auto-join user to their channels
-            await self._auto_join_user_channels()
+            # Auto-join user to their channels (rooms are shared by all of a user's sessions)
+            if connection_manager.session_count(self.user_id) == 1:
+                await self._auto_join_user_channels()
             
             # Send welcome message
             await self._send_welcome_message()
             
+            # Setup is done; free the pending-handshake slot for the next client
+            self._release_handshake()
+            
             # Handle incoming messages
             await self._message_loop()
             
@@ -83,20 +98,28 @@ class WebSocketHandler:
         except Exception as e:
             logger.error(f"WebSocket error for user {self.user_id}: {e}")
         finally:
-            await connection_manager.disconnect(self.user_id)
+            self._release_handshake()
+            if self.connection:
+                await connection_manager.disconnect(self.connection.connection_id)
+
+    def _release_handshake(self):
+        """Release the admission slot held while the session was being set up"""
+        if self.handshake:
+            self.handshake.release()
 
     async def _auto_join_user_channels(self):
         """Automatically join user to their channels"""
         try:
             # Get user's channels
             channel_members = await prisma.channelmember.find_many(
-                where={"userId": self.user_id},
-                include={"channel": True}
+                where={"userId": self.user_id}
             )
             
-            for member in channel_members:
-                channel_id = member.channel.id
-                await connection_manager.join_channel(self.user_id, channel_id, self.user.username)
+            # Register every room in one step; reconnecting is not a membership change
+            await connection_manager.register_user_rooms(
+                self.user_id,
+                [member.channelId for member in channel_members]
+            )
                 
         except Exception as e:
             logger.error(f"Error auto-joining channels for user {self.user_id}: {e}")
@@ -107,9 +130,9 @@ class WebSocketHandler:
             "type": "connection_established",
             "user_id": self.user_id,
             "username": self.user.username,
-            "timestamp": connection_manager.user_presence[self.user_id].isoformat()
+            "timestamp": datetime.utcnow().isoformat()
         }
-        await connection_manager.send_to_user(self.user_id, welcome_data)
+        await self._reply(welcome_data)
 
     async def _message_loop(self):
         """Main message handling loop"""
@@ -117,140 +140,105 @@ class WebSocketHandler:
             try:
                 # Receive message from client
                 data = await self.websocket.receive_text()
-                message_data = json.loads(data)
                 
-                # Route message based on type
-                await self._route_message(message_data)
+                # Check, validate and route message based on type
+                await inbound_dispatcher.dispatch(self, data)
                 
             except WebSocketDisconnect:
                 break
-            except json.JSONDecodeError:
-                await self._send_error("invalid_json", "Invalid JSON format")
             except Exception as e:
                 logger.error(f"Error handling message from user {self.user_id}: {e}")
                 await self._send_error("internal_error", "Internal server error")
 
-    async def _route_message(self, message_data: Dict[str, Any]):
-        """Route incoming message to appropriate handler"""
-        message_type = message_data.get("type")
-        
-        if message_type == "join_channel":
-            await self._handle_join_channel(message_data)
-        elif message_type == "leave_channel":
-            await self._handle_leave_channel(message_data)
-        elif message_type == "typing_indicator":
-            await self._handle_typing_indicator(message_data)
-        elif message_type == "ping":
-            await self._handle_ping()
-        elif message_type == "get_online_users":
-            await self._handle_get_online_users(message_data)
-        else:
-            await self._send_error("unknown_message_type", f"Unknown message type: {message_type}")
-
-    async def _handle_join_channel(self, message_data: Dict[str, Any]):
+    @inbound_dispatcher.route("join_channel", JoinChannelMessage, error_code="join_channel_error")
+    async def _handle_join_channel(self, message: JoinChannelMessage):
         """Handle join channel request"""
-        try:
-            join_message = JoinChannelMessage(**message_data)
-            channel_id = join_message.channel_id
-            
-            # Verify user has access to channel
-            member = await prisma.channelmember.find_unique(
-                where={
-                    "userId_channelId": {
-                        "userId": self.user_id,
-                        "channelId": channel_id
-                    }
+        channel_id = message.channel_id
+        
+        # Verify user has access to channel
+        member = await prisma.channelmember.find_unique(
+            where={
+                "userId_channelId": {
+                    "userId": self.user_id,
+                    "channelId": channel_id
                 }
-            )
-            
-            if not member:
-                # Check if channel exists
-                channel = await prisma.channel.find_unique(where={"id": channel_id})
-                if not channel:
-                    await self._send_error("access_denied", "Channel not found")
-                    return
-                
-                # Channel exists but user is not a member - this is an access denied case
-                await self._send_error("access_denied", "Access denied to channel")
+            }
+        )
+        
+        if not member:
+            # Check if channel exists
+            channel = await prisma.channel.find_unique(where={"id": channel_id})
+            if not channel:
+                await self._send_error("access_denied", "Channel not found")
                 return
             
-            # Join the channel room
-            await connection_manager.join_channel(self.user_id, channel_id, self.user.username)
-            
-            # Send confirmation
-            await connection_manager.send_to_user(self.user_id, {
-                "type": "channel_joined",
-                "channel_id": channel_id,
-                "timestamp": connection_manager.user_presence[self.user_id].isoformat()
-            })
-            
-        except Exception as e:
-            logger.error(f"Error joining channel: {e}")
-            await self._send_error("join_channel_error", str(e))
+            # Channel exists but user is not a member - this is an access denied case
+            await self._send_error("access_denied", "Access denied to channel")
+            return
+        
+        # Join the channel room
+        await connection_manager.join_channel(self.user_id, channel_id, self.user.username)
+        
+        # Send confirmation
+        await self._reply({
+            "type": "channel_joined",
+            "channel_id": channel_id,
+            "timestamp": datetime.utcnow().isoformat()
+        })
 
-    async def _handle_leave_channel(self, message_data: Dict[str, Any]):
+    @inbound_dispatcher.route("leave_channel", LeaveChannelMessage, error_code="leave_channel_error")
+    async def _handle_leave_channel(self, message: LeaveChannelMessage):
         """Handle leave channel request"""
-        try:
-            leave_message = LeaveChannelMessage(**message_data)
-            channel_id = leave_message.channel_id
-            
-            # Leave the channel room
-            await connection_manager.leave_channel(self.user_id, channel_id, self.user.username)
-            
-            # Send confirmation
-            await connection_manager.send_to_user(self.user_id, {
-                "type": "channel_left",
-                "channel_id": channel_id,
-                "timestamp": connection_manager.user_presence[self.user_id].isoformat()
-            })
-            
-        except Exception as e:
-            logger.error(f"Error leaving channel: {e}")
-            await self._send_error("leave_channel_error", str(e))
+        channel_id = message.channel_id
+        
+        # Leave the channel room
+        await connection_manager.leave_channel(self.user_id, channel_id, self.user.username)
+        
+        # Send confirmation
+        await self._reply({
+            "type": "channel_left",
+            "channel_id": channel_id,
+            "timestamp": datetime.utcnow().isoformat()
+        })
 
-    async def _handle_typing_indicator(self, message_data: Dict[str, Any]):
+    @inbound_dispatcher.route("typing_indicator", TypingIndicatorMessage, error_code="typing_indicator_error")
+    async def _handle_typing_indicator(self, message: TypingIndicatorMessage):
         """Handle typing indicator"""
-        try:
-            typing_message = TypingIndicatorMessage(**message_data)
-            
-            await connection_manager.handle_typing_indicator(
-                self.user_id,
-                self.user.username,
-                typing_message.channel_id,
-                typing_message.is_typing
-            )
-            
-        except Exception as e:
-            logger.error(f"Error handling typing indicator: {e}")
-            await self._send_error("typing_indicator_error", str(e))
+        await connection_manager.handle_typing_indicator(
+            self.user_id,
+            self.user.username,
+            message.channel_id,
+            message.is_typing
+        )
 
-    async def _handle_ping(self):
+    @inbound_dispatcher.route("ping", PingMessage, error_code="internal_error")
+    async def _handle_ping(self, message: PingMessage):
         """Handle ping message for connection health check"""
-        await connection_manager.send_to_user(self.user_id, {
+        await self._reply({
             "type": "pong",
-            "timestamp": connection_manager.user_presence[self.user_id].isoformat()
+            "timestamp": datetime.utcnow().isoformat()
         })
 
-    async def _handle_get_online_users(self, message_data: Dict[str, Any]):
+    @inbound_dispatcher.route(
+        "get_online_users", GetOnlineUsersMessage,
+        error_code="get_online_users_error",
+        invalid_error_code="missing_channel_id", invalid_message="Channel ID is required"
+    )
+    async def _handle_get_online_users(self, message: GetOnlineUsersMessage):
         """Handle request for online users in a channel"""
-        try:
-            channel_id = message_data.get("channel_id")
-            if not channel_id:
-                await self._send_error("missing_channel_id", "Channel ID is required")
-                return
-            
-            online_users = await connection_manager.get_channel_online_users(channel_id)
-            
-            await connection_manager.send_to_user(self.user_id, {
-                "type": "online_users",
-                "channel_id": channel_id,
-                "users": online_users,
-                "timestamp": connection_manager.user_presence[self.user_id].isoformat()
-            })
-            
-        except Exception as e:
-            logger.error(f"Error getting online users: {e}")
-            await self._send_error("get_online_users_error", str(e))
+        online_users = await connection_manager.get_channel_online_users(message.channel_id)
+        
+        await self._reply({
+            "type": "online_users",
+            "channel_id": message.channel_id,
+            "users": online_users,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    @inbound_dispatcher.route("resume", ResumeMessage, error_code="resume_error")
+    async def _handle_resume(self, message: ResumeMessage):
+        """Replay channel events missed while the client was disconnected"""
+        await connection_manager.resume_connection(self.connection.connection_id, message.channels)
 
     async def _send_error(self, error_code: str, message: str, details: str = None):
         """Send error message to user"""
@@ -259,21 +247,38 @@ class WebSocketHandler:
             message=message,
             details=details
         )
-        await connection_manager.send_to_user(self.user_id, error_msg.model_dump())
+        await self._reply(error_msg.model_dump())
+
+    async def _reply(self, message: Dict[str, Any]):
+        """Send a response to this session only"""
+        await connection_manager.send_to_connection(self.connection.connection_id, message)
 
 
 async def websocket_endpoint(websocket: WebSocket, token: str):
     """Main WebSocket endpoint"""
+    handshake = None
     try:
+        # Admit the handshake before doing any database work
+        handshake = admission_controller.begin_handshake()
+        
         # Authenticate user
         user = await get_user_from_token(token)
+        admission_controller.check_session_limit(connection_manager.session_count(user.id))
         
         # Handle connection
-        handler = WebSocketHandler(websocket, user)
+        handler = WebSocketHandler(websocket, user, handshake)
         await handler.handle_connection()
         
+    except AdmissionRejected as e:
+        logger.debug(f"WebSocket handshake rejected: {e.reason}")
+        # Accept first so the client receives the close code and retry hint
+        await websocket.accept(subprotocol=negotiate_codec(websocket).subprotocol)
+        await websocket.close(code=e.code, reason=e.reason)
     except HTTPException as e:
         await websocket.close(code=1008, reason=e.detail)
     except Exception as e:
         logger.error(f"WebSocket endpoint error: {e}")
-        await websocket.close(code=1011, reason="Internal server error") 
\ No newline at end of file
+        await websocket.close(code=1011, reason="Internal server error")
+    finally:
+        if handshake:
+            handshake.release()
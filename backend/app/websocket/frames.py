@@ -0,0 +1,84 @@
+from typing import Callable, Iterable, Optional, Tuple
+import json
+import time
+
+# Event types that can be dropped under backpressure (superseded by the next one)
+EPHEMERAL_EVENT_TYPES = {"typing_users", "user_status"}
+
+# Separates the routing header from the client payload on the bus
+ENVELOPE_SEPARATOR = b"\n"
+
+
+class EventFrame:
+    """Immutable event whose client payload is JSON-encoded exactly once
+
+    The same text is written to every local socket and the same bytes are
+    published to Redis, so a broadcast costs one json.dumps no matter how
+    many recipients or nodes it reaches.
+    """
+
+    __slots__ = ("type", "text", "payload", "ephemeral", "seq", "_encodings")
+
+    def __init__(self, event_type: Optional[str], text: str, payload: bytes, seq: Optional[int] = None):
+        object.__setattr__(self, "type", event_type)
+        object.__setattr__(self, "text", text)
+        object.__setattr__(self, "payload", payload)
+        object.__setattr__(self, "ephemeral", event_type in EPHEMERAL_EVENT_TYPES)
+        # Per-channel sequence number of replayable channel events
+        object.__setattr__(self, "seq", seq)
+        # Alternative wire encodings, built on first use
+        object.__setattr__(self, "_encodings", {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EventFrame is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("EventFrame is immutable")
+
+    def __repr__(self) -> str:
+        return f"EventFrame(type={self.type!r}, size={len(self.payload)})"
+
+    def encoding(self, name: str, encode: Callable[["EventFrame"], bytes]) -> bytes:
+        """Payload in another wire format, encoded once per frame and cached"""
+        encoded = self._encodings.get(name)
+        if encoded is None:
+            encoded = self._encodings[name] = encode(self)
+        return encoded
+
+    @classmethod
+    def from_message(cls, message: dict) -> "EventFrame":
+        """Encode a client message"""
+        text = json.dumps(message)
+        return cls(message.get("type"), text, text.encode(), message.get("seq"))
+
+    @classmethod
+    def from_payload(cls, event_type: Optional[str], payload: bytes, seq: Optional[int] = None) -> "EventFrame":
+        """Wrap a payload that was already encoded by another node"""
+        return cls(event_type, payload.decode(), payload, seq)
+
+
+def encode_envelope(origin: str, frame: EventFrame, exclude: Iterable[str] = (), target: Optional[str] = None) -> bytes:
+    """Prefix the frame payload with its routing header
+
+    Routing metadata never enters the client payload; receivers split the
+    header off and forward the payload bytes untouched.
+    """
+    # "ts" lets receivers measure bus delivery lag
+    header = {"origin": origin, "type": frame.type, "ts": time.time()}
+    if frame.seq is not None:
+        header["seq"] = frame.seq
+    exclude = list(exclude)
+    if exclude:
+        header["exclude"] = exclude
+    if target is not None:
+        # Recipient of an event sent to a node inbox
+        header["to"] = target
+    return json.dumps(header).encode() + ENVELOPE_SEPARATOR + frame.payload
+
+
+def decode_envelope(raw: bytes) -> Tuple[dict, EventFrame]:
+    """Split a bus message into its routing header and event frame"""
+    # json.dumps never emits a raw newline, so the first one ends the header
+    header_bytes, _, payload = raw.partition(ENVELOPE_SEPARATOR)
+    header = json.loads(header_bytes)
+    return header, EventFrame.from_payload(header.get("type"), payload, header.get("seq"))
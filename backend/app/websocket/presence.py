@@ -0,0 +1,212 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import time
+
+from ..core.config import settings
+from ..core.database import prisma
+from ..core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Internal bus event announcing a user's online/offline status to all of their channels
+PRESENCE_UPDATE_EVENT = "presence_update"
+
+# Sorted set of live nodes, scored by their last heartbeat
+NODES_KEY = "presence:nodes"
+
+# Per-node set of the users connected to that node
+NODE_USERS_KEY_PREFIX = "presence:node:"
+
+
+def node_users_key(node_id: str) -> str:
+    """Redis key holding the users connected to a node"""
+    return f"{NODE_USERS_KEY_PREFIX}{node_id}"
+
+
+class PresenceStore:
+    """Cluster-wide presence backed by Redis
+
+    Each node owns one set of the users connected to it. Connects and
+    disconnects are buffered and written in one pipeline per flush, and a
+    periodic heartbeat refreshes the node's set and its entry in the node
+    registry. A user is online if any live node lists them, so one node
+    closing its last session never hides sessions held by another node.
+    """
+
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+
+        # Users with at least one session on this node
+        self.local_users: Set[str] = set()
+
+        # Changes not yet written to Redis
+        self.pending_online: Set[str] = set()
+        self.pending_offline: Set[str] = set()
+
+        # Local read cache: channel_id -> (expires_at, online user ids)
+        self._channel_cache: Dict[str, Tuple[float, List[str]]] = {}
+        self._nodes_cache: Tuple[float, List[str]] = (0.0, [])
+
+        self.flush_task: Optional[asyncio.Task] = None
+        self._last_heartbeat = 0.0
+
+    @property
+    def node_ttl(self) -> float:
+        """Seconds after its last heartbeat that a node counts as dead"""
+        return settings.PRESENCE_HEARTBEAT_INTERVAL * 3
+
+    def mark_online(self, user_id: str):
+        """Record that a user opened their first session on this node"""
+        self.local_users.add(user_id)
+        self.pending_offline.discard(user_id)
+        self.pending_online.add(user_id)
+
+    def mark_offline(self, user_id: str):
+        """Record that a user closed their last session on this node"""
+        self.local_users.discard(user_id)
+        self.pending_online.discard(user_id)
+        self.pending_offline.add(user_id)
+
+    async def start(self):
+        """Start the batched flush loop"""
+        self.flush_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop flushing and withdraw this node from the registry"""
+        if self.flush_task:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+
+        try:
+            redis_client = await get_redis_client()
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.delete(node_users_key(self.node_id))
+            pipe.zrem(NODES_KEY, self.node_id)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error removing presence for node {self.node_id}: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.PRESENCE_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing presence: {e}")
+
+    async def flush(self):
+        """Write buffered presence changes, plus a heartbeat when one is due"""
+        now = time.time()
+        heartbeat = now - self._last_heartbeat >= settings.PRESENCE_HEARTBEAT_INTERVAL
+
+        online, self.pending_online = self.pending_online, set()
+        offline, self.pending_offline = self.pending_offline, set()
+        if not (online or offline or heartbeat):
+            return
+
+        key = node_users_key(self.node_id)
+        try:
+            redis_client = await get_redis_client()
+            pipe = redis_client.pipeline(transaction=False)
+            if offline:
+                pipe.srem(key, *offline)
+            if heartbeat:
+                # Full resync of our set also repairs any write lost earlier
+                if self.local_users:
+                    pipe.sadd(key, *self.local_users)
+                pipe.zadd(NODES_KEY, {self.node_id: now})
+                pipe.zremrangebyscore(NODES_KEY, "-inf", now - self.node_ttl)
+            elif online:
+                pipe.sadd(key, *online)
+            pipe.expire(key, int(self.node_ttl))
+            await pipe.execute()
+        except Exception:
+            # Keep changes that are still current for the next flush
+            self.pending_online.update(u for u in online if u in self.local_users)
+            self.pending_offline.update(u for u in offline if u not in self.local_users)
+            raise
+
+        if heartbeat:
+            self._last_heartbeat = now
+            self._prune_cache(now)
+
+    def _prune_cache(self, now: float):
+        """Drop expired channel cache entries"""
+        expired = [
+            channel_id
+            for channel_id, (expires_at, _) in self._channel_cache.items()
+            if expires_at <= now
+        ]
+        for channel_id in expired:
+            del self._channel_cache[channel_id]
+
+    async def _live_nodes(self) -> List[str]:
+        """Nodes that sent a heartbeat recently"""
+        now = time.time()
+        expires_at, nodes = self._nodes_cache
+        if expires_at > now:
+            return nodes
+
+        redis_client = await get_redis_client()
+        nodes = await redis_client.zrangebyscore(NODES_KEY, now - self.node_ttl, "+inf")
+        self._nodes_cache = (now + settings.PRESENCE_CACHE_TTL, nodes)
+        return nodes
+
+    async def filter_online(self, user_ids: Iterable[str]) -> Set[str]:
+        """Return the subset of user_ids that are online anywhere in the cluster"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+
+        # Our own users count even before the next flush reaches Redis
+        online = {user_id for user_id in user_ids if user_id in self.local_users}
+
+        nodes = [node for node in await self._live_nodes() if node != self.node_id]
+        if nodes:
+            redis_client = await get_redis_client()
+            pipe = redis_client.pipeline(transaction=False)
+            for node in nodes:
+                pipe.smismember(node_users_key(node), user_ids)
+            for flags in await pipe.execute():
+                online.update(user_id for user_id, flag in zip(user_ids, flags) if flag)
+
+        return online
+
+    async def get_channel_online_users(self, channel_id: str) -> List[str]:
+        """Online members of a channel, computed from membership and presence"""
+        now = time.time()
+        cached = self._channel_cache.get(channel_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        members = await prisma.channelmember.find_many(where={"channelId": channel_id})
+        member_ids = [member.userId for member in members]
+        online = await self.filter_online(member_ids)
+        online_users = [user_id for user_id in member_ids if user_id in online]
+
+        self._channel_cache[channel_id] = (now + settings.PRESENCE_CACHE_TTL, online_users)
+        return online_users
+
+    async def get_cluster_stats(self) -> dict:
+        """Online user counts per node and for the whole cluster"""
+        nodes = await self._live_nodes()
+        if not nodes:
+            return {"nodes": {}, "online_users": len(self.local_users)}
+
+        redis_client = await get_redis_client()
+        keys = [node_users_key(node) for node in nodes]
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.scard(key)
+        pipe.sunion(keys)
+        *counts, online_users = await pipe.execute()
+
+        return {
+            "nodes": dict(zip(nodes, counts)),
+            "online_users": len(online_users)
+        }
@@ -0,0 +1,258 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+from datetime import datetime
+import logging
+import os
+import uuid
+
+from .bus import create_bus, channel_topic, node_topic, GLOBAL_TOPIC
+from .connection_manager import connection_manager, ConnectionManager, ROOM_MEMBERSHIP_EVENT
+from .frames import EventFrame
+from .presence import PresenceStore
+from .replay import sequence_key
+from .routing import RoutingTable
+from ..core.config import SERVES_GATEWAY
+from ..core.redis import auto_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+class EventPublisher(ABC):
+    """Domain events raised by the REST API, delivered to WebSocket clients
+
+    REST handlers publish through this client instead of driving the
+    ConnectionManager themselves. Events are built here; subclasses decide
+    how they reach the sockets: BusEventPublisher for "api" processes, which
+    hold no sockets, and GatewayEventPublisher for "combined" ones.
+    """
+
+    async def message_created(self, channel_id: str, message_data: dict):
+        await self._broadcast_sequenced(channel_id, {
+            "type": "new_message",
+            "data": message_data,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    async def message_edited(self, channel_id: str, message_data: dict):
+        await self._broadcast_sequenced(channel_id, {
+            "type": "message_edited",
+            "data": message_data,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    async def message_deleted(self, channel_id: str, message_id: str, deleted_by: str, reason: Optional[str] = None):
+        message = {
+            "type": "message_deleted",
+            "message_id": message_id,
+            "deleted_by": deleted_by,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        if reason is not None:
+            message["reason"] = reason
+        await self._broadcast_sequenced(channel_id, message)
+
+    async def reaction_changed(self, channel_id: str, message_id: str, reaction_data: dict):
+        await self._broadcast_sequenced(channel_id, {
+            "type": "message_reaction",
+            "message_id": message_id,
+            "data": reaction_data,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    async def user_mentioned(self, user_id: str, mention_data: dict):
+        await self._send_to_user(user_id, {
+            "type": "mention_notification",
+            "data": mention_data,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    async def channel_created(self, channel_data: dict):
+        await self._broadcast_to_all({
+            "type": "channel_created",
+            "data": channel_data,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    @abstractmethod
+    async def member_joined(self, user_id: str, channel_id: str, username: str):
+        """Subscribe the user's sessions to the channel and tell its members"""
+
+    @abstractmethod
+    async def member_left(self, user_id: str, channel_id: str, username: str):
+        """Unsubscribe the user's sessions from the channel and tell its members"""
+
+    @abstractmethod
+    async def user_suspended(self, user_id: str):
+        """Close every session of the user, on whichever gateway holds it"""
+
+    @abstractmethod
+    async def get_connection_stats(self) -> dict:
+        """Connection statistics for the admin dashboard"""
+
+    async def close(self):
+        """Flush events still waiting to be published"""
+
+    @abstractmethod
+    async def _broadcast_sequenced(self, channel_id: str, message: dict):
+        """Deliver a sequence-numbered event to a channel's members"""
+
+    @abstractmethod
+    async def _send_to_user(self, user_id: str, message: dict):
+        """Deliver an event to every session of a user"""
+
+    @abstractmethod
+    async def _broadcast_to_all(self, message: dict):
+        """Deliver an event to every connected user"""
+
+
+class BusEventPublisher(EventPublisher):
+    """Publish-only client for processes that serve the API but no sockets
+
+    Each event is encoded once and published straight to the bus; the
+    gateways that own the sockets record, sequence-check and deliver it.
+    Nothing is kept per channel or per user here.
+    """
+
+    def __init__(self):
+        self.assign_node_id()
+
+    def assign_node_id(self):
+        """Give this publisher a fresh node id, with the bus and lookups bound to it"""
+        self.node_id = uuid.uuid4().hex
+        self.bus = create_bus(self.node_id)
+        self.routes = RoutingTable(self.node_id)
+        self.presence = PresenceStore(self.node_id)
+
+    async def member_joined(self, user_id: str, channel_id: str, username: str):
+        await self._update_rooms(user_id, channel_id, "join")
+        await self._broadcast(channel_id, {
+            "type": "user_joined",
+            "user_id": user_id,
+            "username": username,
+            "channel_id": channel_id,
+            "timestamp": datetime.utcnow().isoformat()
+        }, exclude_user=user_id)
+
+    async def member_left(self, user_id: str, channel_id: str, username: str):
+        await self._update_rooms(user_id, channel_id, "leave")
+        await self._broadcast(channel_id, {
+            "type": "user_left",
+            "user_id": user_id,
+            "username": username,
+            "channel_id": channel_id,
+            "timestamp": datetime.utcnow().isoformat()
+        }, exclude_user=user_id)
+
+    async def user_suspended(self, user_id: str):
+        """Close every session of the user, on whichever gateway holds it"""
+        await self._send_to_user(user_id, {
+            "type": "force_disconnect",
+            "reason": "Account suspended or banned",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    async def get_connection_stats(self) -> dict:
+        """Cluster-wide presence; this process holds no sockets of its own"""
+        try:
+            cluster = await self.presence.get_cluster_stats()
+        except Exception as e:
+            logger.error(f"Error reading cluster presence stats: {e}")
+            cluster = {"nodes": {}, "online_users": None}
+
+        return {
+            "node_id": self.node_id,
+            "online_users": cluster["online_users"],
+            "online_users_by_node": cluster["nodes"],
+            "total_connections": 0,
+            "total_users": 0,
+            "total_channels": 0,
+            "users_by_channel": {}
+        }
+
+    async def close(self):
+        """Flush events still waiting to be published
+
+        Only flushes: this process never started the bus, so it has no
+        listener or consumer groups to tear down.
+        """
+        await self.bus.flush()
+
+    async def _update_rooms(self, user_id: str, channel_id: str, action: str):
+        """Apply a membership change on the gateways hosting the user"""
+        await self._send_to_user(user_id, {
+            "type": ROOM_MEMBERSHIP_EVENT,
+            "channel_id": channel_id,
+            "action": action
+        })
+
+    async def _broadcast(self, channel_id: str, message: dict, exclude_user: Optional[str] = None):
+        exclude = (exclude_user,) if exclude_user else ()
+        await self.bus.publish(channel_topic(channel_id), EventFrame.from_message(message), exclude)
+
+    async def _broadcast_sequenced(self, channel_id: str, message: dict):
+        try:
+            # Counters bumped in the same tick share one round trip
+            seq = await auto_pipeline.execute("incr", sequence_key(channel_id))
+            message = {**message, "channel_id": channel_id, "seq": seq}
+        except Exception as e:
+            # The event still goes out, just without a sequence number
+            logger.error(f"Error issuing sequence number for channel {channel_id}: {e}")
+        await self._broadcast(channel_id, message)
+
+    async def _send_to_user(self, user_id: str, message: dict):
+        try:
+            nodes = await self.routes.lookup(user_id)
+        except Exception as e:
+            logger.error(f"Error looking up route for user {user_id}: {e}")
+            return
+
+        frame = EventFrame.from_message(message)
+        for node_id in nodes:
+            await self.bus.publish(node_topic(node_id), frame, target=user_id)
+
+    async def _broadcast_to_all(self, message: dict):
+        await self.bus.publish(GLOBAL_TOPIC, EventFrame.from_message(message))
+
+
+class GatewayEventPublisher(EventPublisher):
+    """Publisher for processes that also own sockets
+
+    Events go through the local ConnectionManager, which delivers to this
+    process's sockets and publishes to the other gateways.
+    """
+
+    def __init__(self, manager: ConnectionManager):
+        self.manager = manager
+
+    async def member_joined(self, user_id: str, channel_id: str, username: str):
+        await self.manager.join_channel(user_id, channel_id, username)
+
+    async def member_left(self, user_id: str, channel_id: str, username: str):
+        await self.manager.leave_channel(user_id, channel_id, username)
+
+    async def user_suspended(self, user_id: str):
+        """Close every session of the user, on whichever gateway holds it"""
+        await self.manager.disconnect_user(user_id)
+
+    async def get_connection_stats(self) -> dict:
+        """Cluster presence, plus this process's socket counts"""
+        return await self.manager.get_connection_stats()
+
+    async def _broadcast_sequenced(self, channel_id: str, message: dict):
+        await self.manager.broadcast_sequenced(channel_id, message)
+
+    async def _send_to_user(self, user_id: str, message: dict):
+        await self.manager.send_to_user(user_id, message)
+
+    async def _broadcast_to_all(self, message: dict):
+        await self.manager.broadcast_to_all(message)
+
+
+# Global event publisher instance
+if SERVES_GATEWAY:
+    event_publisher = GatewayEventPublisher(connection_manager)
+else:
+    event_publisher = BusEventPublisher()
+
+    # Workers forked from a preloaded parent must not share its node id
+    os.register_at_fork(after_in_child=event_publisher.assign_node_id)
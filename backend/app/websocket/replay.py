@@ -0,0 +1,105 @@
+from typing import Deque, Dict, List, Optional, Tuple
+from collections import deque
+import logging
+import time
+
+from .frames import EventFrame
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis counter holding the last sequence number issued for a channel
+SEQUENCE_KEY_PREFIX = "websocket:seq:"
+
+# Sent instead of a replay when a client's gap can no longer be filled
+RESYNC_REQUIRED_EVENT = "resync_required"
+
+
+def sequence_key(channel_id: str) -> str:
+    """Redis key of a channel's sequence counter"""
+    return f"{SEQUENCE_KEY_PREFIX}{channel_id}"
+
+
+class ReplayBuffer:
+    """Bounded log of recent sequenced events per channel
+
+    Every node records the sequenced events it delivers, so a reconnecting
+    client can be sent exactly the events it missed. Entries are the shared
+    frames themselves, kept sorted by sequence number and dropped once the
+    per-channel limit or the maximum age is exceeded.
+    """
+
+    def __init__(self, size: int = None, max_age: float = None):
+        self.size = size or settings.WS_REPLAY_BUFFER_SIZE
+        self.max_age = max_age or settings.WS_REPLAY_MAX_AGE
+
+        # channel_id -> deque of (seq, recorded at, frame)
+        self.channels: Dict[str, Deque[Tuple[int, float, EventFrame]]] = {}
+
+    def record(self, channel_id: str, frame: EventFrame):
+        """Add a sequenced event to its channel's log"""
+        entries = self.channels.get(channel_id)
+        if entries is None:
+            entries = self.channels[channel_id] = deque(maxlen=self.size)
+
+        now = time.monotonic()
+        while entries and entries[0][1] < now - self.max_age:
+            entries.popleft()
+
+        entry = (frame.seq, now, frame)
+        if not entries or frame.seq > entries[-1][0]:
+            entries.append(entry)
+            return
+
+        # Events from different nodes can arrive out of order; keep the log sorted
+        index = len(entries)
+        while index > 0 and entries[index - 1][0] > frame.seq:
+            index -= 1
+        if index > 0 and entries[index - 1][0] == frame.seq:
+            return
+        if index == 0 and len(entries) == self.size:
+            # Older than everything in a full log
+            return
+        if len(entries) == self.size:
+            entries.popleft()
+            index -= 1
+        entries.insert(index, entry)
+
+    def replay(self, channel_id: str, last_seq: int, head_seq: int) -> Optional[List[EventFrame]]:
+        """Events after last_seq, or None if the log no longer covers the gap
+
+        The log covers the gap when it holds every sequence number from
+        last_seq + 1 through head_seq, the latest one issued for the channel.
+        """
+        if head_seq <= last_seq:
+            return []
+
+        cutoff = time.monotonic() - self.max_age
+        frames = []
+        expected = last_seq + 1
+        for seq, recorded_at, frame in self.channels.get(channel_id, ()):
+            if seq < expected:
+                continue
+            if seq != expected or recorded_at < cutoff:
+                break
+            frames.append(frame)
+            expected += 1
+
+        if expected <= head_seq:
+            return None
+        return frames
+
+    def latest(self, channel_id: str) -> Optional[int]:
+        """Newest sequence number in a channel's log"""
+        entries = self.channels.get(channel_id)
+        return entries[-1][0] if entries else None
+
+    def prune(self):
+        """Drop expired events and empty channel logs"""
+        cutoff = time.monotonic() - self.max_age
+        for channel_id in list(self.channels):
+            entries = self.channels[channel_id]
+            while entries and entries[0][1] < cutoff:
+                entries.popleft()
+            if not entries:
+                del self.channels[channel_id]
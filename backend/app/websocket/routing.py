@@ -0,0 +1,100 @@
+from typing import Callable, Iterable, List, Optional
+import asyncio
+import logging
+import time
+
+from ..core.config import settings
+from ..core.redis import get_redis_raw_client, auto_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Per-user sorted set of the nodes hosting the user's sessions, scored by lease expiry
+ROUTE_KEY_PREFIX = "websocket:route:"
+
+# Lease entries renewed per pipeline
+RENEW_BATCH_SIZE = 500
+
+
+def route_key(user_id: str) -> str:
+    """Redis key holding the nodes a user is connected to"""
+    return f"{ROUTE_KEY_PREFIX}{user_id}"
+
+
+class RoutingTable:
+    """Cluster-wide map of user_id to the nodes hosting that user's sessions
+
+    A node adds its entry when a user opens their first session there and
+    removes it when the last one closes. Entries are leases that the node
+    renews every third of ROUTE_LEASE_TTL, so the routes of a node that
+    died without cleaning up expire on their own.
+    """
+
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+        self.renew_task: Optional[asyncio.Task] = None
+
+    @property
+    def lease_ttl(self) -> float:
+        return settings.ROUTE_LEASE_TTL
+
+    async def add(self, user_id: str):
+        """Lease a route from the user to this node"""
+        key = route_key(user_id)
+        await asyncio.gather(
+            auto_pipeline.execute("zadd", key, {self.node_id: time.time() + self.lease_ttl}),
+            auto_pipeline.execute("expire", key, int(self.lease_ttl))
+        )
+
+    async def remove(self, user_id: str):
+        """Drop the route from the user to this node"""
+        await auto_pipeline.execute("zrem", route_key(user_id), self.node_id)
+
+    async def lookup(self, user_id: str) -> List[str]:
+        """Nodes currently holding a lease for the user"""
+        nodes = await auto_pipeline.execute("zrangebyscore", route_key(user_id), time.time(), "+inf")
+        return [node.decode() for node in nodes]
+
+    async def start(self, local_users: Callable[[], Iterable[str]]):
+        """Start renewing the leases of the users local_users() returns"""
+        self.renew_task = asyncio.create_task(self._run(local_users))
+
+    async def stop(self, user_ids: Iterable[str] = ()):
+        """Stop renewing and drop the given users' routes to this node"""
+        if self.renew_task:
+            self.renew_task.cancel()
+            try:
+                await self.renew_task
+            except asyncio.CancelledError:
+                pass
+            self.renew_task = None
+
+        try:
+            redis_client = await get_redis_raw_client()
+            pipe = redis_client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.zrem(route_key(user_id), self.node_id)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error removing routes for node {self.node_id}: {e}")
+
+    async def _run(self, local_users: Callable[[], Iterable[str]]):
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await self.renew(list(local_users()))
+            except Exception as e:
+                logger.error(f"Error renewing routes: {e}")
+
+    async def renew(self, user_ids: List[str]):
+        """Extend this node's leases for the given users"""
+        now = time.time()
+        redis_client = await get_redis_raw_client()
+        for start in range(0, len(user_ids), RENEW_BATCH_SIZE):
+            pipe = redis_client.pipeline(transaction=False)
+            for user_id in user_ids[start:start + RENEW_BATCH_SIZE]:
+                key = route_key(user_id)
+                pipe.zadd(key, {self.node_id: now + self.lease_ttl})
+                # Leases of nodes that died would otherwise live as long as the key
+                pipe.zremrangebyscore(key, "-inf", now)
+                pipe.expire(key, int(self.lease_ttl))
+            await pipe.execute()
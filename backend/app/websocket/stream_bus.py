@@ -0,0 +1,240 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import time
+import zlib
+
+from redis.exceptions import ResponseError
+
+from .bus import BusHandler, RESUBSCRIBE_DELAY, dispatch_envelope
+from .frames import EventFrame, encode_envelope
+from .presence import NODES_KEY
+from ..core.config import settings
+from ..core.metrics import BUS_PUBLISH_DURATION
+from ..core.redis import get_redis_raw_client
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY_PREFIX = "websocket:stream:"
+
+# Field names inside a stream entry
+TOPIC_FIELD = b"t"
+ENVELOPE_FIELD = b"e"
+
+# Groups of nodes that are gone are dropped once their consumers idle this long
+STALE_GROUP_IDLE_MS = 3600 * 1000
+
+
+def stream_key(shard: int) -> str:
+    """Redis stream holding one shard of the bus"""
+    return f"{STREAM_KEY_PREFIX}{shard}"
+
+
+def shard_for(topic: str) -> int:
+    """Shard of a topic; stable across processes so per-topic order is kept"""
+    return zlib.crc32(topic.encode()) % settings.WS_BUS_STREAM_SHARDS
+
+
+class RedisStreamsBus:
+    """Cross-instance event bus on top of Redis Streams
+
+    Topics are hashed onto a fixed set of stream shards. Every node reads all
+    shards through its own consumer group, so each node sees every event,
+    and events wait in the stream instead of being dropped when a node falls
+    behind. Publishes made in the same event-loop tick go out in one
+    pipeline, reads fetch up to WS_BUS_STREAM_BATCH entries per shard in one
+    XREADGROUP, and each batch is acknowledged with one XACK per shard.
+    Streams are trimmed to roughly WS_BUS_STREAM_MAXLEN entries.
+    """
+
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+        self.group = node_id
+        self.streams = [stream_key(shard) for shard in range(settings.WS_BUS_STREAM_SHARDS)]
+        self.listener_task: Optional[asyncio.Task] = None
+        self.publisher_task: Optional[asyncio.Task] = None
+
+        # Events waiting for the publisher: (stream, topic, envelope)
+        self.outbox: List[Tuple[str, str, bytes]] = []
+        self._outbox_ready = asyncio.Event()
+        self.in_flight: Optional[asyncio.Future] = None
+
+    async def start(self, handler: BusHandler):
+        """Create this node's consumer groups and start reading"""
+        await self._reap_stale_groups()
+        await self._create_groups()
+        self.listener_task = asyncio.create_task(self._listen(handler))
+        self._ensure_publisher()
+
+    async def stop(self):
+        """Stop reading, flush pending publishes and drop this node's groups"""
+        if self.listener_task:
+            self.listener_task.cancel()
+            try:
+                await self.listener_task
+            except asyncio.CancelledError:
+                pass
+            self.listener_task = None
+
+        await self.flush()
+        try:
+            redis_client = await get_redis_raw_client()
+            pipe = redis_client.pipeline(transaction=False)
+            for stream in self.streams:
+                pipe.xgroup_destroy(stream, self.group)
+            await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            logger.error(f"Error shutting down stream bus: {e}")
+
+    async def flush(self):
+        """Stop the publisher and write every queued event; consumer groups are left alone"""
+        if self.publisher_task:
+            self.publisher_task.cancel()
+            try:
+                await self.publisher_task
+            except asyncio.CancelledError:
+                pass
+            self.publisher_task = None
+
+        # A batch the publisher was sending when cancelled goes out first;
+        # if it fails, the publisher task is no longer there to log it
+        if self.in_flight and not self.in_flight.done():
+            for result in await asyncio.gather(self.in_flight, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error(f"Error publishing to Redis stream: {result}")
+        self.in_flight = None
+
+        try:
+            await self._write_outbox()
+        except Exception as e:
+            logger.error(f"Error flushing stream bus publishes: {e}")
+
+    async def publish(self, topic: str, frame: EventFrame, exclude: Iterable[str] = (), target: Optional[str] = None):
+        """Queue an event for every other node; sent with the rest of this tick's events"""
+        stream = self.streams[shard_for(topic)]
+        self.outbox.append((stream, topic, encode_envelope(self.node_id, frame, exclude, target)))
+        self._outbox_ready.set()
+        self._ensure_publisher()
+
+    def _ensure_publisher(self):
+        if self.publisher_task is None or self.publisher_task.done():
+            self.publisher_task = asyncio.create_task(self._run_publisher())
+
+    async def _run_publisher(self):
+        """Single writer, so batches reach Redis in publish order"""
+        while True:
+            await self._outbox_ready.wait()
+            self._outbox_ready.clear()
+            try:
+                await self._write_outbox()
+            except Exception as e:
+                logger.error(f"Error publishing to Redis stream: {e}")
+
+    async def _write_outbox(self):
+        """Append all queued events in one pipeline"""
+        batch, self.outbox = self.outbox, []
+        if not batch:
+            return
+
+        redis_client = await get_redis_raw_client()
+        pipe = redis_client.pipeline(transaction=False)
+        for stream, topic, envelope in batch:
+            pipe.xadd(
+                stream,
+                {TOPIC_FIELD: topic, ENVELOPE_FIELD: envelope},
+                maxlen=settings.WS_BUS_STREAM_MAXLEN,
+                approximate=True
+            )
+        started = time.perf_counter()
+        # Shielded, so cancelling the publisher never drops a batch half sent
+        self.in_flight = asyncio.ensure_future(pipe.execute())
+        await asyncio.shield(self.in_flight)
+        self.in_flight = None
+        BUS_PUBLISH_DURATION.labels("streams").observe(time.perf_counter() - started)
+
+    async def _create_groups(self):
+        """Create one group per shard for this node, starting at the stream tail"""
+        redis_client = await get_redis_raw_client()
+        for stream in self.streams:
+            try:
+                await redis_client.xgroup_create(stream, self.group, id="$", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def _reap_stale_groups(self):
+        """Drop groups left behind by nodes that died without shutting down"""
+        try:
+            redis_client = await get_redis_raw_client()
+            now = time.time()
+            live_nodes = {
+                node.decode() for node in await redis_client.zrangebyscore(
+                    NODES_KEY, now - settings.PRESENCE_HEARTBEAT_INTERVAL * 3, "+inf"
+                )
+            }
+            for stream in self.streams:
+                if not await redis_client.exists(stream):
+                    continue
+                for group in await redis_client.xinfo_groups(stream):
+                    name = group["name"].decode()
+                    if name in live_nodes:
+                        continue
+                    consumers = await redis_client.xinfo_consumers(stream, name)
+                    # A group without consumers may belong to a node that has
+                    # not read yet, and is not in presence until it has started
+                    if not consumers:
+                        continue
+                    if all(consumer["idle"] > STALE_GROUP_IDLE_MS for consumer in consumers):
+                        await redis_client.xgroup_destroy(stream, name)
+                        logger.info(f"Removed stale stream bus group {name} from {stream}")
+        except Exception as e:
+            logger.error(f"Error removing stale stream bus groups: {e}")
+
+    async def _listen(self, handler: BusHandler):
+        """Read batches from every shard and feed remote events to the handler"""
+        while True:
+            try:
+                await self._create_groups()
+
+                # Redeliver anything read but not acknowledged before a failure
+                while await self._read_batch(handler, "0", block=None):
+                    pass
+
+                while True:
+                    await self._read_batch(handler, ">", block=settings.WS_BUS_STREAM_BLOCK_MS)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis stream listener error: {e}")
+
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    async def _read_batch(self, handler: BusHandler, start_id: str, block: Optional[int]) -> int:
+        """Read, handle and acknowledge one batch; returns the number of entries"""
+        redis_client = await get_redis_raw_client()
+        response = await redis_client.xreadgroup(
+            self.group,
+            self.node_id,
+            {stream: start_id for stream in self.streams},
+            count=settings.WS_BUS_STREAM_BATCH,
+            block=block
+        )
+
+        acks: Dict[bytes, List[bytes]] = {}
+        for stream, entries in response or ():
+            for entry_id, fields in entries:
+                # Pending entries trimmed away come back without fields
+                if fields:
+                    await dispatch_envelope(
+                        self.node_id, fields[TOPIC_FIELD], fields[ENVELOPE_FIELD], handler
+                    )
+                acks.setdefault(stream, []).append(entry_id)
+
+        if acks:
+            pipe = redis_client.pipeline(transaction=False)
+            for stream, entry_ids in acks.items():
+                pipe.xack(stream, self.group, *entry_ids)
+            await pipe.execute()
+
+        return sum(len(entry_ids) for entry_ids in acks.values())
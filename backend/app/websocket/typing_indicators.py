@@ -0,0 +1,171 @@
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import math
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Internal bus event carrying one node's coalesced typing changes for a channel
+TYPING_UPDATE_EVENT = "typing_update"
+
+SnapshotCallback = Callable[[str, List[dict]], Awaitable[None]]
+UpdatesCallback = Callable[[str, List[dict]], Awaitable[None]]
+
+
+class TimerWheel:
+    """Hashed timer wheel with one slot per tick
+
+    Scheduling is O(1) and each tick only looks at the keys due in that
+    slot. Deadlines must be less than one full revolution away.
+    """
+
+    def __init__(self, slots: int):
+        self.slots: List[Set[Hashable]] = [set() for _ in range(slots)]
+        self.tick = 0
+
+    def schedule(self, key: Hashable, deadline: int):
+        """Schedule key to come due at the given tick"""
+        self.slots[deadline % len(self.slots)].add(key)
+
+    def advance(self) -> Set[Hashable]:
+        """Move to the next tick and return the keys scheduled for it"""
+        self.tick += 1
+        index = self.tick % len(self.slots)
+        due = self.slots[index]
+        self.slots[index] = set()
+        return due
+
+
+class TypingAggregator:
+    """Per-channel typing state, coalesced into one snapshot per tick
+
+    Start/stop events only update state. Every tick the aggregator expires
+    stale typers through the timer wheel, publishes this node's changes to
+    the other nodes in one update per channel, and emits at most one
+    typing_users snapshot per changed channel.
+    """
+
+    def __init__(
+        self,
+        on_snapshot: SnapshotCallback,
+        on_local_updates: UpdatesCallback,
+        tick_interval: float = None,
+        ttl: float = None
+    ):
+        self.tick_interval = tick_interval or settings.TYPING_TICK_INTERVAL
+        self.ttl_ticks = max(1, math.ceil((ttl or settings.TYPING_TTL) / self.tick_interval))
+        self.wheel = TimerWheel(self.ttl_ticks + 1)
+
+        # channel_id -> user_id -> (username, expiry tick)
+        self.typers: Dict[str, Dict[str, Tuple[str, int]]] = {}
+
+        # Channels whose snapshot changed since the last tick
+        self.dirty: Set[str] = set()
+
+        # Changes made by local clients since the last tick: channel_id -> user_id -> update
+        self.local_updates: Dict[str, Dict[str, dict]] = {}
+
+        self._on_snapshot = on_snapshot
+        self._on_local_updates = on_local_updates
+        self.tick_task: Optional[asyncio.Task] = None
+
+    def update(self, channel_id: str, user_id: str, username: str, is_typing: bool, local: bool = True):
+        """Record a typing start/stop event"""
+        if is_typing:
+            self._set_typing(channel_id, user_id, username)
+        else:
+            self._clear_typing(channel_id, user_id)
+
+        if local:
+            self.local_updates.setdefault(channel_id, {})[user_id] = {
+                "user_id": user_id,
+                "username": username,
+                "is_typing": is_typing
+            }
+
+    def apply_remote(self, channel_id: str, updates: List[dict]):
+        """Apply typing changes published by another node"""
+        for update in updates:
+            self.update(
+                channel_id,
+                update["user_id"],
+                update.get("username"),
+                update.get("is_typing", False),
+                local=False
+            )
+
+    def remove_user(self, channel_id: str, user_id: str, username: str = None):
+        """Stop a user's typing state, e.g. when they leave or disconnect"""
+        if user_id in self.typers.get(channel_id, {}):
+            self.update(channel_id, user_id, username, False)
+
+    def get_typing_users(self, channel_id: str) -> List[dict]:
+        """Current typers of a channel"""
+        return [
+            {"user_id": user_id, "username": username}
+            for user_id, (username, _) in self.typers.get(channel_id, {}).items()
+        ]
+
+    def _set_typing(self, channel_id: str, user_id: str, username: str):
+        channel_typers = self.typers.setdefault(channel_id, {})
+        if user_id not in channel_typers:
+            self.dirty.add(channel_id)
+
+        deadline = self.wheel.tick + self.ttl_ticks
+        channel_typers[user_id] = (username, deadline)
+        self.wheel.schedule((channel_id, user_id), deadline)
+
+    def _clear_typing(self, channel_id: str, user_id: str):
+        channel_typers = self.typers.get(channel_id)
+        if channel_typers is None or user_id not in channel_typers:
+            return
+
+        del channel_typers[user_id]
+        if not channel_typers:
+            del self.typers[channel_id]
+        self.dirty.add(channel_id)
+
+    def _expire_due(self):
+        """Drop typers whose deadline is this tick"""
+        for channel_id, user_id in self.wheel.advance():
+            entry = self.typers.get(channel_id, {}).get(user_id)
+            # Refreshed entries were rescheduled into a later slot
+            if entry and entry[1] <= self.wheel.tick:
+                self._clear_typing(channel_id, user_id)
+
+    async def flush(self):
+        """Run one tick: expire, publish local changes, emit snapshots"""
+        self._expire_due()
+
+        local_updates, self.local_updates = self.local_updates, {}
+        dirty, self.dirty = self.dirty, set()
+
+        for channel_id, updates in local_updates.items():
+            await self._on_local_updates(channel_id, list(updates.values()))
+
+        for channel_id in dirty:
+            await self._on_snapshot(channel_id, self.get_typing_users(channel_id))
+
+    async def start(self):
+        """Start the tick loop"""
+        self.tick_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the tick loop"""
+        if self.tick_task:
+            self.tick_task.cancel()
+            try:
+                await self.tick_task
+            except asyncio.CancelledError:
+                pass
+            self.tick_task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing typing indicators: {e}")
@@ -0,0 +1,26 @@
+-- CreateIndex
+CREATE INDEX "admin_actions_createdAt_idx" ON "admin_actions"("createdAt");
+
+-- CreateIndex
+CREATE INDEX "admin_actions_adminId_createdAt_idx" ON "admin_actions"("adminId", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "admin_actions_action_createdAt_idx" ON "admin_actions"("action", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "messages_channelId_createdAt_id_idx" ON "messages"("channelId", "createdAt", "id");
+
+-- CreateIndex
+CREATE INDEX "messages_createdAt_idx" ON "messages"("createdAt");
+
+-- CreateIndex
+CREATE INDEX "channel_members_channelId_idx" ON "channel_members"("channelId");
+
+-- CreateIndex
+CREATE INDEX "mentions_messageId_idx" ON "mentions"("messageId");
+
+-- CreateIndex
+CREATE INDEX "mentions_userId_createdAt_idx" ON "mentions"("userId", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "message_reactions_messageId_idx" ON "message_reactions"("messageId");
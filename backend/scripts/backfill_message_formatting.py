@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Script to fill in the stored formatting of messages written before the
+formatting column existed.
+
+Messages are walked in id order, in batches, and only those without stored
+formatting are updated, so the script can be stopped and re-run at any
+time. Reads fall back to parsing the content until a row is filled in.
+
+With --recompute every message is parsed again and rows whose stored
+formatting differs from the current parser are rewritten. Run it after a
+change to MessageFormatter so older rows match newly written ones.
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import prisma
+from app.generated import Json
+from app.models.message import MessageFormatter
+
+
+async def backfill_message_formatting(batch_size: int, recompute: bool = False):
+    """Store parsed formatting on every message that has none, or that differs when recomputing."""
+    try:
+        await prisma.connect()
+        print("Connected to database")
+
+        scanned = 0
+        updated = 0
+        last_id = None
+
+        while True:
+            messages = await prisma.message.find_many(
+                where={"id": {"gt": last_id}} if last_id else None,
+                order={"id": "asc"},
+                take=batch_size
+            )
+            if not messages:
+                break
+
+            pending = []
+            for msg in messages:
+                if msg.formatting is not None and not recompute:
+                    continue
+                formatting = MessageFormatter.parse_formatting(msg.content).model_dump()
+                if formatting != msg.formatting:
+                    pending.append((msg, formatting))
+                    
+            if pending:
+                async with prisma.batch_() as batcher:
+                    for msg, formatting in pending:
+                        batcher.message.update(
+                            where={"id": msg.id},
+                            # Keep updatedAt: filling in derived data is not an edit
+                            data={
+                                "formatting": Json(formatting),
+                                "updatedAt": msg.updatedAt
+                            }
+                        )
+
+            scanned += len(messages)
+            updated += len(pending)
+            last_id = messages[-1].id
+            print(f"Scanned {scanned} messages, updated {updated}")
+
+        print(f"\nSummary:")
+        print(f"- Scanned {scanned} messages")
+        print(f"- Stored formatting for {updated} messages")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        await prisma.disconnect()
+        print("\nDisconnected from database")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill stored message formatting")
+    parser.add_argument("--batch-size", type=int, default=500, help="Messages read and updated per batch")
+    parser.add_argument(
+        "--recompute", action="store_true",
+        help="Parse every message again and rewrite formatting that differs from the current parser"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(backfill_message_formatting(args.batch_size, args.recompute))
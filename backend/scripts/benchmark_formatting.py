@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass MessageFormatter tokenizer against the regex
+battery it replaced
+
+Each message goes through what create_message and edit_message need:
+validation, sanitizing, formatting metadata and mentions. The regex version
+runs ten passes over the content for that; the tokenizer runs one. Results
+are compared only on messages the regex version handled correctly.
+
+Messages are generated to look like real chat: prose with bold, italic,
+inline code, code blocks, links, mentions, emoji and blank lines, about
+2000 characters each (the message size limit).
+
+Usage: python scripts/benchmark_formatting.py [--messages 500] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import sys
+import os
+import timeit
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.message import MessageFormatter, MessageFormatting
+
+MESSAGE_LENGTH = 2000
+
+WORDS = (
+    "the deploy failed again after we bumped the worker count so I rolled it back "
+    "can you check whether the migration ran before the new index was created "
+    "looks fine on staging but production still shows the old plan for history reads"
+).split()
+
+
+class RegexFormatter:
+    """The regex-based MessageFormatter, kept here as the benchmark baseline"""
+
+    BOLD_PATTERN = re.compile(r'\*\*([^*]+)\*\*')
+    ITALIC_PATTERN = re.compile(r'\*([^*]+)\*')
+    CODE_PATTERN = re.compile(r'`([^`]+)`')
+    CODE_BLOCK_PATTERN = re.compile(r'```([^`]+)```')
+    LINK_PATTERN = re.compile(r'https?://[^\s]+')
+    MENTION_PATTERN = re.compile(r'@(\w+)')
+    EMOJI_PATTERN = re.compile(r':(\w+):')
+
+    @classmethod
+    def parse_formatting(cls, content: str) -> MessageFormatting:
+        link_matches = cls.LINK_PATTERN.findall(content)
+        mention_matches = cls.MENTION_PATTERN.findall(content)
+        emoji_matches = cls.EMOJI_PATTERN.findall(content)
+        return MessageFormatting(
+            has_bold=len(cls.BOLD_PATTERN.findall(content)) > 0,
+            has_italic=len(cls.ITALIC_PATTERN.findall(content)) > 0,
+            has_code=len(cls.CODE_PATTERN.findall(content)) > 0,
+            has_code_block=len(cls.CODE_BLOCK_PATTERN.findall(content)) > 0,
+            has_links=len(link_matches) > 0,
+            has_mentions=len(mention_matches) > 0,
+            has_emojis=len(emoji_matches) > 0,
+            link_count=len(link_matches),
+            mention_count=len(mention_matches),
+            emoji_count=len(emoji_matches)
+        )
+
+    @classmethod
+    def sanitize_content(cls, content: str) -> str:
+        content = content.strip()
+        content = re.sub(r'\n{3,}', '\n\n', content)
+        return re.sub(r' {3,}', '  ', content)
+
+    @classmethod
+    def validate_formatting(cls, content: str) -> bool:
+        if content.count('**') % 2 != 0:
+            return False
+        if content.count('```') % 2 != 0:
+            return False
+        return cls.CODE_BLOCK_PATTERN.sub('', content).count('`') % 2 == 0
+
+
+def regex_formatter_applies(content: str) -> bool:
+    """Whether the regex formatter got this message right
+
+    It took markers and mentions inside code for formatting, counted bold as
+    italic, took email domains for mentions and matched links, mentions and
+    emoji inside each other. Messages without any of that must give the same
+    results from both formatters.
+    """
+    if "`" in content or "**" in content or re.search(r"\w@", content):
+        return False
+    links = list(RegexFormatter.LINK_PATTERN.finditer(content))
+    if any("*" in link.group() for link in links):
+        return False
+    spans = sorted(
+        match.span()
+        for matches in (links, RegexFormatter.MENTION_PATTERN.finditer(content), RegexFormatter.EMOJI_PATTERN.finditer(content))
+        for match in matches
+    )
+    return all(end <= start for (_, end), (start, _) in zip(spans, spans[1:]))
+
+
+def random_fragment(rng: random.Random) -> str:
+    """A few words of prose, possibly formatted"""
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+    kind = rng.random()
+    if kind < 0.08:
+        return f"**{words}**"
+    if kind < 0.14:
+        return f"*{words}*"
+    if kind < 0.22:
+        return f"`{rng.choice(WORDS)}.{rng.choice(WORDS)}()`"
+    if kind < 0.25:
+        return f"\n```\nfor item in {rng.choice(WORDS)}:\n    print(item)  # @{rng.choice(WORDS)}\n```\n"
+    if kind < 0.30:
+        return f"https://example.com/{rng.choice(WORDS)}/{rng.randint(1, 9999)}"
+    if kind < 0.36:
+        return f"@{rng.choice(WORDS)}_{rng.randint(1, 99)}"
+    if kind < 0.41:
+        return f":{rng.choice(('thumbsup', 'wave', 'tada', 'eyes'))}:"
+    if kind < 0.44:
+        return "\n\n\n"
+    return words
+
+
+def generate_messages(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        parts = []
+        length = 0
+        while length < MESSAGE_LENGTH:
+            fragment = random_fragment(rng)
+            parts.append(fragment)
+            length += len(fragment) + 1
+        messages.append(" ".join(parts)[:MESSAGE_LENGTH])
+    return messages
+
+
+def process_regex(content: str):
+    """What the write path did with the regex formatter"""
+    valid = RegexFormatter.validate_formatting(content)
+    sanitized = RegexFormatter.sanitize_content(content)
+    return valid, sanitized, RegexFormatter.parse_formatting(sanitized), RegexFormatter.MENTION_PATTERN.findall(sanitized)
+
+
+def process_tokenizer(content: str):
+    """What the write path does with the tokenizer"""
+    result = MessageFormatter.scan(content)
+    return result.valid, result.content, result.formatting, result.mentions
+
+
+def bench(label: str, function, messages: list, repeat: int) -> float:
+    """Best-of-repeat microseconds per message"""
+    timer = timeit.Timer(lambda: [function(message) for message in messages])
+    best = min(timer.repeat(repeat=repeat, number=1))
+    per_message = best / len(messages) * 1e6
+    print(f"{label:>10}: {per_message:8.1f} µs/message")
+    return per_message
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500, help="Generated messages per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    messages = generate_messages(args.messages, args.seed)
+    print(f"🧪 {len(messages)} messages of ~{MESSAGE_LENGTH} characters\n")
+
+    regex_time = bench("regex", process_regex, messages, args.repeat)
+    tokenizer_time = bench("tokenizer", process_tokenizer, messages, args.repeat)
+    print(f"\n⚡ Speedup: {regex_time / tokenizer_time:.1f}x")
+
+    # Both must agree on validity, sanitized content, formatting and mentions
+    # wherever the regex formatter was right
+    comparable = [message for message in messages if regex_formatter_applies(message)]
+    differing = sum(
+        process_regex(message) != process_tokenizer(message)
+        for message in comparable
+    )
+    print(f"📝 Results differ on {differing}/{len(comparable)} messages the regex formatter handled correctly")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark the production launcher at different worker counts
+
+For each worker count the server is started with `start.py` in production
+mode, then measured twice:
+
+- HTTP: requests/s against /health from concurrent keep-alive clients
+- WebSocket fan-out: messages are posted to one channel over the REST API
+  and every connected socket counts the new_message events it receives;
+  the result is deliveries/s
+
+Needs a running database and Redis, like the server itself. Benchmark users
+(bench_user_N) and the channel are created on the first run and reused.
+
+Usage: python scripts/benchmark_workers.py --workers 1,2,4
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+# Add the parent directory to the path so we can run from the scripts folder
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.core.config import settings
+
+BENCH_PASSWORD = "bench-password"
+BENCH_CHANNEL = "bench-fanout"
+
+# Stay well under WS_MAX_SESSIONS_PER_USER
+SESSIONS_PER_USER = 5
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    """Launch start.py in production mode with the given worker count"""
+    env = dict(os.environ, ENVIRONMENT="production", WEB_CONCURRENCY=str(workers), PORT=str(port))
+    return subprocess.Popen(
+        [sys.executable, "start.py"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def wait_until_healthy(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+
+async def bench_http(base_url: str, concurrency: int, duration: float) -> float:
+    """Requests per second against /health"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    completed = 0
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        deadline = time.monotonic() + duration
+
+        async def worker():
+            nonlocal completed
+            while time.monotonic() < deadline:
+                response = await client.get("/health")
+                if response.status_code == 200:
+                    completed += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return completed / elapsed
+
+
+async def get_token(client: httpx.AsyncClient, index: int) -> str:
+    """Log in a benchmark user, registering it on first use"""
+    username = f"bench_user_{index}"
+    response = await client.post(f"{settings.API_V1_STR}/auth/login", json={
+        "username": username,
+        "password": BENCH_PASSWORD
+    })
+    if response.status_code == 401:
+        response = await client.post(f"{settings.API_V1_STR}/auth/register", json={
+            "username": username,
+            "email": f"{username}@bench.local",
+            "password": BENCH_PASSWORD
+        })
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def prepare_channel(client: httpx.AsyncClient, tokens: list) -> str:
+    """Create the benchmark channel if needed and make every user a member"""
+    headers = {"Authorization": f"Bearer {tokens[0]}"}
+    response = await client.post(f"{settings.API_V1_STR}/channels/", headers=headers, json={
+        "name": BENCH_CHANNEL,
+        "description": "Fan-out benchmark"
+    })
+    if response.status_code == 200:
+        channel_id = response.json()["id"]
+    else:
+        channels = (await client.get(f"{settings.API_V1_STR}/channels/", headers=headers)).json()
+        channel_id = next(channel["id"] for channel in channels if channel["name"] == BENCH_CHANNEL)
+
+    for token in tokens:
+        # 400 means already a member
+        await client.post(
+            f"{settings.API_V1_STR}/channels/join",
+            headers={"Authorization": f"Bearer {token}"},
+            json={"channel_id": channel_id}
+        )
+    return channel_id
+
+
+async def bench_fanout(base_url: str, clients: int, messages: int) -> float:
+    """Deliveries per second of new_message events to every socket in a channel"""
+    users = max(1, -(-clients // SESSIONS_PER_USER))
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        tokens = [await get_token(client, index) for index in range(users)]
+        channel_id = await prepare_channel(client, tokens)
+
+        ws_url = base_url.replace("http", "ws", 1)
+        sockets = []
+        for index in range(clients):
+            sockets.append(await websockets.connect(f"{ws_url}/ws?token={tokens[index % users]}"))
+            # Keep under the handshake admission rate
+            await asyncio.sleep(1.0 / settings.WS_ADMISSION_RATE)
+
+        # Let the auto-join finish before sending
+        await asyncio.sleep(1.0)
+
+        async def receive(socket) -> int:
+            received = 0
+            while received < messages:
+                event = json.loads(await socket.recv())
+                if event.get("type") == "new_message":
+                    received += 1
+            return received
+
+        receivers = [asyncio.create_task(receive(socket)) for socket in sockets]
+        started = time.monotonic()
+        for number in range(messages):
+            response = await client.post(
+                f"{settings.API_V1_STR}/messages/",
+                headers={"Authorization": f"Bearer {tokens[number % users]}"},
+                json={"content": f"bench message {number}", "channel_id": channel_id}
+            )
+            response.raise_for_status()
+
+        done, pending = await asyncio.wait(receivers, timeout=60.0)
+        elapsed = time.monotonic() - started
+        for task in pending:
+            task.cancel()
+        for socket in sockets:
+            await socket.close()
+
+    delivered = sum(task.result() for task in done)
+    if pending:
+        print(f"⚠️  {len(pending)} sockets did not receive every message")
+    return delivered / elapsed
+
+
+async def run_benchmark(args) -> list:
+    results = []
+    for workers in args.workers:
+        base_url = f"http://127.0.0.1:{args.port}"
+        print(f"🚀 Starting server with {workers} workers")
+        process = start_server(workers, args.port)
+        try:
+            await wait_until_healthy(base_url)
+            requests_per_second = await bench_http(base_url, args.concurrency, args.duration)
+            print(f"   HTTP: {requests_per_second:,.0f} req/s")
+            deliveries_per_second = await bench_fanout(base_url, args.clients, args.messages)
+            print(f"   WS fan-out: {deliveries_per_second:,.0f} deliveries/s")
+            results.append((workers, requests_per_second, deliveries_per_second))
+        finally:
+            stop_server(process)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}",
+                        type=lambda value: [int(item) for item in value.split(",")],
+                        help="Comma-separated worker counts to measure")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of HTTP load per run")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent HTTP clients")
+    parser.add_argument("--clients", type=int, default=50, help="WebSocket connections in the channel")
+    parser.add_argument("--messages", type=int, default=100, help="Messages posted per run")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+
+    print()
+    print(f"{'workers':>8} {'HTTP req/s':>12} {'WS deliveries/s':>16}")
+    print("=" * 38)
+    for workers, requests_per_second, deliveries_per_second in results:
+        print(f"{workers:>8} {requests_per_second:>12,.0f} {deliveries_per_second:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Check that every hot query shape issued by the routers uses its index
+
+Each query below mirrors the SQL Prisma issues for a router query and names
+the index from the hot-query migration that should serve it. The script
+seeds synthetic users, channels, messages, mentions, reactions and admin
+actions, runs ANALYZE, then EXPLAINs each shape with sequential scans
+disabled and checks that the plan scans the expected index. Checking for
+the index rather than for the absence of a Seq Scan matters: with seq
+scans off, Postgres will rather read a whole composite unique index (e.g.
+mentions (userId, messageId)) than fail, which would hide a dropped index.
+Everything runs in one transaction that is rolled back, so the database is
+left as it was.
+
+Run it against a local or CI database, never production: the seed takes
+locks on the tables until the rollback.
+
+Exits with status 1 when any query does not use its index.
+
+Usage: python scripts/check_query_plans.py [--messages 100000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+import asyncpg
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+
+# Page sizes the routers use
+HISTORY_PAGE = 51  # limit + 1 to detect more pages
+MENTIONS_PAGE = 20
+ADMIN_ACTIONS_PAGE = 50
+
+# Formatted with the integer seed sizes from the command line
+SEED_SQL = [
+    """
+    INSERT INTO users (id, email, username, password, "updatedAt")
+    SELECT 'plan_user_' || i, 'plan_user_' || i || '@plan.local', 'plan_user_' || i, 'x', now()
+    FROM generate_series(1, {users}) i
+    """,
+    """
+    INSERT INTO channels (id, name, "updatedAt")
+    SELECT 'plan_channel_' || i, 'plan-channel-' || i, now()
+    FROM generate_series(1, {channels}) i
+    """,
+    """
+    INSERT INTO channel_members (id, "userId", "channelId")
+    SELECT 'plan_member_' || u || '_' || c, 'plan_user_' || u, 'plan_channel_' || c
+    FROM generate_series(1, {users}) u, generate_series(1, {channels}) c
+    """,
+    """
+    INSERT INTO messages (id, content, "createdAt", "updatedAt", "userId", "channelId")
+    SELECT 'plan_message_' || i, 'message ' || i, now() - i * interval '1 second', now(),
+           'plan_user_' || (i % {users} + 1), 'plan_channel_' || (i % {channels} + 1)
+    FROM generate_series(1, {messages}) i
+    """,
+    """
+    INSERT INTO mentions (id, "createdAt", "userId", "messageId")
+    SELECT 'plan_mention_' || i, now() - i * interval '1 second', 'plan_user_' || (i % {users} + 1), 'plan_message_' || i
+    FROM generate_series(1, {messages}, 10) i
+    """,
+    """
+    INSERT INTO message_reactions (id, emoji, "userId", "messageId")
+    SELECT 'plan_reaction_' || i, '👍', 'plan_user_' || (i % {users} + 1), 'plan_message_' || i
+    FROM generate_series(1, {messages}, 5) i
+    """,
+    """
+    INSERT INTO admin_actions (id, action, "targetType", "targetId", "createdAt", "adminId")
+    SELECT 'plan_action_' || i, 'DELETE_MESSAGE', 'MESSAGE', 'plan_message_' || i,
+           now() - i * interval '1 minute', 'plan_user_' || (i % {users} + 1)
+    FROM generate_series(1, greatest({messages} / 100, 1)) i
+    """,
+]
+
+ANALYZED_TABLES = ["users", "channels", "channel_members", "messages", "mentions", "message_reactions", "admin_actions"]
+
+
+def hot_queries(cursor_time: datetime) -> list:
+    """(name, router, expected index, sql, args) for every query shape to check"""
+    page_ids = [f"plan_message_{i}" for i in range(1, HISTORY_PAGE + 1)]
+    return [
+        (
+            "channel history, latest page", "messages.get_channel_history",
+            "messages_channelId_createdAt_id_idx",
+            'SELECT * FROM messages WHERE "channelId" = $1 ORDER BY "createdAt" DESC, id DESC LIMIT $2',
+            ["plan_channel_1", HISTORY_PAGE]
+        ),
+        (
+            "channel history, before cursor", "messages.get_channel_history",
+            "messages_channelId_createdAt_id_idx",
+            'SELECT * FROM messages WHERE "channelId" = $1 AND "createdAt" <= $2 '
+            'AND ("createdAt" < $2 OR id < $3) ORDER BY "createdAt" DESC, id DESC LIMIT $4',
+            ["plan_channel_1", cursor_time, "plan_message_500", HISTORY_PAGE]
+        ),
+        (
+            "channel history, after cursor", "messages.get_channel_history",
+            "messages_channelId_createdAt_id_idx",
+            'SELECT * FROM messages WHERE "channelId" = $1 AND "createdAt" >= $2 '
+            'AND ("createdAt" > $2 OR id > $3) ORDER BY "createdAt" ASC, id ASC LIMIT $4',
+            ["plan_channel_1", cursor_time, "plan_message_500", HISTORY_PAGE]
+        ),
+        (
+            "reactions of a page", "messages.build_message_details",
+            "message_reactions_messageId_idx",
+            'SELECT * FROM message_reactions WHERE "messageId" = ANY($1::text[])',
+            [page_ids]
+        ),
+        (
+            "mentions of a page", "messages.build_message_details",
+            "mentions_messageId_idx",
+            'SELECT * FROM mentions WHERE "messageId" = ANY($1::text[])',
+            [page_ids]
+        ),
+        (
+            "my mentions", "messages.get_my_mentions",
+            "mentions_userId_createdAt_idx",
+            'SELECT * FROM mentions WHERE "userId" = $1 ORDER BY "createdAt" DESC LIMIT $2',
+            ["plan_user_1", MENTIONS_PAGE]
+        ),
+        (
+            "channel members", "presence / channels.get_channel",
+            "channel_members_channelId_idx",
+            'SELECT * FROM channel_members WHERE "channelId" = $1',
+            ["plan_channel_1"]
+        ),
+        (
+            "messages today", "admin.get_dashboard_stats",
+            "messages_createdAt_idx",
+            'SELECT count(*) FROM messages WHERE "createdAt" >= $1',
+            [datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)]
+        ),
+        (
+            "recent admin actions", "admin.get_dashboard_stats / admin.get_admin_actions",
+            "admin_actions_createdAt_idx",
+            'SELECT * FROM admin_actions ORDER BY "createdAt" DESC LIMIT $1',
+            [ADMIN_ACTIONS_PAGE]
+        ),
+        (
+            "admin actions by admin", "admin.get_admin_actions",
+            "admin_actions_adminId_createdAt_idx",
+            'SELECT * FROM admin_actions WHERE "adminId" = $1 ORDER BY "createdAt" DESC LIMIT $2',
+            ["plan_user_1", ADMIN_ACTIONS_PAGE]
+        ),
+        (
+            "admin actions by type", "admin.get_admin_actions",
+            "admin_actions_action_createdAt_idx",
+            'SELECT * FROM admin_actions WHERE action = $1 ORDER BY "createdAt" DESC LIMIT $2',
+            ["DELETE_MESSAGE", ADMIN_ACTIONS_PAGE]
+        ),
+    ]
+
+
+def connection_args() -> dict:
+    """asyncpg arguments for DATABASE_URL; Prisma's ?schema= becomes the search_path"""
+    url = urlsplit(settings.DATABASE_URL)
+    schema = parse_qs(url.query).get("schema", ["public"])[0]
+    return {
+        "dsn": url._replace(query="").geturl(),
+        "server_settings": {"search_path": schema}
+    }
+
+
+def index_names(plan: dict) -> list:
+    """Indexes read by any node of the plan tree"""
+    found = []
+    if "Index Name" in plan:
+        found.append(plan["Index Name"])
+    for child in plan.get("Plans", ()):
+        found.extend(index_names(child))
+    return found
+
+
+def scan_summary(plan: dict) -> str:
+    """Scan nodes of the plan, e.g. 'Index Scan (messages_channelId_createdAt_id_idx)'"""
+    nodes = []
+    if "Scan" in plan["Node Type"]:
+        target = plan.get("Index Name") or plan.get("Relation Name")
+        nodes.append(f"{plan['Node Type']} ({target})")
+    for child in plan.get("Plans", ()):
+        nodes.append(scan_summary(child))
+    return ", ".join(node for node in nodes if node)
+
+
+async def check_plans(args) -> bool:
+    connection = await asyncpg.connect(**connection_args())
+    failures = 0
+    try:
+        transaction = connection.transaction()
+        await transaction.start()
+        try:
+            print(f"🌱 Seeding {args.users} users, {args.channels} channels and {args.messages} messages")
+            for statement in SEED_SQL:
+                await connection.execute(statement.format(
+                    users=args.users, channels=args.channels, messages=args.messages
+                ))
+            for table in ANALYZED_TABLES:
+                await connection.execute(f"ANALYZE {table}")
+
+            # Keep the small seeded tables from being read sequentially anyway
+            await connection.execute("SET LOCAL enable_seqscan = off")
+
+            cursor_time = await connection.fetchval(
+                "SELECT \"createdAt\" FROM messages WHERE id = 'plan_message_500'"
+            )
+
+            print()
+            for name, router, index, sql, query_args in hot_queries(cursor_time):
+                explained = await connection.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *query_args)
+                plan = json.loads(explained)[0]["Plan"]
+                if index in index_names(plan):
+                    print(f"✅ {name} [{router}]: {scan_summary(plan)}")
+                else:
+                    failures += 1
+                    print(f"❌ {name} [{router}]: expected {index}, got {scan_summary(plan)}")
+        finally:
+            await transaction.rollback()
+    finally:
+        await connection.close()
+
+    print()
+    if failures:
+        print(f"❌ {failures} hot queries do not use their index")
+    else:
+        print("🎉 Every hot query uses its index")
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=100000)
+    args = parser.parse_args()
+
+    sys.exit(0 if asyncio.run(check_plans(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
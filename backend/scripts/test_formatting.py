@@ -4,11 +4,21 @@ Test script for message formatting functionality
 Run this to test the formatting parser and validator
 """
 
+import random
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.models.message import MessageFormatter
+from benchmark_formatting import RegexFormatter, regex_formatter_applies
+
+# Pieces the random messages are built from, chosen to collide with each other.
+# Code and bold are left out: the regex formatter got them wrong
+FUZZ_PIECES = [
+    "*", "@", ":", "a", "_", "h", "https://", "http://", " ", "   ",
+    "\n", "\n\n\n", "\t", ".com", "/", "é", "@ada", ":wave:", ", "
+]
+
 
 def test_formatting():
     """Test various formatting scenarios"""
@@ -128,6 +138,179 @@ def test_formatting():
     return failed == 0
 
 
+def test_tokenizer():
+    """Test validity, sanitized content and mentions from a single scan"""
+    
+    test_cases = [
+        {
+            "name": "Bold is not italic",
+            "content": "**bold** text",
+            "expected_valid": True,
+            "expected_content": "**bold** text",
+            "expected_mentions": [],
+            "expected_formatting": {"has_bold": True, "has_italic": False}
+        },
+        {
+            "name": "Bold and italic together",
+            "content": "***both*** and *italic* with **bold**",
+            "expected_valid": True,
+            "expected_content": "***both*** and *italic* with **bold**",
+            "expected_mentions": [],
+            "expected_formatting": {"has_bold": True, "has_italic": True}
+        },
+        {
+            "name": "Markers inside code are literal",
+            "content": "Use `**kwargs` here",
+            "expected_valid": True,
+            "expected_content": "Use `**kwargs` here",
+            "expected_mentions": [],
+            "expected_formatting": {"has_bold": False, "has_code": True}
+        },
+        {
+            "name": "Bold cannot close inside a code span",
+            "content": "**bold `code** end`",
+            "expected_valid": False,
+            "expected_content": "**bold `code** end`",
+            "expected_mentions": [],
+            "expected_formatting": {"has_bold": False, "has_code": True}
+        },
+        {
+            "name": "Code block with a stray backtick",
+            "content": "```\nx = `y`\n```",
+            "expected_valid": True,
+            "expected_content": "```\nx = `y`\n```",
+            "expected_mentions": [],
+            "expected_formatting": {"has_code": False, "has_code_block": True}
+        },
+        {
+            "name": "Unclosed code block",
+            "content": "````x```",
+            "expected_valid": False,
+            "expected_content": "````x```",
+            "expected_mentions": [],
+            "expected_formatting": {"has_code_block": False}
+        },
+        {
+            "name": "Whitespace runs limited",
+            "content": "  first\n\n\n\nsecond     third  ",
+            "expected_valid": True,
+            "expected_content": "first\n\nsecond  third",
+            "expected_mentions": [],
+            "expected_formatting": {}
+        },
+        {
+            "name": "No mentions in code, links or email addresses",
+            "content": "@ada see https://example.com/@bob and `@carol`, mail dave@example.com",
+            "expected_valid": True,
+            "expected_content": "@ada see https://example.com/@bob and `@carol`, mail dave@example.com",
+            "expected_mentions": ["ada"],
+            "expected_formatting": {"link_count": 1, "mention_count": 1}
+        },
+        {
+            "name": "Mentions after punctuation",
+            "content": "(@ada, @bob)",
+            "expected_valid": True,
+            "expected_content": "(@ada, @bob)",
+            "expected_mentions": ["ada", "bob"],
+            "expected_formatting": {"mention_count": 2}
+        },
+        {
+            "name": "No emoji in code",
+            "content": "`a :wave: b` :tada:",
+            "expected_valid": True,
+            "expected_content": "`a :wave: b` :tada:",
+            "expected_mentions": [],
+            "expected_formatting": {"emoji_count": 1}
+        }
+    ]
+    
+    print("🧪 Testing Formatting Tokenizer\n")
+    print("=" * 60)
+    
+    passed = 0
+    failed = 0
+    
+    for i, test in enumerate(test_cases, 1):
+        print(f"\n{i}. {test['name']}")
+        print(f"Content: {test['content']!r}")
+        print("-" * 40)
+        
+        result = MessageFormatter.scan(test['content'])
+        checks = [
+            ("Validity", result.valid, test['expected_valid']),
+            ("Sanitized", result.content, test['expected_content']),
+            ("Mentions", result.mentions, test['expected_mentions'])
+        ]
+        checks += [
+            (field, getattr(result.formatting, field), expected)
+            for field, expected in test['expected_formatting'].items()
+        ]
+        
+        for label, actual, expected in checks:
+            if actual == expected:
+                print(f"✅ {label}: {actual!r}")
+                passed += 1
+            else:
+                print(f"❌ {label}: {actual!r} (Expected: {expected!r})")
+                failed += 1
+    
+    print("\n" + "=" * 60)
+    print(f"📊 Test Results: {passed} passed, {failed} failed")
+    
+    if failed == 0:
+        print("🎉 All tests passed!")
+    else:
+        print(f"⚠️  {failed} tests failed")
+    
+    return failed == 0
+
+
+def test_matches_regex_formatter(count: int = 20000):
+    """Test that the tokenizer agrees with the regex formatter it replaced
+    
+    Only on messages the regex formatter handled correctly; see
+    regex_formatter_applies for what it got wrong.
+    """
+    
+    rng = random.Random(25)
+    messages = []
+    while len(messages) < count:
+        content = "".join(rng.choice(FUZZ_PIECES) for _ in range(rng.randint(0, 30)))
+        if regex_formatter_applies(content):
+            messages.append(content)
+    
+    print(f"\n🧪 Comparing the tokenizer with the regex formatter on {len(messages)} messages\n")
+    print("=" * 60)
+    
+    failed = 0
+    for content in messages:
+        sanitized = RegexFormatter.sanitize_content(content)
+        expected = (
+            RegexFormatter.validate_formatting(content),
+            sanitized,
+            RegexFormatter.parse_formatting(sanitized),
+            RegexFormatter.MENTION_PATTERN.findall(sanitized)
+        )
+        result = MessageFormatter.scan(content)
+        actual = (result.valid, result.content, result.formatting, result.mentions)
+        
+        if actual != expected:
+            failed += 1
+            if failed <= 5:
+                print(f"❌ {content!r}")
+                print(f"   regex:     {expected}")
+                print(f"   tokenizer: {actual}")
+    
+    print(f"📊 Test Results: {len(messages) - failed} matched, {failed} differed")
+    
+    if failed == 0:
+        print("🎉 All tests passed!")
+    else:
+        print(f"⚠️  {failed} tests failed")
+    
+    return failed == 0
+
+
 def interactive_test():
     """Interactive testing mode"""
     print("\n🎮 Interactive Formatting Test")
@@ -190,4 +373,5 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--interactive":
         interactive_test()
     else:
-        test_formatting() 
\ No newline at end of file
+        results = [test_formatting(), test_tokenizer(), test_matches_regex_formatter()]
+        sys.exit(0 if all(results) else 1)
@@ -2,14 +2,14 @@
 """
 Startup script for Pythia Conversations Backend
 """
-import uvicorn
 from app.core.config import settings
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.ENVIRONMENT == "development",
-        log_level="info"
-    ) 
\ No newline at end of file
+    if settings.ENVIRONMENT == "development":
+        # Auto-reload, with the same WebSocket drain as production
+        from app.core.server import run_development
+        run_development(settings.HOST, settings.PORT)
+    else:
+        # Pre-forked workers sharing one preloaded copy of the app
+        from app.core.server import run_production, worker_count
+        run_production(settings.HOST, settings.PORT, worker_count())
@@ -60,6 +60,53 @@ export interface MessageWithDetails extends MessageWithUser {
   mention_count: number;
 }
 
+export interface MessageHistoryPage {
+  messages: MessageWithDetails[];
+  prev_cursor: string | null; // Pass as `before` for older messages
+  next_cursor: string | null; // Pass as `after` for newer messages
+}
+
+export interface UserPublic {
+  id: string;
+  username: string;
+  avatar?: string | null;
+  status: string;
+}
+
+export interface ReactionSummary {
+  emoji: string;
+  count: number;
+  me: boolean; // Whether the current user reacted with this emoji
+  user_ids: string[]; // The first few reacting users
+}
+
+export interface CompactMessage {
+  id: string;
+  content: string;
+  user_id: string;
+  channel_id: string;
+  created_at: string;
+  updated_at: string;
+  is_edited: boolean;
+  formatting?: MessageFormatting | null;
+  mention_ids: string[];
+  reactions: ReactionSummary[];
+}
+
+export interface MessageHistoryPageV2 {
+  messages: CompactMessage[];
+  users: Record<string, UserPublic>;
+  prev_cursor: string | null;
+  next_cursor: string | null;
+}
+
+export interface MessageHistoryQuery {
+  before?: string;
+  after?: string;
+  around?: string;
+  limit?: number;
+}
+
 export interface MessageCreate {
   content: string;
   channel_id: string;
@@ -34,6 +34,11 @@ export interface GetOnlineUsersMessage {
   channel_id: string;
 }
 
+export interface ResumeMessage {
+  type: 'resume';
+  channels: Record<string, number>;
+}
+
 // Server to Client messages
 export interface ConnectionEstablishedMessage {
   type: 'connection_established';
@@ -45,12 +50,16 @@ export interface ConnectionEstablishedMessage {
 export interface NewMessageMessage {
   type: 'new_message';
   data: MessageWithDetails;
+  channel_id?: string;
+  seq?: number;
   timestamp: string;
 }
 
 export interface MessageEditedMessage {
   type: 'message_edited';
   data: MessageWithDetails;
+  channel_id?: string;
+  seq?: number;
   timestamp: string;
 }
 
@@ -59,6 +68,7 @@ export interface MessageDeletedMessage {
   message_id: string;
   deleted_by: string;
   channel_id: string;
+  seq?: number;
 }
 
 export interface UserStatusMessage {
@@ -68,6 +78,27 @@ export interface UserStatusMessage {
   timestamp: string;
 }
 
+export interface TypingUsersMessage {
+  type: 'typing_users';
+  channel_id: string;
+  users: Array<{ user_id: string; username: string }>;
+  timestamp: string;
+}
+
+export interface ResyncRequiredMessage {
+  type: 'resync_required';
+  channel_id: string;
+  last_seq: number;
+  current_seq: number;
+  timestamp: string;
+}
+
+export interface ServerGoingAwayMessage {
+  type: 'server_going_away';
+  reconnect_delay: number; // seconds
+  timestamp: string;
+}
+
 export interface MentionNotificationMessage {
   type: 'mention_notification';
   data: {
@@ -93,6 +124,9 @@ export type ServerMessage =
   | MessageEditedMessage
   | MessageDeletedMessage
   | UserStatusMessage
+  | TypingUsersMessage
+  | ResyncRequiredMessage
+  | ServerGoingAwayMessage
   | MentionNotificationMessage
   | ErrorMessage;
 
@@ -101,4 +135,5 @@ export type ClientMessage =
   | LeaveChannelMessage
   | TypingIndicatorMessage
   | PingMessage
-  | GetOnlineUsersMessage; 
\ No newline at end of file
+  | GetOnlineUsersMessage
+  | ResumeMessage; 
\ No newline at end of file